@@ -0,0 +1,354 @@
+"""
+Benchmark: throughput and peak memory of each stage of conversion.
+
+Each stage is timed over the synthetic documents from `corpus.py` (from one
+chunk up to 1,000, with long and short chunks, large and missing front
+matter, and with and without chunk options and magics):
+
+- `convert`: `QmdToPyConverter.convert()`, from lines to linter input.
+- `collect`: `collect_python_blocks()` on an already parsed document.
+- `lint-build`: `LintOutputBuilder.build()`, from collected blocks.
+- `format-build`: `FormatOutputBuilder.build()`, from collected blocks.
+- `rebuild`: `recreate_qmd_from_formatted_py()`, splicing formatted code
+  back into the `.qmd` file (already formatted, so it is read and compared
+  but not rewritten, as in most runs).
+
+Each result is the fastest of `--repeat` samples, reported as documents
+and (document) lines per second, with the peak Python memory allocated
+during one call (from `tracemalloc`, so Tree-sitter's own allocations are
+not included).
+
+Run from the repository root with lintquarto installed:
+
+    python benchmarks/conversion.py [--stage NAME ...] [--json OUT]
+    python benchmarks/conversion.py --compare OUT [--threshold PERCENT]
+
+With `--compare`, results are shown against a previous `--json` file, and
+the exit code is 1 if any stage is more than `--threshold` percent slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from corpus import DEFAULT_SPECS, DocumentSpec, make_document
+
+from lintquarto.convert.build_output import (
+    FormatOutputBuilder,
+    LintOutputBuilder,
+)
+from lintquarto.convert.collect_python import collect_python_blocks
+from lintquarto.convert.converter import (
+    QmdToPyConverter,
+    get_parser,
+    parse_qmd,
+)
+from lintquarto.convert.rebuild_qmd import recreate_qmd_from_formatted_py
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+STAGES = ["convert", "collect", "lint-build", "format-build", "rebuild"]
+
+
+def prepare(
+    stage: str, spec: DocumentSpec, folder: Path
+) -> Callable[[], object]:
+    """
+    Set up one stage for one document, returning the call to time.
+
+    Work that the stage depends on (e.g. parsing, for `collect`) is done
+    here, so only the stage itself is timed.
+
+    Parameters
+    ----------
+    stage : str
+        Name of the stage, from `STAGES`.
+    spec : DocumentSpec
+        Shape of the document.
+    folder : Path
+        Folder for any files the stage needs.
+
+    Returns
+    -------
+    Callable[[], object]
+        Function running the stage once.
+    """
+    text = make_document(spec)
+    qmd_lines = text.splitlines(keepends=True)
+    parsed = parse_qmd(qmd_lines)
+    settings = {
+        "python_blocks": parsed.python_blocks,
+        "lint_non_exec": False,
+        "yaml_eval_default": parsed.yaml_eval_default,
+        "spacing_rules": False,
+    }
+
+    if stage == "convert":
+        # flake8 also adds noqa comments for spacing rules
+        converter = QmdToPyConverter("flake8")
+        return lambda: converter.convert(qmd_lines)
+
+    if stage == "collect":
+        # Keep the tree, as its nodes are only valid while it exists
+        tree = get_parser().parse(parsed.src_bytes)
+        return lambda: collect_python_blocks(
+            parsed.src_bytes, tree.root_node, parsed.lines
+        )
+
+    if stage == "lint-build":
+        return lambda: LintOutputBuilder(
+            preserve_line_count=True, **settings
+        ).build(parsed.lines)
+
+    if stage == "format-build":
+        return lambda: FormatOutputBuilder(
+            preserve_line_count=False, **settings
+        ).build(parsed.lines)
+
+    # rebuild: the converted code is the "formatted" code, so the file
+    # is unchanged and isn't rewritten
+    converter = QmdToPyConverter("ruff-format", mode="format")
+    py_lines = converter.convert(qmd_lines)
+    qmd_path = folder / f"{spec.name}.qmd"
+    py_path = folder / f"{spec.name}.py"
+    qmd_path.write_text(text, encoding="utf-8")
+    py_path.write_text("\n".join(py_lines) + "\n", encoding="utf-8")
+    return lambda: recreate_qmd_from_formatted_py(
+        qmd_path, py_path, converter.python_blocks
+    )
+
+
+def best_time(
+    run: Callable[[], object], repeat: int, min_time: float
+) -> float:
+    """
+    Return the fastest time for one call, over several samples.
+
+    Each sample calls `run` enough times to take at least `min_time`, so
+    short stages are still timed accurately.
+
+    Parameters
+    ----------
+    run : Callable[[], object]
+        Function to time.
+    repeat : int
+        Number of samples.
+    min_time : float
+        Minimum length of each sample, in seconds.
+
+    Returns
+    -------
+    float
+        Fastest mean time per call, in seconds.
+    """
+    # Find how many calls fill a sample (which also warms up)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def peak_memory(run: Callable[[], object]) -> int:
+    """
+    Return the peak Python memory allocated during one call.
+
+    Parameters
+    ----------
+    run : Callable[[], object]
+        Function to measure.
+
+    Returns
+    -------
+    int
+        Peak size of memory blocks allocated by the call, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(
+    stages: list[str], repeat: int, min_time: float
+) -> list[dict]:
+    """
+    Time every stage over every document spec.
+
+    Parameters
+    ----------
+    stages : list[str]
+        Names of the stages to run.
+    repeat : int
+        Number of samples for each result.
+    min_time : float
+        Minimum length of each sample, in seconds.
+
+    Returns
+    -------
+    list[dict]
+        One result per spec and stage, with its `case`, `stage`, document
+        `lines`, `seconds` per document, and `peak_bytes`.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for spec in DEFAULT_SPECS:
+            lines = make_document(spec).count("\n")
+            for stage in stages:
+                run = prepare(stage, spec, Path(tmp))
+                results.append(
+                    {
+                        "case": spec.name,
+                        "stage": stage,
+                        "lines": lines,
+                        "seconds": best_time(run, repeat, min_time),
+                        "peak_bytes": peak_memory(run),
+                    }
+                )
+    return results
+
+
+def report(results: list[dict], baseline: list[dict] | None = None) -> None:
+    """
+    Print the results as a table.
+
+    Parameters
+    ----------
+    results : list[dict]
+        Results from `run_benchmarks()`.
+    baseline : list[dict] | None, optional
+        Earlier results to compare against. Adds a column with the change
+        in time per document.
+    """
+    before = {(r["case"], r["stage"]): r["seconds"] for r in baseline or []}
+    header = (
+        f"{'case':<26} {'stage':<13} {'lines':>6} {'ms/doc':>9} "
+        f"{'docs/s':>9} {'lines/s':>11} {'peak KiB':>9}"
+    )
+    print(header + (f" {'change':>8}" if baseline is not None else ""))
+    for r in results:
+        row = (
+            f"{r['case']:<26} {r['stage']:<13} {r['lines']:>6} "
+            f"{r['seconds'] * 1e3:>9.3f} {1 / r['seconds']:>9.0f} "
+            f"{r['lines'] / r['seconds']:>11.0f} "
+            f"{r['peak_bytes'] / 1024:>9.1f}"
+        )
+        if baseline is not None:
+            old = before.get((r["case"], r["stage"]))
+            row += (
+                f" {change(old, r['seconds']):>+7.1f}%"
+                if old
+                else f" {'new':>8}"
+            )
+        print(row)
+
+
+def change(old: float, new: float) -> float:
+    """
+    Return the change from one time to another, as a percentage.
+
+    Parameters
+    ----------
+    old : float
+        Earlier time.
+    new : float
+        Later time.
+
+    Returns
+    -------
+    float
+        Percentage change (positive if slower).
+    """
+    return (new / old - 1) * 100
+
+
+def regressions(
+    results: list[dict], baseline: list[dict], threshold: float
+) -> list[str]:
+    """
+    List the results that are slower than the baseline by over `threshold`.
+
+    Parameters
+    ----------
+    results : list[dict]
+        Results from `run_benchmarks()`.
+    baseline : list[dict]
+        Earlier results to compare against.
+    threshold : float
+        Largest allowed slowdown, as a percentage.
+
+    Returns
+    -------
+    list[str]
+        Description of each regression.
+    """
+    before = {(r["case"], r["stage"]): r["seconds"] for r in baseline}
+    slower = []
+    for r in results:
+        old = before.get((r["case"], r["stage"]))
+        if old and change(old, r["seconds"]) > threshold:
+            slower.append(
+                f"{r['case']} {r['stage']}: {change(old, r['seconds']):+.1f}%"
+            )
+    return slower
+
+
+def main() -> None:
+    """Run the benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stage", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--json", type=Path, help="save results to a file")
+    parser.add_argument(
+        "--compare", type=Path, help="compare with results saved by --json"
+    )
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    baseline = (
+        json.loads(args.compare.read_text(encoding="utf-8"))
+        if args.compare is not None
+        else None
+    )
+    results = run_benchmarks(args.stage, args.repeat, args.min_time)
+    report(results, baseline)
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results to {args.json}")
+
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\nSlower than baseline by over {args.threshold}%:")
+            for line in slower:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
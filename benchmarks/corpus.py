@@ -0,0 +1,232 @@
+"""
+Generate synthetic Quarto documents for benchmarks.
+
+Documents are built from a `DocumentSpec`, which sets the number of Python
+chunks, lines per chunk, size of the YAML front matter, and whether chunks
+have options (`#| ...`) and IPython magics. The same spec always gives the
+same document, so results can be compared between runs.
+
+Run from the repository root to write a corpus to a folder:
+
+    python benchmarks/corpus.py OUTPUT_DIR [--documents N] [--chunks N] ...
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class DocumentSpec:
+    """
+    Shape of a synthetic Quarto document.
+
+    Attributes
+    ----------
+    chunks : int
+        Number of Python code chunks.
+    lines_per_chunk : int
+        Lines of code in each chunk (not counting options and magics).
+    front_matter_lines : int
+        Lines of YAML front matter (0 for none).
+    options : bool
+        If True, start each chunk with chunk options (`#| label: ...`).
+    magics : bool
+        If True, add IPython line magics to each chunk, and make every
+        fifth chunk a cell magic.
+    """
+
+    chunks: int = 10
+    lines_per_chunk: int = 10
+    front_matter_lines: int = 5
+    options: bool = True
+    magics: bool = False
+
+    @property
+    def name(self) -> str:
+        """
+        Short name for the spec, used to label results and files.
+
+        Returns
+        -------
+        str
+            E.g. `c10-l10-fm5-opts`.
+        """
+        parts = [
+            f"c{self.chunks}",
+            f"l{self.lines_per_chunk}",
+            f"fm{self.front_matter_lines}",
+        ]
+        if self.options:
+            parts.append("opts")
+        if self.magics:
+            parts.append("magics")
+        return "-".join(parts)
+
+
+# Spec that each benchmark case varies one setting of
+BASE_SPEC = DocumentSpec()
+
+# Cases covering each setting in turn, from a single chunk up to 1,000
+DEFAULT_SPECS = [
+    *(replace(BASE_SPEC, chunks=n) for n in (1, 10, 100, 1000)),
+    *(replace(BASE_SPEC, lines_per_chunk=n) for n in (1, 100)),
+    replace(BASE_SPEC, front_matter_lines=0),
+    replace(BASE_SPEC, front_matter_lines=200),
+    replace(BASE_SPEC, options=False),
+    replace(BASE_SPEC, magics=True),
+]
+
+
+def front_matter(lines: int) -> list[str]:
+    """
+    Return YAML front matter with (about) the given number of lines.
+
+    Parameters
+    ----------
+    lines : int
+        Number of lines, including the `---` fences. 0 gives none.
+
+    Returns
+    -------
+    list[str]
+        Lines of front matter (without line endings).
+    """
+    if lines <= 0:
+        return []
+    body = ['title: "Synthetic document"', "execute:", "  eval: true"]
+    body.extend(
+        f"param_{i}: value {i}" for i in range(max(lines - 2 - len(body), 0))
+    )
+    return ["---", *body[: max(lines - 2, 0)], "---", ""]
+
+
+def chunk(index: int, spec: DocumentSpec) -> list[str]:
+    """
+    Return one Python code chunk, with its fences.
+
+    Parameters
+    ----------
+    index : int
+        Position of the chunk in the document, used to vary its content.
+    spec : DocumentSpec
+        Shape of the document.
+
+    Returns
+    -------
+    list[str]
+        Lines of the chunk (without line endings).
+    """
+    lines = ["```{python}"]
+    if spec.magics and index % 5 == 0:
+        lines.append("%%capture")
+    if spec.options:
+        lines.extend([f"#| label: chunk-{index}", "#| echo: false"])
+        if index % 3 == 0:
+            lines.append("#| eval: true")
+    if spec.magics:
+        lines.append("%matplotlib inline")
+
+    # Mix of statements, so each part of the conversion has work to do
+    code = [
+        f"def function_{index}(x):",
+        f'    """Return x plus {index}."""',
+        f"    return x + {index}",
+        "",
+        f"value_{index} = function_{index}(1)",
+        f"items_{index} = [value_{index} * i for i in range(10)]",
+        f"print(items_{index})  # comment",
+        f"mapping_{index} = {{'key': value_{index}}}",
+    ]
+    lines.extend(code[i % len(code)] for i in range(spec.lines_per_chunk))
+    lines.append("```")
+    return lines
+
+
+def make_document(spec: DocumentSpec) -> str:
+    """
+    Build a synthetic Quarto document.
+
+    Parameters
+    ----------
+    spec : DocumentSpec
+        Shape of the document.
+
+    Returns
+    -------
+    str
+        The document.
+    """
+    lines = front_matter(spec.front_matter_lines)
+    lines.extend(["# Synthetic document", ""])
+    for index in range(spec.chunks):
+        lines.extend([f"## Section {index}", "", "Some *prose* text.", ""])
+        lines.extend(chunk(index, spec))
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def write_corpus(
+    folder: str | Path, specs: list[DocumentSpec], documents: int = 1
+) -> list[Path]:
+    """
+    Write documents for each spec to a folder.
+
+    Parameters
+    ----------
+    folder : str | Path
+        Folder to write to (created if needed). Each spec's documents go in
+        a subfolder, as `<spec name>/doc_<n>/index.qmd`, so documents share
+        names as they do in Quarto websites.
+    specs : list[DocumentSpec]
+        Shapes of the documents.
+    documents : int, optional
+        Number of documents to write for each spec.
+
+    Returns
+    -------
+    list[Path]
+        Paths to the written `.qmd` files.
+    """
+    paths = []
+    for spec in specs:
+        text = make_document(spec)
+        for n in range(documents):
+            path = Path(folder) / spec.name / f"doc_{n}" / "index.qmd"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            paths.append(path)
+    return paths
+
+
+def main() -> None:
+    """Write a corpus of synthetic documents."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=BASE_SPEC.chunks)
+    parser.add_argument(
+        "--lines-per-chunk", type=int, default=BASE_SPEC.lines_per_chunk
+    )
+    parser.add_argument(
+        "--front-matter-lines", type=int, default=BASE_SPEC.front_matter_lines
+    )
+    parser.add_argument("--no-options", action="store_true")
+    parser.add_argument("--magics", action="store_true")
+    args = parser.parse_args()
+
+    spec = DocumentSpec(
+        chunks=args.chunks,
+        lines_per_chunk=args.lines_per_chunk,
+        front_matter_lines=args.front_matter_lines,
+        options=not args.no_options,
+        magics=args.magics,
+    )
+    paths = write_corpus(args.output, [spec], args.documents)
+    print(f"Wrote {len(paths)} documents ({spec.name}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: per-document Tree-sitter parse cost.
+
+Compares building a new `Parser(Language(...))` for every document (as
+conversions used to) with reusing the shared parser from `get_parser()`.
+
+Run from the repository root with lintquarto installed:
+
+    python benchmarks/parser_setup.py [QMD_FILE ...] [--repeat N]
+
+If no files are given, every .qmd file under `docs/` is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import tree_sitter_markdown as tsmd
+from tree_sitter import Language, Parser
+
+from lintquarto.convert.converter import get_parser
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def time_per_document(
+    parse: Callable[[bytes], object], documents: list[bytes], repeat: int
+) -> float:
+    """
+    Time parsing every document, `repeat` times over.
+
+    Parameters
+    ----------
+    parse : Callable[[bytes], object]
+        Function that parses one document, given its bytes.
+    documents : list[bytes]
+        Documents to parse.
+    repeat : int
+        Number of passes over the documents.
+
+    Returns
+    -------
+    float
+        Mean time per document, in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for document in documents:
+            parse(document)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(documents)) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    files = args.files or sorted(Path("docs").rglob("*.qmd"))
+    documents = [file.read_bytes() for file in files]
+    if not documents:
+        parser.error("no .qmd files found")
+
+    # Warm up, so the first grammar load isn't counted against either side
+    get_parser().parse(documents[0])
+
+    fresh = time_per_document(
+        lambda src: Parser(Language(tsmd.language())).parse(src),
+        documents,
+        args.repeat,
+    )
+    shared = time_per_document(
+        lambda src: get_parser().parse(src), documents, args.repeat
+    )
+
+    print(f"{len(documents)} documents x {args.repeat} passes")
+    print(f"  new parser per document: {fresh:9.1f} us/doc")
+    print(f"  shared parser:           {shared:9.1f} us/doc")
+    print(f"  saving:                  {fresh - shared:9.1f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,13 @@ import argparse
 import sys
 from typing import NoReturn
 
-from lintquarto.registry import Formatters, Linters
+from lintquarto.defaults import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_INTERVAL,
+    DEFAULT_REPEAT,
+    DEFAULT_RESCAN,
+)
+from lintquarto.registry import CROSS_FILE_LINTERS, Formatters, Linters
 
 
 class CustomArgumentParser(argparse.ArgumentParser):
@@ -61,6 +67,93 @@ class SingleMetavarHelpFormatter(argparse.HelpFormatter):
         return f"{', '.join(action.option_strings)} {args_string}"
 
 
+def non_negative_int(value: str) -> int:
+    """
+    Convert a CLI argument to an integer that is zero or more.
+
+    Parameters
+    ----------
+    value : str
+        Raw argument value.
+
+    Returns
+    -------
+    int
+        The parsed integer.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the value is not an integer, or is negative.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        msg = f"expected a whole number of 0 or more, got '{value}'"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def positive_int(value: str) -> int:
+    """
+    Convert a CLI argument to an integer that is 1 or more.
+
+    Parameters
+    ----------
+    value : str
+        Raw argument value.
+
+    Returns
+    -------
+    int
+        The parsed integer.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the value is not an integer, or is below 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        msg = f"expected a whole number of 1 or more, got '{value}'"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def positive_float(value: str) -> float:
+    """
+    Convert a CLI argument to a number greater than zero.
+
+    Parameters
+    ----------
+    value : str
+        Raw argument value.
+
+    Returns
+    -------
+    float
+        The parsed number.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the value is not a number, or is not above zero.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        number = -1.0
+    if not number > 0:
+        msg = f"expected a number above 0, got '{value}'"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
 def build_parser() -> CustomArgumentParser:
     """
     Create and configure the CLI argument parser.
@@ -70,9 +163,6 @@ def build_parser() -> CustomArgumentParser:
     parser : CustomArgumentParser
         CLI argument parser.
     """
-    linters = list(Linters().supported.keys())
-    formatters = list(Formatters().supported.keys())
-
     # Set up custom argumentparser with help statements
     parser = CustomArgumentParser(
         description="Lint Python code in Quarto (.qmd) files.",
@@ -94,7 +184,109 @@ def build_parser() -> CustomArgumentParser:
         help="List supported linters and whether they are available.",
     )
 
+    # Subcommand which keeps running, re-running tools as files change. It
+    # accepts the same options as the main command, so they can be given
+    # after `watch` too. Options not given after `watch` are left unset
+    # (SUPPRESS), so they don't overwrite any given before it
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help=(
+            "Run the linters and custom commands, then re-run them on each "
+            ".qmd file that changes, until stopped with Ctrl+C."
+        ),
+        formatter_class=SingleMetavarHelpFormatter,
+        argument_default=argparse.SUPPRESS,
+    )
+    add_tool_arguments(watch_parser)
+    watch_parser.add_argument(
+        "--interval",
+        type=positive_float,
+        default=DEFAULT_INTERVAL,
+        metavar="SECONDS",
+        help=f"Seconds between checks (default {DEFAULT_INTERVAL}).",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=positive_float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help=(
+            "Seconds a file must stay unchanged before tools are re-run "
+            f"(default {DEFAULT_DEBOUNCE})."
+        ),
+    )
+    watch_parser.add_argument(
+        "--rescan",
+        type=positive_float,
+        default=DEFAULT_RESCAN,
+        metavar="SECONDS",
+        help=(
+            "Seconds between searches for new .qmd files (default "
+            f"{DEFAULT_RESCAN:g}). Files already found are checked every "
+            "--interval."
+        ),
+    )
+
+    # Subcommand which times lintquarto's own work, by running the usual
+    # pipeline with a command that does nothing. It accepts the same options
+    # as the main command, which choose the files and how they are processed
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help=(
+            "Time lintquarto's own overhead, per phase and per file, by "
+            "running a command that does nothing in place of each chosen "
+            "linter."
+        ),
+        formatter_class=SingleMetavarHelpFormatter,
+        argument_default=argparse.SUPPRESS,
+    )
+    add_tool_arguments(bench_parser)
+    bench_parser.add_argument(
+        "--repeat",
+        type=positive_int,
+        default=DEFAULT_REPEAT,
+        metavar="N",
+        help=(
+            f"Number of runs, of which the fastest is reported (default "
+            f"{DEFAULT_REPEAT})."
+        ),
+    )
+    bench_parser.add_argument(
+        "--budget",
+        type=positive_float,
+        default=None,
+        metavar="MS",
+        help=(
+            "Exit with 1 if lintquarto's overhead (excluding the tool) is "
+            "more than this many milliseconds per file."
+        ),
+    )
+    bench_parser.add_argument(
+        "--json",
+        default=None,
+        metavar="FILE",
+        help="Also save the results to a JSON file.",
+    )
+
     # Default commands
+    add_tool_arguments(parser)
+    parser.set_defaults(exclude=[], custom_commands=[])
+
+    return parser
+
+
+def add_tool_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options which choose tools, files and behaviour.
+
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        Parser (or subcommand parser) to add the options to.
+    """
+    linters = list(Linters().supported.keys())
+    formatters = list(Formatters().supported.keys())
+
     parser.add_argument(
         "-l",
         "--linters",
@@ -113,6 +305,23 @@ def build_parser() -> CustomArgumentParser:
         metavar="FORMATTER",
         help=f"Formatter to run. Valid options: {formatters}.",
     )
+    check = parser.add_mutually_exclusive_group()
+    check.add_argument(
+        "--check",
+        action="store_true",
+        help=(
+            "Don't rewrite files with formatters. Instead, list the files "
+            "that would change, and exit with 1 if there are any."
+        ),
+    )
+    check.add_argument(
+        "--diff",
+        action="store_true",
+        help=(
+            "As --check, and also print a unified diff of the changes "
+            "formatters would make."
+        ),
+    )
     parser.add_argument(
         "-p",
         "--paths",
@@ -124,9 +333,39 @@ def build_parser() -> CustomArgumentParser:
         "-e",
         "--exclude",
         nargs="*",
-        default=[],
         metavar="[exclude_paths]",
-        help="Files and/or directories to exclude from running tools on.",
+        help=(
+            "Files and/or directories to exclude from running tools on, or "
+            "gitignore-style patterns (quote them), e.g. '**/drafts/**' or "
+            "'*_scratch.qmd'."
+        ),
+    )
+    parser.add_argument(
+        "--respect-gitignore",
+        action="store_true",
+        help="Also exclude files ignored by .gitignore files.",
+    )
+    parser.add_argument(
+        "--respect-quarto-render",
+        action="store_true",
+        help=(
+            "Also exclude files that _quarto.yml leaves out of rendering "
+            "('!' entries under project: render:)."
+        ),
+    )
+    changed = parser.add_mutually_exclusive_group()
+    changed.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help=(
+            "Only process .qmd files changed (or untracked) since the given "
+            "git reference, e.g. main."
+        ),
+    )
+    changed.add_argument(
+        "--staged",
+        action="store_true",
+        help="Only process .qmd files staged for commit in git.",
     )
     parser.add_argument(
         "-n",
@@ -146,11 +385,69 @@ def build_parser() -> CustomArgumentParser:
         action="store_true",
         help="Keep temporary .py files after linting.",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        action="store_true",
+        help=(
+            "Run each linter, custom command or formatter once across all "
+            "files (in chunks), instead of once per file."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=non_negative_int,
+        metavar="N",
+        help=(
+            "Number of files to process at once (default 1, or 0 for one "
+            "per CPU). Output is still printed in order."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "Don't reuse or save linter results in .lintquarto_cache/. "
+            "Otherwise, results are reused for .qmd files (and tool "
+            "settings) that haven't changed, except from linters which also "
+            f"read imported modules ({', '.join(CROSS_FILE_LINTERS)}), "
+            "which always run."
+        ),
+    )
+    parser.add_argument(
+        "--scratch",
+        action="store_true",
+        help=(
+            "Write temporary .py files to a folder outside the source tree "
+            "($XDG_RUNTIME_DIR, /dev/shm or the system temporary folder), "
+            "removed at the end of the run."
+        ),
+    )
+    parser.add_argument(
+        "--scratch-dir",
+        metavar="DIR",
+        help="Folder to use for --scratch (implies --scratch).",
+    )
+    parser.add_argument(
+        "--build",
+        action="store_true",
+        help=(
+            "Write the .py files for linters and custom commands to a "
+            "persistent folder (.lintquarto/build/), under the same name on "
+            "every run and only when they change, so that tools' own caches "
+            "(e.g. mypy's) are reused."
+        ),
+    )
+    parser.add_argument(
+        "--build-dir",
+        metavar="DIR",
+        help="Folder to use for --build (implies --build).",
+    )
     parser.add_argument(
         "-c",
         "--custom-commands",
         action="append",
-        default=[],
         metavar="COMMAND",
         help=(
             "Custom command to run against the generated .py file. "
@@ -158,5 +455,21 @@ def build_parser() -> CustomArgumentParser:
             'Example: --custom-commands "mytool"'
         ),
     )
-
-    return parser
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help=(
+            "Time each phase (finding files, loading configuration, "
+            "converting, running tools, rewriting their output) for every "
+            "file and tool, and print the slowest to stderr at the end."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help=(
+            "Save the time taken by each phase, for every file and tool, as "
+            "a Chrome trace (JSON), which can be opened in Perfetto or "
+            "chrome://tracing."
+        ),
+    )
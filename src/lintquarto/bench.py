@@ -0,0 +1,228 @@
+"""Measure lintquarto's own overhead, by running tools that do nothing."""
+
+from __future__ import annotations
+
+import io
+import shutil
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .defaults import DEFAULT_REPEAT
+from .registry import stand_in
+from .timings import Timings, recording
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Phases in the order they happen in a run, for the report
+PHASES = ["config", "gather", "convert", "write", "tool", "rewrite", "cleanup"]
+
+# Number of files listed in the report as the slowest
+SLOWEST_FILES = 5
+
+# =============================================================================
+# Main function: run the pipeline several times, and report the fastest
+# =============================================================================
+
+
+def bench(
+    run: Callable[[], int],
+    *,
+    repeat: int = DEFAULT_REPEAT,
+    budget: float | None = None,
+    json_path: str | Path | None = None,
+) -> int:
+    """
+    Time several runs of the pipeline, and report the fastest.
+
+    The pipeline is run with a command which does nothing (see
+    `noop_command()`) in place of each linter, so all of the time is
+    lintquarto's own work: gathering files, loading configuration,
+    converting, writing temporary files, starting the tool, and rewriting
+    its output. Each linter still takes its usual path, e.g. sending code
+    on standard input, or one run across all files with `--batch`.
+    Everything the runs print is held back, and only shown if a run fails.
+
+    Parameters
+    ----------
+    run : Callable[[], int]
+        Function that runs the pipeline once, returning its exit code.
+    repeat : int, optional
+        Number of runs. The first also loads the Markdown parser, so later
+        runs are usually faster.
+    budget : float | None, optional
+        If provided, the most milliseconds per file the fastest run may
+        take.
+    json_path : str | Path | None, optional
+        If provided, also save the results to this JSON file.
+
+    Returns
+    -------
+    int
+        0 on success, 1 if a run failed or the budget was exceeded.
+    """
+    runs: list[tuple[float, Timings]] = []
+    for _ in range(repeat):
+        output = io.StringIO()
+        with (
+            recording() as timings,
+            stand_in(noop_command()),
+            redirect_stdout(output),
+        ):
+            start = time.perf_counter()
+            try:
+                with redirect_stderr(output):
+                    exit_code = run()
+            except SystemExit as e:
+                # e.g. if no .qmd files were found
+                exit_code = e.code if isinstance(e.code, int) else 1
+            elapsed = time.perf_counter() - start
+        if exit_code != 0:
+            print(output.getvalue(), end="")
+            print(
+                f"Error: benchmark run failed (exit code {exit_code})",
+                file=sys.stderr,
+            )
+            return 1
+        runs.append((elapsed, timings))
+
+    elapsed, timings = min(runs, key=lambda item: item[0])
+    summary = summarise(timings, elapsed, runs=repeat)
+    print_report(summary)
+
+    if json_path is not None:
+        import json  # noqa: PLC0415
+
+        Path(json_path).write_text(
+            json.dumps(summary, indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"\nSaved results to {json_path}")
+
+    if budget is not None and summary["per_file_ms"] > budget:
+        print(
+            f"\nOverhead of {summary['per_file_ms']:.2f} ms per file is over "
+            f"the budget of {budget:g} ms.",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+# =============================================================================
+# Helpers which choose the tool, and summarise and print the results
+# =============================================================================
+
+
+def noop_command() -> list[str]:
+    """
+    Command which does nothing, run on each file in place of the tools.
+
+    Returns
+    -------
+    list[str]
+        `true` if available, as it starts far faster than Python. Otherwise
+        (e.g. on Windows), the current Python, told to run no code.
+    """
+    if shutil.which("true") is not None:
+        return ["true"]
+    return [sys.executable, "-I", "-S", "-c", ""]
+
+
+def noop_commands(
+    custom_commands: list[str], linters: list[str]
+) -> list[list[str]]:
+    """
+    Return the custom commands to run in a benchmark.
+
+    Parameters
+    ----------
+    custom_commands : list[str]
+        The chosen custom commands.
+    linters : list[str]
+        The chosen linters.
+
+    Returns
+    -------
+    list[list[str]]
+        `noop_command()` in place of each custom command, or once on its
+        own if no tools were chosen.
+    """
+    if not custom_commands and not linters:
+        return [noop_command()]
+    return [noop_command() for _ in custom_commands]
+
+
+def summarise(timings: Timings, elapsed: float, *, runs: int) -> dict:
+    """
+    Total the time spent in each phase, and for each file.
+
+    Parameters
+    ----------
+    timings : Timings
+        Phases recorded during the run.
+    elapsed : float
+        Length of the whole run, in seconds.
+    runs : int
+        Number of runs the fastest was chosen from.
+
+    Returns
+    -------
+    dict
+        The number of `files` and `runs`, the `tools` replaced by the
+        command that does nothing, `total_ms` and `per_file_ms`, the
+        milliseconds for each of the `phases` (with `other` for time spent
+        outside them), and the `slowest` files with their milliseconds.
+    """
+    per_file = timings.per_file()
+    files = max(len(per_file), 1)
+
+    totals = timings.totals()
+    phases = {name: totals.pop(name, 0.0) * 1e3 for name in PHASES}
+    # Any phases recorded by other parts of lintquarto
+    phases.update({name: value * 1e3 for name, value in totals.items()})
+    # With --jobs, phases overlap, so can add up to more than the run
+    phases["other"] = max(elapsed * 1e3 - sum(phases.values()), 0.0)
+
+    slowest = sorted(per_file.items(), key=lambda item: -item[1])
+    return {
+        "files": len(per_file),
+        "runs": runs,
+        "tools": list(timings.per_tool()),
+        "total_ms": elapsed * 1e3,
+        "per_file_ms": elapsed * 1e3 / files,
+        "phases": phases,
+        "slowest": {
+            file: seconds * 1e3 for file, seconds in slowest[:SLOWEST_FILES]
+        },
+    }
+
+
+def print_report(summary: dict) -> None:
+    """
+    Print the time spent in each phase, and the slowest files.
+
+    Parameters
+    ----------
+    summary : dict
+        Results from `summarise()`.
+    """
+    files = max(summary["files"], 1)
+    total = summary["total_ms"]
+    print(
+        f"lintquarto overhead: {summary['files']} file(s), fastest of "
+        f"{summary['runs']} run(s), with a command that does nothing in "
+        f"place of: {', '.join(summary['tools'])}\n"
+    )
+    print(f"{'phase':<10} {'total ms':>10} {'ms/file':>10} {'share':>7}")
+    for name, ms in summary["phases"].items():
+        share = ms / total * 100 if total else 0.0
+        print(f"{name:<10} {ms:>10.2f} {ms / files:>10.3f} {share:>6.1f}%")
+    print(f"{'total':<10} {total:>10.2f} {summary['per_file_ms']:>10.3f}")
+
+    if summary["slowest"]:
+        print("\nSlowest files (time in phases for the file):")
+        for file, ms in summary["slowest"].items():
+            print(f"  {ms:>8.2f} ms  {file}")
@@ -5,8 +5,6 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from pathlib import Path
 
-import toml
-
 # =============================================================================
 # Main function: find pyproject.toml and load arguments
 # =============================================================================
@@ -32,6 +30,9 @@ def load_config(start_dir: str | Path = ".") -> LintquartoConfig:
     if pyproject_path is None:
         return LintquartoConfig()
 
+    # Imported here, so that runs without a pyproject.toml don't pay for it
+    import toml  # noqa: PLC0415
+
     try:
         with pyproject_path.open(encoding="utf-8") as f:
             data = toml.load(f)
@@ -51,6 +52,15 @@ def load_config(start_dir: str | Path = ".") -> LintquartoConfig:
         lint_non_exec=_bool(section, "lint-non-exec"),
         verbose=_bool(section, "verbose"),
         keep_temp=_bool(section, "keep-temp"),
+        batch=_bool(section, "batch"),
+        no_cache=_bool(section, "no-cache"),
+        scratch=_bool(section, "scratch"),
+        scratch_dir=_str(section, "scratch-dir"),
+        build=_bool(section, "build"),
+        build_dir=_str(section, "build-dir"),
+        respect_gitignore=_bool(section, "respect-gitignore"),
+        respect_quarto_render=_bool(section, "respect-quarto-render"),
+        jobs=_int(section, "jobs"),
         custom_commands=_str_list(section, "custom-commands"),
         config_path=pyproject_path,
     )
@@ -112,8 +122,8 @@ class LintquartoConfig:
         Files and/or directories to run tools on. Equivalent to
         `-p` / `--paths`.
     exclude : list[str]
-        Files and/or directories to exclude from running tools on. Equivalent
-        to `-e` / `--exclude`.
+        Files and/or directories to exclude from running tools on, or
+        gitignore-style patterns. Equivalent to `-e` / `--exclude`.
     lint_non_exec : bool
         If `True`, also lint non-executable Python code chunks. Equivalent to
         `-n` / `--lint-non-exec`.
@@ -123,6 +133,33 @@ class LintquartoConfig:
     keep_temp : bool
         If `True`, retain temporary `.py` files after linting. Equivalent to
         `-k` / `--keep-temp`.
+    batch : bool
+        If `True`, run each tool once across all files rather than once per
+        file. Equivalent to `-b` / `--batch`.
+    jobs : int | None
+        Number of files to process at once, or `None` if not set. Equivalent
+        to `-j` / `--jobs`.
+    no_cache : bool
+        If `True`, don't reuse or save linter results. Equivalent to
+        `--no-cache`.
+    scratch : bool
+        If `True`, write temporary `.py` files to a folder outside the source
+        tree. Equivalent to `--scratch`.
+    scratch_dir : str | None
+        Folder to use for `scratch`, or `None` if not set. Equivalent to
+        `--scratch-dir`.
+    build : bool
+        If `True`, write the `.py` files for linters to a persistent folder,
+        reused between runs. Equivalent to `--build`.
+    build_dir : str | None
+        Folder to use for `build`, or `None` if not set. Equivalent to
+        `--build-dir`.
+    respect_gitignore : bool
+        If `True`, also exclude files ignored by `.gitignore` files.
+        Equivalent to `--respect-gitignore`.
+    respect_quarto_render : bool
+        If `True`, also exclude files that `_quarto.yml` leaves out of
+        rendering. Equivalent to `--respect-quarto-render`.
     custom_commands : list[str]
         Custom commands to run against the generated `.py` file. Equivalent to
         `-c` / `--custom-commands`.
@@ -139,6 +176,15 @@ class LintquartoConfig:
     lint_non_exec: bool = False
     verbose: bool = False
     keep_temp: bool = False
+    batch: bool = False
+    jobs: int | None = None
+    no_cache: bool = False
+    scratch: bool = False
+    scratch_dir: str | None = None
+    build: bool = False
+    build_dir: str | None = None
+    respect_gitignore: bool = False
+    respect_quarto_render: bool = False
     custom_commands: list[str] = field(default_factory=list)
     config_path: Path | None = None
 
@@ -195,3 +241,50 @@ def _bool(section: dict, key: str, *, default: bool = False) -> bool:
     if isinstance(raw, bool):
         return raw
     return default
+
+
+def _int(section: dict, key: str) -> int | None:
+    """
+    Extract a non-negative integer from `section`.
+
+    Parameters
+    ----------
+    section : dict
+        Mapping containing configuration values from `[tool.lintquarto]`.
+    key : str
+        Name of the configuration field to read.
+
+    Returns
+    -------
+    int | None
+        Integer stored under `key`, or `None` when the stored value is
+        missing, not an integer, or negative.
+    """
+    raw = section.get(key)
+    # Exclude bool, which is a subclass of int
+    if isinstance(raw, int) and not isinstance(raw, bool) and raw >= 0:
+        return raw
+    return None
+
+
+def _str(section: dict, key: str) -> str | None:
+    """
+    Extract a non-empty string from `section`.
+
+    Parameters
+    ----------
+    section : dict
+        Mapping containing configuration values from `[tool.lintquarto]`.
+    key : str
+        Name of the configuration field to read.
+
+    Returns
+    -------
+    str | None
+        String stored under `key`, or `None` when the stored value is
+        missing, not a string, or empty.
+    """
+    raw = section.get(key)
+    if isinstance(raw, str) and raw:
+        return raw
+    return None
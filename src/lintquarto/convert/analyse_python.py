@@ -11,7 +11,7 @@ import re
 from tree_sitter import Node
 
 
-def analyse_block(src_bytes: bytes, fcb_node: Node, lang_text: str) -> dict:
+def analyse_block(lines: list[str], fcb_node: Node, lang_text: str) -> dict:
     """
     Extract metadata for a single fenced Python code block.
 
@@ -21,8 +21,8 @@ def analyse_block(src_bytes: bytes, fcb_node: Node, lang_text: str) -> dict:
 
     Parameters
     ----------
-    src_bytes : bytes
-        UTF-8 encoded document source.
+    lines : list of str
+        Decoded document lines, indexed by Tree-sitter row.
     fcb_node : Node
         A `fenced_code_block` node identified as Python.
     lang_text : str
@@ -38,7 +38,7 @@ def analyse_block(src_bytes: bytes, fcb_node: Node, lang_text: str) -> dict:
     # Analyse the content region to distinguish options and magic from
     # standard code lines
     content_info = analyse_block_content(
-        src_bytes,
+        lines,
         content_node,
         closing_row,
     )
@@ -130,7 +130,7 @@ def find_content_node(fcb_node: Node) -> Node | None:
 
 
 def analyse_block_content(
-    src_bytes: bytes,
+    lines: list[str],
     content_node: Node | None,
     closing_row: int,
 ) -> dict:
@@ -142,8 +142,8 @@ def analyse_block_content(
 
     Parameters
     ----------
-    src_bytes : bytes
-        UTF-8 encoded document source.
+    lines : list of str
+        Decoded document lines, indexed by Tree-sitter row.
     content_node : Node or None
         The `code_fence_content` node for the block, or `None` if
         the block has no content.
@@ -176,7 +176,7 @@ def analyse_block_content(
         # The content region ends one row before the closing fence
         content_last = closing_row - 1
         for row_num, line in get_rows(
-            src_bytes,
+            lines,
             content_start,
             content_last,
         ):
@@ -205,15 +205,15 @@ def analyse_block_content(
 
 
 def get_rows(
-    src_bytes: bytes, start_row: int, end_row: int
+    lines: list[str], start_row: int, end_row: int
 ) -> list[tuple[int, str]]:
     """
     Return (row_number, line_text) pairs for a given range of rows.
 
     Parameters
     ----------
-    src_bytes : bytes
-        UTF-8 encoded document source.
+    lines : list of str
+        Decoded document lines, indexed by Tree-sitter row.
     start_row : int
         First row index to include.
     end_row : int
@@ -225,12 +225,10 @@ def get_rows(
         A list of tuples containing the row index and corresponding
         line text for each row in the requested interval.
     """
-    # Decode into str and split into lines
-    # Row indices match Tree-sitter's `row` co-ordinates
-    all_lines = src_bytes.decode("utf-8", errors="replace").splitlines()
+    # Slice the shared line table, which is decoded once per document
     return [
-        (row, all_lines[row])
-        for row in range(start_row, min(end_row + 1, len(all_lines)))
+        (row, lines[row])
+        for row in range(start_row, min(end_row + 1, len(lines)))
     ]
 
 
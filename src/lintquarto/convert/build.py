@@ -0,0 +1,133 @@
+"""Persistent folder for converted files, reused from one run to the next."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+from .scratch import mirrored_py_path
+
+# Folder used for `--build` when no other is given (relative to the working
+# directory)
+DEFAULT_BUILD_DIR = Path(".lintquarto") / "build"
+
+
+class BuildDir:
+    """
+    Folder of converted .py files that are kept between runs.
+
+    Each `.qmd` file always maps to the same `.py` file, in a tree that
+    mirrors the `.qmd` files (relative to the working directory), under a
+    folder for each set of conversion settings - so `docs/intro.qmd`
+    converted for mypy becomes `<root>/lint/docs/intro.py`. Files are only
+    rewritten when their content changes, so they keep their modification
+    time, and the tools' own incremental caches (e.g. `.mypy_cache`) can
+    skip unchanged files on the next run.
+
+    Attributes
+    ----------
+    root : Path
+        The folder (absolute).
+    """
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        """
+        Initialise BuildDir.
+
+        Parameters
+        ----------
+        root : str | Path | None, optional
+            The folder. Defaults to `DEFAULT_BUILD_DIR`.
+        """
+        self.root = Path(
+            root if root is not None else DEFAULT_BUILD_DIR
+        ).absolute()
+
+    def target(
+        self, qmd_path: str | Path, variant: str, stem: str | None = None
+    ) -> Path:
+        """
+        Return the .py path for a .qmd file.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        variant : str
+            Name for the conversion settings (e.g. from
+            `QmdToPyConverter.output_label`), so that tools needing different
+            output don't overwrite each other's files.
+        stem : str | None, optional
+            Name for the `.py` file (without suffix), e.g. from
+            `module_safe_stem()`. Defaults to the `.qmd` file's stem.
+
+        Returns
+        -------
+        Path
+            Path to the `.py` file within the folder.
+        """
+        return self.root / variant / mirrored_py_path(qmd_path, stem)
+
+    def write(
+        self,
+        qmd_path: str | Path,
+        variant: str,
+        text: str,
+        stem: str | None = None,
+    ) -> bool:
+        """
+        Write the converted code for a .qmd file, if it has changed.
+
+        The file is replaced in one step, so a tool running at the same time
+        (e.g. from another run) never reads a partly written file.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        variant : str
+            Name for the conversion settings.
+        text : str
+            The converted code.
+        stem : str | None, optional
+            Name for the `.py` file (without suffix). Defaults to the `.qmd`
+            file's stem.
+
+        Returns
+        -------
+        bool
+            True if the file was written, False if it was already up to date.
+        """
+        target = self.target(qmd_path, variant, stem)
+        try:
+            if target.read_text(encoding="utf-8") == text:
+                return False
+        except (OSError, UnicodeDecodeError):
+            # Not written yet (or unreadable), so write it afresh
+            pass
+
+        self._ensure_root()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(
+            prefix=f".{target.stem}-", suffix=".tmp", dir=target.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            Path(temp).replace(target)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        return True
+
+    def _ensure_root(self) -> None:
+        """Make the folder, with a `.gitignore` so it isn't committed."""
+        if self.root.is_dir():
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        gitignore = self.root / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text(
+                "# Created by lintquarto\n*\n", encoding="utf-8"
+            )
@@ -148,7 +148,7 @@ class OutputBuilder:
 class FormatOutputBuilder(OutputBuilder):
     """Build a formatter-friendly Python view."""
 
-    def build(self, src_bytes: bytes) -> list[str]:
+    def build(self, all_lines: list[str]) -> list[str]:
         """
         Populate `self.py_lines` for formatter, guided by block metadata.
 
@@ -157,16 +157,14 @@ class FormatOutputBuilder(OutputBuilder):
 
         Parameters
         ----------
-        src_bytes : bytes
-            UTF-8 encoded document source.
+        all_lines : list[str]
+            Decoded document lines, indexed by Tree-sitter row.
 
         Returns
         -------
         py_lines: list[str]
             Lines for Python file.
         """
-        all_lines = src_bytes.decode("utf-8", errors="replace").splitlines()
-
         for block in self.python_blocks:
             if not self.should_process_block(block):
                 continue
@@ -219,23 +217,21 @@ class LintOutputBuilder(OutputBuilder):
         super().__init__(*args, **kwargs)
         self.max_line_length = max_line_length
 
-    def build(self, src_bytes: bytes) -> list[str]:
+    def build(self, all_lines: list[str]) -> list[str]:
         """
         Populate `self.py_lines` for linting, guided by block metadata.
 
         Parameters
         ----------
-        src_bytes : bytes
-            UTF-8 encoded document source.
+        all_lines : list[str]
+            Decoded document lines, indexed by Tree-sitter row (so we can
+            iterate by row index).
 
         Returns
         -------
         py_lines: list[str]
             Lines for Python file.
         """
-        # Decode document back into list of text lines so we can iterate by
-        # row index (matching Tree-sitter's row numbering).
-        all_lines = src_bytes.decode("utf-8", errors="replace").splitlines()
         total_rows = len(all_lines)
 
         # Build a fast lookup from row index -> block metadata, so for any
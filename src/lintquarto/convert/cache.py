@@ -0,0 +1,493 @@
+"""Share converted files between tools within a single run."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+from lintquarto.timings import phase
+
+from .converter import QmdToPyConverter, check_line_count, parse_qmd
+from .filename import module_safe_stem, reserve_unique_filename
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+    from .build import BuildDir
+    from .converter import ParsedQmd
+    from .scratch import ScratchDir
+
+T = TypeVar("T")
+
+
+class ConversionCache:
+    """
+    Convert each .qmd file once per set of output settings, and share it.
+
+    Each document is read and parsed once. Its Python view is then built once
+    for each distinct `QmdToPyConverter.output_key`, and written (if needed)
+    once, so linters that need the same output (e.g. mypy, pylint and custom
+    commands) share one .py file. Tools that read from standard input can
+    use the lines directly, with nothing written. It is safe to use from
+    several threads at once.
+
+    If the tools are given with `expect()`, each output is forgotten (and
+    its .py file removed) as soon as the last tool needing it calls
+    `release()`, so memory use and the number of .py files in the source
+    tree don't grow with the number of files. Otherwise, everything is kept
+    until `cleanup()`.
+
+    Attributes
+    ----------
+    lint_non_exec : bool
+        If True, also lint non-executable Python code chunks.
+    verbose : bool
+        If True, print progress messages.
+    scratch : ScratchDir | None
+        If provided, .py files are written to this folder (and removed along
+        with it), rather than next to each .qmd file.
+    build : BuildDir | None
+        If provided, .py files are written to this persistent folder, under
+        the same name on every run, and are never removed. Takes precedence
+        over `scratch`.
+    py_files : list[Path]
+        Every .py file written and not yet removed, to remove in
+        `cleanup()`.
+    """
+
+    def __init__(
+        self,
+        *,
+        lint_non_exec: bool,
+        verbose: bool,
+        scratch: ScratchDir | None = None,
+        build: BuildDir | None = None,
+    ) -> None:
+        """
+        Initialise ConversionCache.
+
+        Parameters
+        ----------
+        lint_non_exec : bool
+            If True, also lint non-executable Python code chunks.
+        verbose : bool
+            If True, print progress messages.
+        scratch : ScratchDir | None, optional
+            If provided, write .py files to this folder rather than next to
+            each .qmd file.
+        build : BuildDir | None, optional
+            If provided, write .py files to this persistent folder (only
+            when their content changes), and keep them.
+        """
+        self.lint_non_exec = lint_non_exec
+        self.verbose = verbose
+        self.scratch = scratch
+        self.build = build
+
+        self._lock = threading.Lock()
+        self._parsed: dict[Hashable, Future[tuple[list[str], ParsedQmd]]] = {}
+        self._built: dict[Hashable, Future[list[str]]] = {}
+        self._converted: dict[Hashable, Future[Path]] = {}
+        # Written files, as a dict so they can be removed in any order
+        self._written: dict[Path, None] = {}
+        # Tools that will each call release() once per file, and for each
+        # file, the number of them yet to release each of its outputs
+        self._expected: list[str] = []
+        self._users: dict[Hashable, Counter[Hashable]] = {}
+
+    @property
+    def py_files(self) -> list[Path]:
+        """
+        Every .py file written and not yet removed.
+
+        Returns
+        -------
+        list[Path]
+            Paths to the .py files, in the order they were written.
+        """
+        with self._lock:
+            return list(self._written)
+
+    def expect(self, tools: list[str]) -> None:
+        """
+        Set the tools which will each use, then release, every file.
+
+        Parameters
+        ----------
+        tools : list[str]
+            Name of each linter, and "custom" for each custom command. A
+            tool given twice releases each file twice.
+        """
+        with self._lock:
+            self._expected = list(tools)
+            self._users = {}
+
+    def get(
+        self, qmd_path: str | Path, tool: str, *, module_safe: bool = False
+    ) -> Path:
+        """
+        Return the .py file for a .qmd file, converting it if needed.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        tool : str
+            Name of the linter, or "custom" for custom commands.
+        module_safe : bool, optional
+            If True, name the .py file with `module_safe_stem()`, so that
+            files from `.qmd` files with the same name can be type checked
+            together.
+
+        Returns
+        -------
+        Path
+            Path to the converted .py file.
+
+        Raises
+        ------
+        Exception
+            Any error raised while reading, parsing or writing. Errors are
+            remembered, so later calls for the same file raise them again.
+        """
+        qmd_path, converter, key = self._prepare(qmd_path, tool)
+        stem = module_safe_stem(qmd_path) if module_safe else None
+        return self._once(
+            self._converted,
+            (key, stem),
+            lambda: self._write(qmd_path, converter, key, stem),
+        )
+
+    def lines(self, qmd_path: str | Path, tool: str) -> list[str]:
+        """
+        Return the Python view of a .qmd file, without writing a .py file.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        tool : str
+            Name of the linter, or "custom" for custom commands.
+
+        Returns
+        -------
+        list[str]
+            Lines of Python code (without line endings).
+
+        Raises
+        ------
+        Exception
+            Any error raised while reading or parsing. Errors are remembered,
+            so later calls for the same file raise them again.
+        """
+        qmd_path, converter, key = self._prepare(qmd_path, tool)
+        return self._lines(qmd_path, converter, key)
+
+    def release(self, qmd_path: str | Path, tool: str) -> None:
+        """
+        Record that a tool has finished with a .qmd file.
+
+        Once every expected tool needing the same output has finished, the
+        output is forgotten and its .py file removed (unless in `build`).
+        Once they all have, the parsed document is forgotten too. Does
+        nothing unless the tools were given with `expect()`.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        tool : str
+            Name of the linter, or "custom" for custom commands.
+        """
+        if not self._expected:
+            return
+        qmd_path, _, key = self._prepare(qmd_path, tool)
+        file_key = qmd_path.resolve()
+        # Which output each tool needs depends on the file (e.g. its line
+        # length), so is worked out on the first release for each file
+        with self._lock:
+            users = self._users.get(file_key)
+        if users is None:
+            users = Counter(
+                self._prepare(qmd_path, expected)[2]
+                for expected in self._expected
+            )
+
+        finished: list[Future[Path]] = []
+        with self._lock:
+            users = self._users.setdefault(file_key, users)
+            users[key] -= 1
+            if users[key] <= 0:
+                del users[key]
+                self._built.pop(key, None)
+                for stem in (None, module_safe_stem(qmd_path)):
+                    future = self._converted.pop((key, stem), None)
+                    if future is not None:
+                        finished.append(future)
+            if not users:
+                del self._users[file_key]
+                self._parsed.pop(file_key, None)
+
+        # Remove the files outside the lock. Failed conversions have none
+        for future in finished:
+            if future.exception() is not None:
+                continue
+            py_file = future.result()
+            with self._lock:
+                written = py_file in self._written
+                self._written.pop(py_file, None)
+            if written:
+                with phase("cleanup", file=qmd_path):
+                    _remove(py_file)
+
+    def cleanup(self) -> None:
+        """Remove every .py file written by this cache (unless in `build`)."""
+        with self._lock:
+            py_files = list(self._written)
+            self._written.clear()
+        with phase("cleanup"):
+            # Files in a scratch folder are all removed at once, with the
+            # folder
+            if self.scratch is not None:
+                self.scratch.cleanup()
+                return
+            for py_file in py_files:
+                _remove(py_file)
+
+    def _prepare(
+        self, qmd_path: str | Path, tool: str
+    ) -> tuple[Path, QmdToPyConverter, Hashable]:
+        """
+        Set up the converter for a tool, and the key for its output.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        tool : str
+            Name of the linter, or "custom" for custom commands.
+
+        Returns
+        -------
+        tuple[Path, QmdToPyConverter, Hashable]
+            Path to the `.qmd` file, the converter, and the key shared by
+            every tool needing the same output.
+        """
+        qmd_path = Path(qmd_path)
+        converter = QmdToPyConverter(
+            tool=tool,
+            lint_non_exec=self.lint_non_exec,
+            config_dir=qmd_path.parent,
+        )
+        return qmd_path, converter, (qmd_path.resolve(), converter.output_key)
+
+    def _lines(
+        self, qmd_path: Path, converter: QmdToPyConverter, key: Hashable
+    ) -> list[str]:
+        """
+        Build the Python view of a .qmd file, once per key.
+
+        Parameters
+        ----------
+        qmd_path : Path
+            Path to the `.qmd` file.
+        converter : QmdToPyConverter
+            Converter with the settings to build the Python view with.
+        key : Hashable
+            Key for the converter's output, from `_prepare()`.
+
+        Returns
+        -------
+        list[str]
+            Lines of Python code (without line endings).
+        """
+
+        def build() -> list[str]:
+            qmd_lines, parsed = self._once(
+                self._parsed,
+                qmd_path.resolve(),
+                lambda: self._parse(qmd_path),
+            )
+            with phase("convert", file=qmd_path):
+                py_lines = converter.build(parsed)
+                if converter.preserve_line_count:
+                    check_line_count(qmd_lines, py_lines, verbose=self.verbose)
+            return py_lines
+
+        return self._once(self._built, key, build)
+
+    def _write(
+        self,
+        qmd_path: Path,
+        converter: QmdToPyConverter,
+        key: Hashable,
+        stem: str | None = None,
+    ) -> Path:
+        """
+        Build the Python view of a .qmd file and write it to a new .py file.
+
+        Parameters
+        ----------
+        qmd_path : Path
+            Path to the `.qmd` file.
+        converter : QmdToPyConverter
+            Converter with the settings to build the Python view with.
+        key : Hashable
+            Key for the converter's output, from `_prepare()`.
+        stem : str | None, optional
+            Name for the .py file (without suffix). Defaults to the `.qmd`
+            file's stem.
+
+        Returns
+        -------
+        Path
+            Path to the new .py file.
+        """
+        py_lines = self._lines(qmd_path, converter, key)
+        if self.build is not None:
+            return self._write_build(
+                self.build, qmd_path, converter, py_lines, stem
+            )
+
+        # Reserve a unique name, and remove it again if writing fails
+        if self.scratch is not None:
+            output_path = self.scratch.reserve(qmd_path, stem)
+        else:
+            output_path = reserve_unique_filename(
+                qmd_path.with_name(f"{stem or qmd_path.stem}.py")
+            )
+        if self.verbose:
+            print(f"Converting {qmd_path} to {output_path}")
+        try:
+            with (
+                phase("write", file=qmd_path),
+                output_path.open("w", encoding="utf-8") as f,
+            ):
+                f.write("\n".join(py_lines) + "\n")
+        except BaseException:
+            _remove(output_path)
+            raise
+        with self._lock:
+            self._written[output_path] = None
+        if self.verbose:
+            print(f"✓ Successfully converted {qmd_path} to {output_path}")
+        return output_path
+
+    def _write_build(
+        self,
+        build: BuildDir,
+        qmd_path: Path,
+        converter: QmdToPyConverter,
+        py_lines: list[str],
+        stem: str | None = None,
+    ) -> Path:
+        """
+        Write the Python view of a .qmd file to its persistent .py file.
+
+        Parameters
+        ----------
+        build : BuildDir
+            Build folder to write into.
+        qmd_path : Path
+            Path to the `.qmd` file.
+        converter : QmdToPyConverter
+            Converter the Python view was built with.
+        py_lines : list[str]
+            Lines of Python code (without line endings).
+        stem : str | None, optional
+            Name for the .py file (without suffix). Defaults to the `.qmd`
+            file's stem.
+
+        Returns
+        -------
+        Path
+            Path to the .py file, which is kept after the run.
+        """
+        variant = converter.output_label
+        output_path = build.target(qmd_path, variant, stem)
+        with phase("write", file=qmd_path):
+            written = build.write(
+                qmd_path, variant, "\n".join(py_lines) + "\n", stem
+            )
+        if self.verbose:
+            state = "Converted" if written else "Unchanged"
+            print(f"{state} {qmd_path} -> {output_path}")
+        return output_path
+
+    def _parse(self, qmd_path: Path) -> tuple[list[str], ParsedQmd]:
+        """
+        Read and parse a .qmd file.
+
+        Parameters
+        ----------
+        qmd_path : Path
+            Path to the `.qmd` file.
+
+        Returns
+        -------
+        tuple[list[str], ParsedQmd]
+            Lines of the file, and the parsed document.
+        """
+        with phase("convert", file=qmd_path):
+            with qmd_path.open(encoding="utf-8") as f:
+                qmd_lines = f.readlines()
+            return qmd_lines, parse_qmd(qmd_lines)
+
+    def _once(
+        self,
+        store: dict[Hashable, Future[T]],
+        key: Hashable,
+        create: Callable[[], T],
+    ) -> T:
+        """
+        Return the value for `key`, calling `create` only the first time.
+
+        If another thread is already creating the value, wait for it.
+
+        Parameters
+        ----------
+        store : dict[Hashable, Future[T]]
+            Where values (or errors) are stored.
+        key : Hashable
+            Key for the value.
+        create : Callable[[], T]
+            Function that creates the value.
+
+        Returns
+        -------
+        T
+            The stored value.
+        """
+        with self._lock:
+            future = store.get(key)
+            is_creator = future is None
+            if is_creator:
+                future = store[key] = Future()
+        if is_creator:
+            try:
+                future.set_result(create())
+            except Exception as e:  # noqa: BLE001
+                future.set_exception(e)
+        return future.result()
+
+
+def _remove(py_file: Path) -> None:
+    """
+    Remove a converted file, printing a warning if that fails.
+
+    Parameters
+    ----------
+    py_file : Path
+        Path to the .py file.
+    """
+    try:
+        py_file.unlink(missing_ok=True)
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Warning: Could not remove temporary file {py_file}: {e}",
+            file=sys.stderr,
+        )
@@ -5,7 +5,9 @@ from tree_sitter import Node
 from .analyse_python import analyse_block
 
 
-def collect_python_blocks(src_bytes: bytes, root: Node) -> list[dict]:
+def collect_python_blocks(
+    src_bytes: bytes, root: Node, lines: list[str]
+) -> list[dict]:
     """
     Collect all fenced Python code blocks in the document.
 
@@ -15,6 +17,9 @@ def collect_python_blocks(src_bytes: bytes, root: Node) -> list[dict]:
         UTF-8 encoded document source.
     root : Node
         Root node of the parsed Markdown tree.
+    lines : list of str
+        Decoded document lines, indexed by Tree-sitter row. These are shared
+        by every block, so the document is only decoded once.
 
     Returns
     -------
@@ -26,7 +31,7 @@ def collect_python_blocks(src_bytes: bytes, root: Node) -> list[dict]:
 
     # Go through the syntax tree, adding nodes to the `blocks` list only
     # if they are fenced code blocks whose language is Python
-    walk_for_python_blocks(src_bytes, root, blocks)
+    walk_for_python_blocks(src_bytes, root, blocks, lines)
 
     # Sort by starting row so the blocks are in document order
     blocks.sort(key=lambda b: b["start_row"])
@@ -38,7 +43,9 @@ def collect_python_blocks(src_bytes: bytes, root: Node) -> list[dict]:
     return blocks
 
 
-def walk_for_python_blocks(src_bytes: bytes, node: Node, blocks: list) -> None:
+def walk_for_python_blocks(
+    src_bytes: bytes, node: Node, blocks: list, lines: list[str]
+) -> None:
     """
     Recursively search for fenced Python code blocks.
 
@@ -50,6 +57,8 @@ def walk_for_python_blocks(src_bytes: bytes, node: Node, blocks: list) -> None:
         Current node in the Tree-sitter AST.
     blocks : list
         Mutable list that is populated with block metadata dictionaries.
+    lines : list of str
+        Decoded document lines, indexed by Tree-sitter row.
     """
     # Identify code blocks and get language
     if node.type == "fenced_code_block":
@@ -57,7 +66,7 @@ def walk_for_python_blocks(src_bytes: bytes, node: Node, blocks: list) -> None:
         # Check for "python" (active) or ".python" (inactive)
         if lang_text is not None and lang_text.lstrip(".").lower() == "python":
             # Extract metadata from block and append to list
-            blocks.append(analyse_block(src_bytes, node, lang_text))
+            blocks.append(analyse_block(lines, node, lang_text))
         return
 
     # For each node, visit all of its children (then their children, etc.).
@@ -65,7 +74,7 @@ def walk_for_python_blocks(src_bytes: bytes, node: Node, blocks: list) -> None:
     # naturally move on to the next sibling. This way we eventually visit
     # every node in the tree.
     for child in node.children:
-        walk_for_python_blocks(src_bytes, child, blocks)
+        walk_for_python_blocks(src_bytes, child, blocks, lines)
 
 
 def get_language_text(src_bytes: bytes, fcb_node: Node) -> str | None:
@@ -4,4 +4,8 @@ SPACING_RULE_LINTERS = ["flake8", "ruff", "pycodestyle"]
 
 NO_LINE_COUNT_PRESERVATION = ["radon-raw"]
 
+# Type checkers which name each file's module after its path, so refuse (or
+# merge) files with the same name when checking several at once
+MODULE_NAME_LINTERS = ["mypy", "pyrefly", "pytype"]
+
 FORMAT_SEPARATOR_PREFIX = "# %%LINTQUARTO-BLOCK-"
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import threading
 import traceback
 import warnings
+from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 from typing import Literal
 
@@ -12,13 +15,20 @@ from tree_sitter import Language, Parser
 
 from lintquarto.linelength import LineLengthDetector
 from lintquarto.registry import Formatters, Linters
+from lintquarto.timings import phase
 
 from .build_output import FormatOutputBuilder, LintOutputBuilder
 from .collect_python import collect_python_blocks
 from .constants import NO_LINE_COUNT_PRESERVATION, SPACING_RULE_LINTERS
-from .filename import get_unique_filename
+from .filename import (
+    get_unique_filename,  # noqa: F401 (re-exported)
+    reserve_unique_filename,
+)
 from .parse_yaml import find_metadata_node, parse_yaml_eval_from_node
 
+# Each thread keeps its own parser (see `get_parser()`)
+_thread_parsers = threading.local()
+
 
 class QmdToPyConverter:
     """
@@ -49,6 +59,7 @@ class QmdToPyConverter:
         *,
         lint_non_exec: bool = False,
         mode: Literal["lint", "format"] = "lint",
+        config_dir: str | Path = ".",
     ) -> None:
         """
         Initialise QmdToPyConverter.
@@ -61,6 +72,10 @@ class QmdToPyConverter:
             If True, also lint non-executable Python code chunks.
         mode : Literal["lint", "format"], optional
             Whether to general file suitable for linter or formatter.
+        config_dir : str | Path, optional
+            Folder from which to search for the linter's configured line
+            length (usually the `.qmd` file's folder, so nested projects
+            use their own settings). Defaults to the current directory.
         """
         self.lint_non_exec = lint_non_exec
         self.mode = mode
@@ -86,9 +101,54 @@ class QmdToPyConverter:
             self.mode == "lint" and tool in SPACING_RULE_LINTERS
         )
         if self.spacing_rules:
-            len_detect = LineLengthDetector(linter=tool)
+            len_detect = LineLengthDetector(linter=tool, start_dir=config_dir)
             self.max_line_length = len_detect.get_line_length()
 
+    @property
+    def output_key(self) -> tuple[object, ...]:
+        """
+        Settings that change the converted output.
+
+        Tools whose converters have equal keys get identical output for the
+        same document, so can share one converted file.
+
+        Returns
+        -------
+        tuple[object, ...]
+            The mode, `preserve_line_count`, `spacing_rules`,
+            `max_line_length` and `lint_non_exec` settings.
+        """
+        return (
+            self.mode,
+            self.preserve_line_count,
+            self.spacing_rules,
+            self.max_line_length,
+            self.lint_non_exec,
+        )
+
+    @property
+    def output_label(self) -> str:
+        """
+        Short, readable name for the settings in `output_key`.
+
+        Used to name folders, so that files converted with different
+        settings are kept apart (e.g. `lint`, or `lint-spacing-79`).
+
+        Returns
+        -------
+        str
+            The mode, followed by any settings that differ from the usual
+            conversion.
+        """
+        parts: list[str] = [self.mode]
+        if self.mode == "lint" and not self.preserve_line_count:
+            parts.append("compact")
+        if self.spacing_rules:
+            parts.append(f"spacing-{self.max_line_length}")
+        if self.lint_non_exec:
+            parts.append("non-exec")
+        return "-".join(parts)
+
     def convert(self, qmd_lines: list[str]) -> list[str]:
         """
         Convert QMD source lines into a lintable Python view.
@@ -114,47 +174,32 @@ class QmdToPyConverter:
             Depending on configuration, non-Python regions are replaced by
             placeholder lines so that line numbers stay aligned.
         """
-        # Ensure every line ends with `\n` then concatenate all lines into one
-        # long string and convert it into bytes, which is the format
-        # Tree-sitter expects
-        normalized_lines = [
-            line if line.endswith("\n") else f"{line}\n" for line in qmd_lines
-        ]
-        src = "".join(normalized_lines)
-        src_bytes = src.encode("utf-8")
-
-        # The parser is the Tree-sitter "machine" that knows the Markdown
-        # grammar. We feed the byte sequence into that, and get back a tree
-        # object that represents the structure of the document (a syntax tree).
-        parser = Parser(Language(tsmd.language()))
-        tree = parser.parse(src_bytes)
+        return self.build(parse_qmd(qmd_lines))
 
-        # The root node represents the entire document; all other nodes
-        # (headings, code blocks, etc.) are children somewhere under this root
-        root = tree.root_node
+    def build(self, parsed: ParsedQmd) -> list[str]:
+        """
+        Build the Python view from an already parsed QMD document.
 
-        # Extract YAML front matter metadata, if present
-        metadata_node = find_metadata_node(root)
-        if metadata_node is not None:
-            # Use the YAML to configure the default `execute.eval` behaviour
-            yaml_eval_default = parse_yaml_eval_from_node(
-                src_bytes, metadata_node
-            )
-        else:
-            # If there is no YAML front matter, fall back to eval=True
-            yaml_eval_default = True
+        Parameters
+        ----------
+        parsed : ParsedQmd
+            Result of `parse_qmd()`. It is not modified, so can be shared by
+            several converters.
 
-        # Find all fenced code blocks where the language is (active or
-        # inactive) Python, and collect metadata about them
-        self.python_blocks = collect_python_blocks(src_bytes, root)
+        Returns
+        -------
+        list of str
+            Python lines representing the lintable view of the QMD file.
+        """
+        self.python_blocks = parsed.python_blocks
 
         # Build the output Python view, line by line, guided by the block
-        # metadata extracted above
+        # metadata extracted when parsing
         if self.mode == "lint":
             output_builder = LintOutputBuilder(
                 python_blocks=self.python_blocks,
                 lint_non_exec=self.lint_non_exec,
-                yaml_eval_default=yaml_eval_default,
+                yaml_eval_default=parsed.yaml_eval_default,
                 preserve_line_count=self.preserve_line_count,
                 spacing_rules=self.spacing_rules,
                 max_line_length=self.max_line_length,
@@ -163,12 +208,133 @@ class QmdToPyConverter:
             output_builder = FormatOutputBuilder(
                 python_blocks=self.python_blocks,
                 lint_non_exec=self.lint_non_exec,
-                yaml_eval_default=yaml_eval_default,
+                yaml_eval_default=parsed.yaml_eval_default,
                 preserve_line_count=self.preserve_line_count,
                 spacing_rules=self.spacing_rules,
             )
 
-        return output_builder.build(src_bytes)
+        with phase("build"):
+            return output_builder.build(parsed.lines)
+
+
+@dataclass
+class ParsedQmd:
+    """
+    A QMD document, and the metadata for its Python code blocks.
+
+    Attributes
+    ----------
+    src_bytes : bytes
+        UTF-8 encoded document source.
+    lines : list[str]
+        The document decoded once and split into lines, indexed by
+        Tree-sitter row. Shared by block analysis and the output builders.
+    python_blocks : list[dict]
+        Metadata for each Python code block, from `collect_python_blocks()`.
+    yaml_eval_default : bool
+        Document-level default for `execute.eval`, from the YAML front
+        matter.
+    """
+
+    src_bytes: bytes
+    lines: list[str]
+    python_blocks: list[dict]
+    yaml_eval_default: bool
+
+
+def parse_qmd(qmd_lines: list[str]) -> ParsedQmd:
+    """
+    Parse QMD source lines, and find and analyse the Python code blocks.
+
+    Parameters
+    ----------
+    qmd_lines : list of str
+        Lines from the input QMD file.
+
+    Returns
+    -------
+    ParsedQmd
+        Document source, Python block metadata, and YAML eval default.
+    """
+    # Ensure every line ends with `\n` then concatenate all lines into one
+    # long string and convert it into bytes, which is the format
+    # Tree-sitter expects
+    normalized_lines = [
+        line if line.endswith("\n") else f"{line}\n" for line in qmd_lines
+    ]
+    src = "".join(normalized_lines)
+    src_bytes = src.encode("utf-8")
+
+    # Line table: decode the document once, then look up rows by index
+    # (matching Tree-sitter's row numbering) wherever lines are needed
+    lines = src_bytes.decode("utf-8", errors="replace").splitlines()
+
+    # The parser is the Tree-sitter "machine" that knows the Markdown
+    # grammar. We feed the byte sequence into that, and get back a tree
+    # object that represents the structure of the document (a syntax tree).
+    with phase("parse"):
+        tree = get_parser().parse(src_bytes)
+
+        # The root node represents the entire document; all other nodes
+        # (headings, code blocks, etc.) are children somewhere under this
+        # root
+        root = tree.root_node
+
+        # Extract YAML front matter metadata, if present
+        metadata_node = find_metadata_node(root)
+        if metadata_node is not None:
+            # Use the YAML to configure the default `execute.eval` behaviour
+            yaml_eval_default = parse_yaml_eval_from_node(
+                src_bytes, metadata_node
+            )
+        else:
+            # If there is no YAML front matter, fall back to eval=True
+            yaml_eval_default = True
+
+    # Find all fenced code blocks where the language is (active or
+    # inactive) Python, and collect metadata about them
+    with phase("collect"):
+        python_blocks = collect_python_blocks(src_bytes, root, lines)
+
+    return ParsedQmd(
+        src_bytes=src_bytes,
+        lines=lines,
+        python_blocks=python_blocks,
+        yaml_eval_default=yaml_eval_default,
+    )
+
+
+@cache
+def markdown_language() -> Language:
+    """
+    Load the Tree-sitter Markdown grammar, the first time it is needed.
+
+    Returns
+    -------
+    Language
+        The Markdown language, shared by every parser in the process.
+    """
+    return Language(tsmd.language())
+
+
+def get_parser() -> Parser:
+    """
+    Return the current thread's Markdown parser, creating it if needed.
+
+    Setting up a parser is slow compared with parsing a small document, so
+    one is reused for every conversion. A parser holds state while parsing,
+    so threads (e.g. with `--jobs`) each get their own.
+
+    Returns
+    -------
+    Parser
+        Tree-sitter parser for Markdown.
+    """
+    parser = getattr(_thread_parsers, "parser", None)
+    if parser is None:
+        parser = Parser(markdown_language())
+        _thread_parsers.parser = parser
+    return parser
 
 
 def convert_qmd_to_py(  # noqa: C901, PLR0913, PLR0912
@@ -219,7 +385,10 @@ def convert_qmd_to_py(  # noqa: C901, PLR0913, PLR0912
 
     # Set up converter
     converter = QmdToPyConverter(
-        tool=tool, lint_non_exec=lint_non_exec, mode=mode
+        tool=tool,
+        lint_non_exec=lint_non_exec,
+        mode=mode,
+        config_dir=qmd_path.parent,
     )
 
     # Determine output path. If provided, convert to a Path object. If not,
@@ -229,21 +398,29 @@ def convert_qmd_to_py(  # noqa: C901, PLR0913, PLR0912
     else:
         output_path = Path(output_path)
 
-    # Automatically generate a unique filename if needed
-    output_path = get_unique_filename(output_path)
+    reserved = False
+    succeeded = False
+    try:
+        # Automatically generate a unique filename if needed, creating the
+        # file straight away so that no other conversion can claim it
+        output_path = reserve_unique_filename(output_path)
+        reserved = True
 
-    if verbose:
-        print(f"Converting {qmd_path} to {output_path}")
+        if verbose:
+            print(f"Converting {qmd_path} to {output_path}")
 
-    try:
         # Open and read the QMD file, storing all lines in qmd_lines
-        with qmd_path.open(encoding="utf-8") as f:
-            qmd_lines = f.readlines()
+        with phase("convert", file=qmd_path):
+            with qmd_path.open(encoding="utf-8") as f:
+                qmd_lines = f.readlines()
 
-        py_lines = converter.convert(qmd_lines=qmd_lines)
+            py_lines = converter.convert(qmd_lines=qmd_lines)
 
         # Write the output file
-        with output_path.open("w", encoding="utf-8") as f:
+        with (
+            phase("write", file=qmd_path),
+            output_path.open("w", encoding="utf-8") as f,
+        ):
             f.write("\n".join(py_lines) + "\n")
 
         if verbose:
@@ -251,17 +428,8 @@ def convert_qmd_to_py(  # noqa: C901, PLR0913, PLR0912
 
         # Check that line counts match (if intend to preserve them)
         if converter.preserve_line_count:
-            qmd_len = len(qmd_lines)
-            py_len = len(py_lines)
-            if qmd_len == py_len:
-                if verbose:
-                    print(f"  Line count: {qmd_len} → {py_len} ")
-            else:
-                warnings.warn(
-                    f"Line count mismatch: {qmd_len} → {py_len}",
-                    RuntimeWarning,
-                    stacklevel=2,
-                )
+            check_line_count(qmd_lines, py_lines, verbose=verbose)
+        succeeded = True
 
     # Error messages if issues finding/accessing files, or otherwise.
     except FileNotFoundError:
@@ -278,7 +446,42 @@ def convert_qmd_to_py(  # noqa: C901, PLR0913, PLR0912
         traceback.print_exc()
         print(f"Error during conversion: {e}")
         return None
+    finally:
+        # Don't leave behind a reserved file if conversion failed
+        if reserved and not succeeded:
+            output_path.unlink(missing_ok=True)
 
     if formatter is not None:
         return output_path, converter
     return output_path
+
+
+def check_line_count(
+    qmd_lines: list[str],
+    py_lines: list[str],
+    *,
+    verbose: bool,
+) -> None:
+    """
+    Warn if a line-preserving conversion changed the number of lines.
+
+    Parameters
+    ----------
+    qmd_lines : list[str]
+        Lines from the input QMD file.
+    py_lines : list[str]
+        Lines of the converted Python file.
+    verbose : bool
+        If True, print the line counts when they match.
+    """
+    qmd_len = len(qmd_lines)
+    py_len = len(py_lines)
+    if qmd_len == py_len:
+        if verbose:
+            print(f"  Line count: {qmd_len} → {py_len} ")
+    else:
+        warnings.warn(
+            f"Line count mismatch: {qmd_len} → {py_len}",
+            RuntimeWarning,
+            stacklevel=3,
+        )
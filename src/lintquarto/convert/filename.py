@@ -1,7 +1,12 @@
 """Detect if filename already exists - if so, generate unique name."""
 
+import hashlib
+import re
 from pathlib import Path
 
+# Characters from the hash of a file's path added to module-safe names
+MODULE_HASH_LENGTH = 8
+
 
 def get_unique_filename(path: str | Path) -> Path:
     """
@@ -35,3 +40,58 @@ def get_unique_filename(path: str | Path) -> Path:
         if not new_path.exists():
             return new_path
         n += 1
+
+
+def reserve_unique_filename(path: str | Path) -> Path:
+    """
+    Find a unique path, as in `get_unique_filename()`, and create the file.
+
+    Creating the (empty) file claims the name, so that a conversion running at
+    the same time (e.g. for another tool) cannot choose the same one.
+
+    Parameters
+    ----------
+    path : str | Path
+        The initial file path to check.
+
+    Returns
+    -------
+    Path
+        A unique file path, which now exists as an empty file.
+    """
+    while True:
+        candidate = get_unique_filename(path)
+        try:
+            # Mode "x" fails if the file was created since it was checked
+            with candidate.open("x", encoding="utf-8"):
+                return candidate
+        except FileExistsError:
+            continue
+
+
+def module_safe_stem(qmd_path: str | Path) -> str:
+    """
+    Return a file name stem that is a valid, unique Python module name.
+
+    Type checkers such as mypy name each file's module after its stem, so
+    two `index.py` files (e.g. from `docs/index.qmd` and `blog/index.qmd`)
+    checked together collide as duplicate `index` modules. Adding a hash of
+    the `.qmd` file's path makes each name unique (and the same on every
+    run), and other characters are replaced so the name is an identifier.
+
+    Parameters
+    ----------
+    qmd_path : str | Path
+        Path to the `.qmd` file.
+
+    Returns
+    -------
+    str
+        The stem, e.g. `index__3f2a1c9e`.
+    """
+    path = Path(qmd_path)
+    stem = re.sub(r"\W", "_", path.stem, flags=re.ASCII)
+    if not stem or stem[0].isdigit():
+        stem = f"_{stem}"
+    digest = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()
+    return f"{stem}__{digest[:MODULE_HASH_LENGTH]}"
@@ -4,8 +4,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import yaml
-
 if TYPE_CHECKING:
     from tree_sitter import Node
 
@@ -71,10 +69,18 @@ def parse_yaml_eval_from_node(src_bytes: bytes, metadata_node: Node) -> bool:
             break
         yaml_lines.append(line)
 
+    # Most front matter doesn't set `eval`, so skip importing and running
+    # the YAML parser unless the key could be present
+    yaml_text = "\n".join(yaml_lines)
+    if "eval" not in yaml_text:
+        return True
+
+    import yaml  # noqa: PLC0415
+
     # Try to parse the YAML text into a Python dict. If parsing fails
     # for any reason, fall back to the default behaviour: eval=True.
     try:
-        yaml_dict = yaml.safe_load("\n".join(yaml_lines)) or {}
+        yaml_dict = yaml.safe_load(yaml_text) or {}
     except (yaml.YAMLError, AttributeError):
         return True
 
@@ -1,5 +1,6 @@
 """Rebuild a QMD file."""
 
+import difflib
 from pathlib import Path
 
 from .constants import FORMAT_SEPARATOR_PREFIX
@@ -11,10 +12,13 @@ def recreate_qmd_from_formatted_py(
     python_blocks: list[dict],
     *,
     verbose: bool = False,
-) -> Path:
+) -> bool:
     """
     Recreate a QMD file by splicing formatted Python back into its blocks.
 
+    The file is only rewritten if the formatted code differs from the
+    original, so unchanged files keep their modification time.
+
     Parameters
     ----------
     qmd_path : str | Path
@@ -28,20 +32,143 @@ def recreate_qmd_from_formatted_py(
 
     Returns
     -------
-    Path
-        Path to the rewritten `.qmd` file.
+    bool
+        True if the `.qmd` file was changed (and so rewritten).
+    """
+    with Path(py_path).open(encoding="utf-8") as f:
+        py_lines = f.read().splitlines()
+
+    return recreate_qmd_from_formatted_lines(
+        qmd_path=qmd_path,
+        py_lines=py_lines,
+        python_blocks=python_blocks,
+        verbose=verbose,
+    )
+
+
+def recreate_qmd_from_formatted_lines(
+    qmd_path: str | Path,
+    py_lines: list[str],
+    python_blocks: list[dict],
+    *,
+    verbose: bool = False,
+) -> bool:
+    """
+    Recreate a QMD file from formatted Python held in memory.
+
+    Used for formatters that read code from standard input and write the
+    formatted code to standard output, so no `.py` file is needed.
+
+    Parameters
+    ----------
+    qmd_path : str | Path
+        Path to the original `.qmd` file.
+    py_lines : list[str]
+        Lines of formatted Python (without line endings).
+    python_blocks : list[dict]
+        Block metadata collected by `QmdToPyConverter`.
+    verbose : bool, optional
+        If True, print progress information.
+
+    Returns
+    -------
+    bool
+        True if the `.qmd` file was changed (and so rewritten).
     """
     qmd_path = Path(qmd_path)
-    py_path = Path(py_path)
 
     with qmd_path.open(encoding="utf-8") as f:
+        original_lines = f.readlines()
+
+    qmd_lines = splice_formatted_blocks(
+        original_lines, py_lines, python_blocks
+    )
+
+    # Leave the file alone if nothing changed, so its modification time is
+    # kept (and e.g. Quarto's freeze cache isn't invalidated)
+    if qmd_lines == original_lines:
+        if verbose:
+            print(f"✓ No changes to {qmd_path}, so not rewritten")
+        return False
+
+    with qmd_path.open("w", encoding="utf-8") as f:
+        f.writelines(qmd_lines)
+
+    if verbose:
+        print(f"✓ Recreated {qmd_path} from formatted Python")
+
+    return True
+
+
+def diff_qmd_with_formatted_lines(
+    qmd_path: str | Path,
+    py_lines: list[str],
+    python_blocks: list[dict],
+) -> str:
+    """
+    Compare a QMD file with the result of splicing in formatted Python.
+
+    Nothing is written, so this can be used to check files (e.g. in CI).
+
+    Parameters
+    ----------
+    qmd_path : str | Path
+        Path to the original `.qmd` file.
+    py_lines : list[str]
+        Lines of formatted Python (without line endings).
+    python_blocks : list[dict]
+        Block metadata collected by `QmdToPyConverter`.
+
+    Returns
+    -------
+    str
+        Unified diff from the `.qmd` file to its formatted version, or an
+        empty string if formatting wouldn't change it.
+    """
+    with Path(qmd_path).open(encoding="utf-8") as f:
         qmd_lines = f.readlines()
 
-    with py_path.open(encoding="utf-8") as f:
-        py_lines = f.read().splitlines()
+    formatted_lines = splice_formatted_blocks(
+        qmd_lines, py_lines, python_blocks
+    )
+    diff = difflib.unified_diff(
+        qmd_lines,
+        formatted_lines,
+        fromfile=str(qmd_path),
+        tofile=str(qmd_path),
+    )
+    # The last line of the file may have no line ending
+    return "".join(
+        line if line.endswith("\n") else f"{line}\n" for line in diff
+    )
+
+
+def splice_formatted_blocks(
+    qmd_lines: list[str],
+    py_lines: list[str],
+    python_blocks: list[dict],
+) -> list[str]:
+    """
+    Replace the code in each Python block with its formatted version.
 
+    Parameters
+    ----------
+    qmd_lines : list[str]
+        Lines of the original `.qmd` file (with line endings). Not changed.
+    py_lines : list[str]
+        Lines of formatted Python (without line endings).
+    python_blocks : list[dict]
+        Block metadata collected by `QmdToPyConverter`.
+
+    Returns
+    -------
+    list[str]
+        Lines of the `.qmd` file with formatted code (with line endings).
+    """
+    qmd_lines = list(qmd_lines)
     formatted_blocks = parse_formatted_blocks(py_lines)
 
+    # Work from the last block back, so earlier rows aren't shifted
     for block in sorted(
         python_blocks, key=lambda b: b["block_index"], reverse=True
     ):
@@ -59,13 +186,7 @@ def recreate_qmd_from_formatted_py(
             line + "\n" for line in formatted_blocks[block_index]
         ]
 
-    with qmd_path.open("w", encoding="utf-8") as f:
-        f.writelines(qmd_lines)
-
-    if verbose:
-        print(f"✓ Recreated {qmd_path} from formatted Python")
-
-    return qmd_path
+    return qmd_lines
 
 
 def parse_formatted_blocks(py_lines: list[str]) -> dict[int, list[str]]:
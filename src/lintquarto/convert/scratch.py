@@ -0,0 +1,196 @@
+"""Folder for converted files, kept away from the source tree."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from .filename import reserve_unique_filename
+
+# Prefix for the folder made for each run
+RUN_PREFIX = "lintquarto-"
+
+
+class ScratchDir:
+    """
+    Per-run folder that converted .py files are written to.
+
+    Files are laid out to mirror the `.qmd` files (relative to the working
+    directory), so `docs/intro.qmd` is converted to `<run>/docs/intro.py`.
+    Keeping them out of the source tree means file watchers (e.g. Quarto
+    preview or an IDE) aren't triggered, and the folder is usually in memory.
+    The whole folder is removed once, by `cleanup()`, at the end of the run.
+
+    Attributes
+    ----------
+    parent : Path
+        Folder in which the run's folder is made.
+    run_dir : Path | None
+        The run's folder, or None until it is first needed.
+    """
+
+    def __init__(self, parent: str | Path | None = None) -> None:
+        """
+        Initialise ScratchDir.
+
+        Parameters
+        ----------
+        parent : str | Path | None, optional
+            Folder in which to make the run's folder. Defaults to
+            `default_scratch_parent()`.
+        """
+        self.parent = (
+            Path(parent).absolute()
+            if parent is not None
+            else default_scratch_parent()
+        )
+        self.run_dir: Path | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """
+        Folder for this run, made the first time it is needed.
+
+        Returns
+        -------
+        Path
+            Path to the run's folder.
+        """
+        with self._lock:
+            if self.run_dir is None:
+                self.parent.mkdir(parents=True, exist_ok=True)
+                self.run_dir = Path(
+                    tempfile.mkdtemp(prefix=RUN_PREFIX, dir=self.parent)
+                )
+            return self.run_dir
+
+    def target(self, qmd_path: str | Path, stem: str | None = None) -> Path:
+        """
+        Return the .py path mirroring a .qmd file, making its folder.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        stem : str | None, optional
+            Name for the `.py` file (without suffix), e.g. from
+            `module_safe_stem()`. Defaults to the `.qmd` file's stem.
+
+        Returns
+        -------
+        Path
+            Path to the `.py` file within the run's folder (which may already
+            be taken, e.g. by another tool's conversion).
+        """
+        target = self.path / mirrored_py_path(qmd_path, stem)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def reserve(self, qmd_path: str | Path, stem: str | None = None) -> Path:
+        """
+        Claim a unique .py file name mirroring a .qmd file.
+
+        Parameters
+        ----------
+        qmd_path : str | Path
+            Path to the `.qmd` file.
+        stem : str | None, optional
+            Name for the `.py` file (without suffix). Defaults to the `.qmd`
+            file's stem.
+
+        Returns
+        -------
+        Path
+            Path to a new, empty `.py` file within the run's folder.
+        """
+        return reserve_unique_filename(self.target(qmd_path, stem))
+
+    def cleanup(self) -> None:
+        """Remove the run's folder, and every file in it."""
+        with self._lock:
+            path, self.run_dir = self.run_dir, None
+        if path is None:
+            return
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            print(
+                f"Warning: Could not remove temporary folder {path}: {e}",
+                file=sys.stderr,
+            )
+
+
+def default_scratch_parent() -> Path:
+    """
+    Choose where to make scratch folders, preferring in-memory file systems.
+
+    Uses `$XDG_RUNTIME_DIR` (a per-user in-memory folder on most Linux
+    systems) or `/dev/shm` where available, and otherwise the system's
+    temporary folder.
+
+    Returns
+    -------
+    Path
+        Folder in which to make the run's folder.
+    """
+    # Each run's folder is made with `tempfile.mkdtemp()`, so is private even
+    # within a shared folder such as /dev/shm
+    candidates = [os.environ.get("XDG_RUNTIME_DIR"), "/dev/shm"]  # noqa: S108
+    for candidate in candidates:
+        if (
+            candidate
+            and Path(candidate).is_dir()
+            and os.access(candidate, os.W_OK | os.X_OK)
+        ):
+            return Path(candidate)
+    return Path(tempfile.gettempdir())
+
+
+def mirrored_path(qmd_path: str | Path) -> Path:
+    """
+    Return the relative path under which to mirror a file.
+
+    Parameters
+    ----------
+    qmd_path : str | Path
+        Path to the `.qmd` file.
+
+    Returns
+    -------
+    Path
+        The file's path relative to the working directory or, for files
+        outside it, its absolute path without the root (or drive).
+    """
+    absolute = Path(qmd_path).resolve()
+    cwd = Path.cwd().resolve()
+    if absolute.is_relative_to(cwd):
+        return absolute.relative_to(cwd)
+    return absolute.relative_to(absolute.anchor)
+
+
+def mirrored_py_path(qmd_path: str | Path, stem: str | None = None) -> Path:
+    """
+    Return the relative path of the .py file mirroring a .qmd file.
+
+    Parameters
+    ----------
+    qmd_path : str | Path
+        Path to the `.qmd` file.
+    stem : str | None, optional
+        Name for the `.py` file (without suffix). Defaults to the `.qmd`
+        file's stem.
+
+    Returns
+    -------
+    Path
+        The path from `mirrored_path()`, with the `.py` suffix (and stem).
+    """
+    relative = mirrored_path(qmd_path)
+    if stem is not None:
+        return relative.with_name(f"{stem}.py")
+    return relative.with_suffix(".py")
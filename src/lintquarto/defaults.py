@@ -0,0 +1,18 @@
+"""Default settings for the bench and watch subcommands."""
+
+# These are kept apart from the subcommands' modules, so the CLI can show
+# them (e.g. in --help) without importing the code that runs them
+
+# Default number of benchmark runs, of which the fastest is reported
+DEFAULT_REPEAT = 3
+
+# Default number of seconds between checks for changes
+DEFAULT_INTERVAL = 0.5
+
+# Default number of seconds files must stay unchanged before tools are run,
+# so that several quick saves only trigger one run
+DEFAULT_DEBOUNCE = 0.3
+
+# Default number of seconds between searches for new files. Searching walks
+# the whole tree, so is done less often than checking the known files
+DEFAULT_RESCAN = 5.0
@@ -0,0 +1,603 @@
+"""Decide which files and folders to leave out, from paths and patterns."""
+
+from __future__ import annotations
+
+import os
+import re
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Iterable
+
+# Characters which make an `--exclude` entry a pattern rather than a path
+PATTERN_CHARS = "*?["
+
+# Files which can be read for exclusions, if asked to
+GITIGNORE_FILE = ".gitignore"
+QUARTO_PROJECT_FILES = ("_quarto.yml", "_quarto.yaml")
+
+
+# =============================================================================
+# Main class: combine literal paths and patterns from each source
+# =============================================================================
+
+
+class Scope(NamedTuple):
+    """
+    Patterns that apply within a folder, from it and the folders above it.
+
+    Attributes
+    ----------
+    rules : tuple[tuple[str, PatternSet], ...]
+        Pairs of folder (ending in a separator) and the patterns read from
+        files in that folder, from the top folder down.
+    in_repo : bool
+        Whether the folder is within a git repository (so `.gitignore`
+        files apply).
+    """
+
+    rules: tuple[tuple[str, PatternSet], ...] = ()
+    in_repo: bool = False
+
+
+class ExcludeMatcher:
+    """
+    Decide whether files and folders are excluded.
+
+    Literal paths are held in a set, and each source of patterns is
+    compiled into a single regular expression, so checking a path costs
+    roughly the same however many exclusions there are.
+
+    Patterns follow `.gitignore` rules: a pattern without a slash (such as
+    `*_scratch.qmd`) matches at any depth, `**` matches any number of
+    folders (e.g. `**/drafts/**`), a trailing slash only matches folders,
+    and a leading `!` re-includes paths excluded by an earlier pattern.
+
+    Attributes
+    ----------
+    paths : set[str]
+        Absolute, resolved paths to exclude (with everything within them).
+    patterns : list[tuple[str, PatternSet]]
+        Patterns given directly (e.g. from `--exclude`), with the folder
+        (ending in a separator) they are relative to. These take precedence
+        over patterns read from files.
+    gitignore : bool
+        If True, also exclude paths ignored by `.gitignore` files (and
+        `.git/info/exclude`) within a git repository.
+    quarto_render : bool
+        If True, also exclude paths listed with a `!` under
+        `project: render:` in `_quarto.yml` files.
+    """
+
+    def __init__(
+        self,
+        exclude: Iterable[str | Path] | None = None,
+        *,
+        gitignore: bool = False,
+        quarto_render: bool = False,
+        base_dir: str | Path | None = None,
+    ) -> None:
+        """
+        Initialise ExcludeMatcher.
+
+        Parameters
+        ----------
+        exclude : Iterable[str | Path] | None, optional
+            Paths and patterns to exclude. Entries containing `*`, `?` or
+            `[`, or starting with `!`, are patterns; others are paths.
+        gitignore : bool, optional
+            If True, also exclude paths ignored by `.gitignore` files.
+        quarto_render : bool, optional
+            If True, also exclude paths listed with a `!` under
+            `project: render:` in `_quarto.yml` files.
+        base_dir : str | Path | None, optional
+            Folder that relative paths and patterns are relative to.
+            Defaults to the working directory.
+        """
+        base = Path(base_dir if base_dir is not None else Path.cwd()).resolve()
+        self.gitignore = gitignore
+        self.quarto_render = quarto_render
+        self.paths: set[str] = set()
+
+        by_base: dict[str, list[str]] = {}
+        for entry in exclude or []:
+            entry = str(entry)  # noqa: PLW2901
+            if not is_pattern(entry):
+                self.paths.add(str((base / entry).resolve()))
+                continue
+            negated = entry.startswith("!")
+            body = entry[1:] if negated else entry
+            if Path(body).is_absolute():
+                # Absolute patterns are anchored to the root (or drive)
+                anchor = Path(body).anchor
+                folder, body = anchor, "/" + body[len(anchor) :]
+            else:
+                folder = str(base)
+                # "./drafts" is the same as "/drafts" in a .gitignore file
+                if body.startswith("./"):
+                    body = body[1:]
+            body = body.replace(os.sep, "/")
+            by_base.setdefault(folder, []).append(
+                f"!{body}" if negated else body
+            )
+        self.patterns = [
+            (_folder_prefix(folder), PatternSet(lines))
+            for folder, lines in by_base.items()
+        ]
+
+        self._scopes: dict[str, Scope] = {}
+        self._excluded_dirs: dict[str, bool] = {}
+
+    def is_excluded(self, path: str | Path, *, is_dir: bool = False) -> bool:
+        """
+        Check whether a path, or any folder it is in, is excluded.
+
+        Parameters
+        ----------
+        path : str | Path
+            Absolute, resolved path to check.
+        is_dir : bool, optional
+            Whether the path is a folder (so folder-only patterns apply).
+
+        Returns
+        -------
+        bool
+            True if the path should be left out.
+        """
+        path = str(path)
+        parent = str(Path(path).parent)
+        if parent == path:
+            # The root (or drive) itself
+            return False
+        if is_dir and path in self._excluded_dirs:
+            return self._excluded_dirs[path]
+
+        excluded = self.is_excluded(parent, is_dir=True) or self.excludes(
+            path, is_dir=is_dir, scope=self.scope_for(parent)
+        )
+        if is_dir:
+            self._excluded_dirs[path] = excluded
+        return excluded
+
+    def excludes(self, path: str, *, is_dir: bool, scope: Scope) -> bool:
+        """
+        Check whether a path itself is excluded (ignoring folders above it).
+
+        Used when walking a folder, where excluded folders aren't entered.
+
+        Parameters
+        ----------
+        path : str
+            Absolute, resolved path to check.
+        is_dir : bool
+            Whether the path is a folder (so folder-only patterns apply).
+        scope : Scope
+            Patterns that apply within the folder containing `path`, from
+            `scope()` or `scope_for()`.
+
+        Returns
+        -------
+        bool
+            True if the path should be left out.
+        """
+        if path in self.paths:
+            return True
+        # Direct patterns come first, then those from the deepest folder,
+        # as they take precedence
+        for prefix, patterns in chain(self.patterns, reversed(scope.rules)):
+            if not path.startswith(prefix):
+                continue
+            relative = path[len(prefix) :]
+            if os.sep != "/":
+                relative = relative.replace(os.sep, "/")
+            decision = patterns.match(relative, is_dir=is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def scope(
+        self,
+        directory: str,
+        parent: Scope,
+        names: Collection[str] | None = None,
+    ) -> Scope:
+        """
+        Return the patterns that apply within a folder.
+
+        Reads the folder's `.gitignore` and `_quarto.yml` files (if asked
+        to), the first time the folder is seen.
+
+        Parameters
+        ----------
+        directory : str
+            Absolute, resolved path to the folder.
+        parent : Scope
+            Patterns that apply within the folder above.
+        names : Collection[str] | None, optional
+            Names of the entries in the folder, if already listed, to save
+            checking which files exist.
+
+        Returns
+        -------
+        Scope
+            Patterns that apply to entries in the folder.
+        """
+        cached = self._scopes.get(directory)
+        if cached is not None:
+            return cached
+
+        folder = Path(directory)
+
+        def has(name: str) -> bool:
+            if names is not None:
+                return name in names
+            return (folder / name).exists()
+
+        lines, in_repo = self._read_rules(folder, has, in_repo=parent.in_repo)
+        rules = parent.rules
+        patterns = PatternSet(lines)
+        if patterns:
+            rules = (*rules, (_folder_prefix(directory), patterns))
+        scope = Scope(rules, in_repo)
+        self._scopes[directory] = scope
+        return scope
+
+    def _read_rules(
+        self, folder: Path, has: Callable[[str], bool], *, in_repo: bool
+    ) -> tuple[list[str], bool]:
+        """
+        Read the patterns from a folder's files, for the sources asked for.
+
+        Parameters
+        ----------
+        folder : Path
+            Folder to read files from.
+        has : Callable[[str], bool]
+            Function returning True if the folder has an entry of that name.
+        in_repo : bool
+            Whether the folder above is within a git repository.
+
+        Returns
+        -------
+        tuple[list[str], bool]
+            Lines of patterns, and whether the folder is within a git
+            repository.
+        """
+        lines: list[str] = []
+        if self.gitignore:
+            if has(".git"):
+                in_repo = True
+                # Patterns in .gitignore take precedence, so come later
+                lines += read_ignore_file(folder / ".git" / "info" / "exclude")
+            if in_repo and has(GITIGNORE_FILE):
+                lines += read_ignore_file(folder / GITIGNORE_FILE)
+        if self.quarto_render:
+            for name in QUARTO_PROJECT_FILES:
+                if has(name):
+                    lines += quarto_render_excludes(folder / name)
+        return lines, in_repo
+
+    def scope_for(self, directory: str) -> Scope:
+        """
+        Return the patterns that apply within a folder, reading those above.
+
+        Parameters
+        ----------
+        directory : str
+            Absolute, resolved path to the folder.
+
+        Returns
+        -------
+        Scope
+            Patterns that apply to entries in the folder.
+        """
+        cached = self._scopes.get(directory)
+        if cached is not None:
+            return cached
+        parent = str(Path(directory).parent)
+        parent_scope = (
+            Scope() if parent == directory else self.scope_for(parent)
+        )
+        return self.scope(directory, parent_scope)
+
+
+# =============================================================================
+# Compile patterns
+# =============================================================================
+
+
+class PatternSet:
+    """
+    Gitignore-style patterns, compiled into one regular expression.
+
+    Later patterns take precedence over earlier ones, so each is tried in
+    reverse order, and the first to match decides.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        """
+        Initialise PatternSet.
+
+        Parameters
+        ----------
+        lines : Iterable[str]
+            Lines of a `.gitignore` file, or patterns. Blank lines and
+            comments (starting with `#`) are skipped.
+        """
+        self._negated: dict[str, bool] = {}
+        file_patterns: list[str] = []
+        dir_patterns: list[str] = []
+        for index, line in enumerate(lines):
+            parsed = pattern_to_regex(line)
+            if parsed is None:
+                continue
+            regex, negated, dir_only = parsed
+            # Named groups show which pattern matched
+            name = f"p{index}"
+            self._negated[name] = negated
+            dir_patterns.append(f"(?P<{name}>{regex})")
+            if not dir_only:
+                file_patterns.append(f"(?P<{name}>{regex})")
+        self._files = _combine(file_patterns)
+        self._dirs = _combine(dir_patterns)
+
+    def __bool__(self) -> bool:
+        """
+        Check whether there are any patterns.
+
+        Returns
+        -------
+        bool
+            True if at least one line was a pattern.
+        """
+        return bool(self._negated)
+
+    def match(self, relative: str, *, is_dir: bool) -> bool | None:
+        """
+        Check a path against the patterns.
+
+        Parameters
+        ----------
+        relative : str
+            Path relative to the patterns' folder, separated by `/`.
+        is_dir : bool
+            Whether the path is a folder (so folder-only patterns apply).
+
+        Returns
+        -------
+        bool | None
+            True if excluded, False if re-included (by a `!` pattern), or
+            None if no pattern matches.
+        """
+        regex = self._dirs if is_dir else self._files
+        if regex is None:
+            return None
+        # Every pattern is in a named group, so a match always has one
+        found = regex.fullmatch(relative)
+        if found is None or found.lastgroup is None:
+            return None
+        return not self._negated[found.lastgroup]
+
+
+def _combine(patterns: list[str]) -> re.Pattern[str] | None:
+    """
+    Join patterns into one regular expression, trying the last first.
+
+    Parameters
+    ----------
+    patterns : list[str]
+        Regular expressions, each in a named group.
+
+    Returns
+    -------
+    re.Pattern[str] | None
+        Compiled expression, or None if there are no patterns.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(reversed(patterns)), re.DOTALL)
+
+
+def is_pattern(entry: str) -> bool:
+    """
+    Check whether an exclusion is a pattern, rather than a path.
+
+    Parameters
+    ----------
+    entry : str
+        Entry from `--exclude` (or `exclude` in `[tool.lintquarto]`).
+
+    Returns
+    -------
+    bool
+        True if the entry contains `*`, `?` or `[`, or starts with `!`.
+    """
+    return entry.startswith("!") or any(
+        char in entry for char in PATTERN_CHARS
+    )
+
+
+def pattern_to_regex(line: str) -> tuple[str, bool, bool] | None:
+    """
+    Translate one gitignore-style pattern into a regular expression.
+
+    Parameters
+    ----------
+    line : str
+        Pattern, e.g. `**/drafts/**` or `*_scratch.qmd`.
+
+    Returns
+    -------
+    tuple[str, bool, bool] | None
+        The regular expression (matching a path relative to the pattern's
+        folder, separated by `/`), whether the pattern is negated (starts
+        with `!`), and whether it only matches folders (ends with `/`).
+        None for blank lines and comments.
+    """
+    pattern = line.rstrip("\r\n")
+    # Trailing spaces are ignored, unless escaped with a backslash
+    stripped = pattern.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(pattern):
+        stripped += " "
+    pattern = stripped
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negated = pattern.startswith("!")
+    if negated or pattern.startswith(("\\!", "\\#")):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    # Patterns with a slash (other than at the end) are relative to their
+    # folder, and others match at any depth
+    anchored = "/" in pattern
+    regex = _translate(pattern.removeprefix("/"))
+    if not anchored:
+        regex = f"(?:.*/)?{regex}"
+    return regex, negated, dir_only
+
+
+def _translate(pattern: str) -> str:
+    """
+    Translate the wildcards in a gitignore-style pattern.
+
+    Parameters
+    ----------
+    pattern : str
+        Pattern without a leading `!` or trailing `/`.
+
+    Returns
+    -------
+    str
+        Equivalent regular expression.
+    """
+    parts: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            stars = len(pattern[i:]) - len(pattern[i:].lstrip("*"))
+            whole = (i == 0 or pattern[i - 1] == "/") and stars == 2  # noqa: PLR2004
+            end = i + stars
+            if whole and end < n and pattern[end] == "/":
+                # "**/" matches no folders or any number of them
+                parts.append("(?:.*/)?")
+                end += 1
+            elif whole and end == n:
+                # "/**" at the end matches everything within
+                parts.append(".*")
+            else:
+                # Other runs of asterisks are treated as a single "*"
+                parts.append("[^/]*")
+            i = end
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            close = pattern.find("]", i + 2)
+            if close == -1:
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            content = pattern[i + 1 : close].replace("\\", "\\\\")
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            # Character classes never match the folder separator
+            parts.append(f"(?!/)[{content}]")
+            i = close + 1
+        elif char == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return "".join(parts)
+
+
+# =============================================================================
+# Read patterns from files
+# =============================================================================
+
+
+def read_ignore_file(path: str | Path) -> list[str]:
+    """
+    Read the lines of a `.gitignore`-style file.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to the file.
+
+    Returns
+    -------
+    list[str]
+        Lines of the file, or an empty list if it can't be read.
+    """
+    try:
+        with Path(path).open(encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def quarto_render_excludes(path: str | Path) -> list[str]:
+    """
+    Read the paths a Quarto project excludes from rendering.
+
+    These are the entries starting with `!` under `project: render:`,
+    e.g. `!drafts/`. They are relative to the project's folder.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to the `_quarto.yml` file.
+
+    Returns
+    -------
+    list[str]
+        Negated patterns from the file turned into exclusions (anchored to
+        the project's folder), or an empty list if there are none or the
+        file can't be read.
+    """
+    # Imported here, so that runs which don't need it don't pay for it
+    import yaml  # noqa: PLC0415
+
+    try:
+        with Path(path).open(encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        render = config["project"]["render"]
+    except (OSError, yaml.YAMLError, KeyError, TypeError):
+        return []
+    if not isinstance(render, list):
+        return []
+
+    excludes = []
+    for entry in render:
+        if isinstance(entry, str) and entry.startswith("!"):
+            body = entry[1:].removeprefix("./")
+            # Quarto globs are relative to the project's folder
+            excludes.append(body if body.startswith("**") else f"/{body}")
+    return excludes
+
+
+def _folder_prefix(directory: str) -> str:
+    """
+    Return a folder's path ending with a separator, to match paths within.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the folder.
+
+    Returns
+    -------
+    str
+        The path, ending in the separator.
+    """
+    return directory if directory.endswith(os.sep) else directory + os.sep
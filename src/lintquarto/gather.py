@@ -1,51 +1,437 @@
 """Function to gather a list of all QMD files."""
 
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .exclude import ExcludeMatcher
+from .timings import phase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Folders which are skipped when searching a directory: Quarto's output and
+# cache folders (which can hold copies of the .qmd files), lintquarto's own
+# build folder, and large folders from other tools. They are still searched
+# if given as a path themselves
+SKIPPED_DIRS = frozenset(
+    {
+        ".git",
+        ".lintquarto",
+        ".quarto",
+        "_book",
+        "_freeze",
+        "_site",
+        "node_modules",
+    }
+)
 
 
 def gather_qmd_files(
     paths: list[str | Path],
     exclude: list[str | Path] | None = None,
+    only: set[str] | None = None,
+    *,
+    respect_gitignore: bool = False,
+    respect_quarto_render: bool = False,
 ) -> list[str]:
     """
     Gather .qmd files from listed files/dirs, excluding specified paths.
 
+    The same as `iter_qmd_files()`, but waits for every file to be found.
+
     Parameters
     ----------
     paths : list[str | Path]
         List of file or directory paths.
     exclude : list[str | Path] | None
-        List of files or directories to exclude. Defaults to None.
+        List of files or directories to exclude, and/or gitignore-style
+        patterns. Defaults to None.
+    only : set[str] | None
+        If provided, only keep these files (absolute, resolved paths).
+        Defaults to None.
+    respect_gitignore : bool, optional
+        If True, also exclude files ignored by `.gitignore` files. Defaults
+        to False.
+    respect_quarto_render : bool, optional
+        If True, also exclude files that `_quarto.yml` leaves out of
+        rendering. Defaults to False.
 
     Returns
     -------
     list[str]
-        List of .qmd file paths found, excluding those in `exclude`.
+        List of .qmd file paths found, excluding those in `exclude`. Files
+        found from more than one of `paths` are only listed once.
+    """
+    return list(
+        iter_qmd_files(
+            paths,
+            exclude,
+            only,
+            respect_gitignore=respect_gitignore,
+            respect_quarto_render=respect_quarto_render,
+        )
+    )
 
+
+def iter_qmd_files(
+    paths: list[str | Path],
+    exclude: list[str | Path] | None = None,
+    only: set[str] | None = None,
+    *,
+    respect_gitignore: bool = False,
+    respect_quarto_render: bool = False,
+) -> Iterator[str]:
     """
-    exclude_paths = {Path(e).resolve() for e in (exclude or [])}
-    files = []
+    Find .qmd files from listed files/dirs, yielding each as it is found.
+
+    Parameters
+    ----------
+    paths : list[str | Path]
+        List of file or directory paths.
+    exclude : list[str | Path] | None
+        List of files or directories to exclude, and/or gitignore-style
+        patterns (e.g. `**/drafts/**` or `*_scratch.qmd`). Defaults to None.
+    only : set[str] | None
+        If provided, only keep these files (absolute, resolved paths, e.g.
+        from `git_changed_files()`). Directories are then not searched, so
+        files outside this set cost nothing. Defaults to None.
+    respect_gitignore : bool, optional
+        If True, also exclude files ignored by `.gitignore` files. Defaults
+        to False.
+    respect_quarto_render : bool, optional
+        If True, also exclude files that `_quarto.yml` leaves out of
+        rendering (`!` entries under `project: render:`). Defaults to False.
+
+    Yields
+    ------
+    str
+        Each .qmd file path found, excluding those in `exclude`. Files
+        found from more than one of `paths` are only yielded once.
+
+    Notes
+    -----
+    Directories are searched with `walk_qmd_files()`, which doesn't enter
+    excluded folders (or those in `SKIPPED_DIRS`) at all, rather than
+    listing every file and then checking each against every exclusion.
+    """
+    matcher = ExcludeMatcher(
+        exclude,
+        gitignore=respect_gitignore,
+        quarto_render=respect_quarto_render,
+    )
+
+    if only is not None:
+        yield from _filter_files(paths, only, matcher)
+        return
+
+    seen: set[str] = set()
     for path in paths:
         p = Path(path)
+        found: Iterable[Path]
         # For files...
         if p.is_file() and p.suffix == ".qmd":
             abs_file = p.resolve()
-            # Exclude if file or its parent dir is in exclude_paths
-            if not any(
-                abs_file == e or abs_file.is_relative_to(e)
-                for e in exclude_paths
-            ):
-                files.append(str(abs_file))
-        # For directories...
+            found = [] if matcher.is_excluded(abs_file) else [abs_file]
+        # For directories, only the starting folder is checked against every
+        # folder above it, as the walk skips excluded paths within it
         elif p.is_dir():
-            for f in p.rglob("*.qmd"):
-                abs_file = f.resolve()
-                if (
-                    not any(
-                        abs_file == e or abs_file.is_relative_to(e)
-                        for e in exclude_paths
-                    )
-                    and abs_file.is_file()
+            root = p.resolve()
+            found = (
+                []
+                if matcher.is_excluded(root, is_dir=True)
+                else walk_qmd_files(root, matcher)
+            )
+        else:
+            continue
+        # Overlapping paths (e.g. `.` and `docs`) may find the same file
+        for abs_file in found:
+            name = str(abs_file)
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+
+def walk_qmd_files(
+    root: Path,
+    matcher: ExcludeMatcher | None = None,
+    skipped_dirs: frozenset[str] = SKIPPED_DIRS,
+) -> Iterator[Path]:
+    """
+    Find .qmd files within a folder, without entering skipped folders.
+
+    Parameters
+    ----------
+    root : Path
+        Folder to search (absolute and resolved).
+    matcher : ExcludeMatcher | None, optional
+        Decides which files and folders to leave out. Excluded folders
+        aren't entered. Defaults to None (nothing excluded).
+    skipped_dirs : frozenset[str], optional
+        Names of folders not to enter. Defaults to `SKIPPED_DIRS`.
+
+    Yields
+    ------
+    Path
+        Each `.qmd` file found, in sorted order within each folder (files
+        first). Symbolic links to files are resolved to their target, and
+        left out if that is excluded. Symbolic links to folders aren't
+        followed (as with `Path.rglob()`), which also rules out loops.
+    """
+    matcher = matcher or ExcludeMatcher()
+    # Each folder is listed with the patterns that apply in the folder above,
+    # so .gitignore files are only read from folders that are entered
+    stack = [(str(root), matcher.scope_for(str(root.parent)))]
+    while stack:
+        directory, parent = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            # E.g. a folder that can't be read, or was removed meanwhile
+            continue
+
+        scope = matcher.scope(
+            directory, parent, names={entry.name for entry in entries}
+        )
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in skipped_dirs and not matcher.excludes(
+                    entry.path, is_dir=True, scope=scope
                 ):
-                    files.append(str(abs_file))
+                    subdirs.append((entry.path, scope))
+            elif (
+                not entry.name.endswith(".qmd")
+                or not entry.is_file()
+                or matcher.excludes(entry.path, is_dir=False, scope=scope)
+            ):
+                continue
+            elif entry.is_symlink():
+                target = os.path.realpath(entry.path)
+                if not matcher.is_excluded(target):
+                    yield Path(target)
+            else:
+                yield Path(entry.path)
+
+        # Reversed, so that folders are popped (and searched) in order
+        stack.extend(reversed(subdirs))
+
+
+class FileStream:
+    """
+    Files from an iterator, kept as they are found so they can be replayed.
+
+    Lets tools start on the first files while later ones are still being
+    found (e.g. by `iter_qmd_files()`). The first pass over the stream
+    takes files from the iterator as they are needed, and later passes (or
+    passes running at the same time, in other threads) replay the files
+    found so far before taking more.
+
+    Attributes
+    ----------
+    found : list[str]
+        Files taken from the iterator so far.
+    exhausted : bool
+        Whether every file has been taken from the iterator.
+    """
+
+    def __init__(self, files: Iterable[str]) -> None:
+        """
+        Initialise FileStream.
+
+        Parameters
+        ----------
+        files : Iterable[str]
+            Files to stream, e.g. from `iter_qmd_files()`.
+        """
+        self.found: list[str] = []
+        self.exhausted = False
+        self._source = iter(files)
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over every file, finding more as needed.
+
+        Yields
+        ------
+        str
+            Each file, in the order they were found.
+        """
+        index = 0
+        while self._fill(index):
+            yield self.found[index]
+            index += 1
+
+    def is_empty(self) -> bool:
+        """
+        Check whether there are no files, finding at most one.
+
+        Returns
+        -------
+        bool
+            True if the iterator yields no files.
+        """
+        return not self._fill(0)
+
+    def _fill(self, index: int) -> bool:
+        """
+        Take files from the iterator until `index` is available.
+
+        Parameters
+        ----------
+        index : int
+            Position of the file needed.
+
+        Returns
+        -------
+        bool
+            True if there is a file at `index`, False if there are fewer
+            files.
+        """
+        with self._lock:
+            while len(self.found) <= index and not self.exhausted:
+                with phase("gather"):
+                    file = next(self._source, None)
+                if file is None:
+                    self.exhausted = True
+                else:
+                    self.found.append(file)
+            return index < len(self.found)
+
+
+def _filter_files(
+    paths: list[str | Path],
+    only: set[str],
+    matcher: ExcludeMatcher,
+) -> list[str]:
+    """
+    Keep the files from `only` which are (or are within) one of `paths`.
+
+    Parameters
+    ----------
+    paths : list[str | Path]
+        List of file or directory paths.
+    only : set[str]
+        Absolute, resolved paths of the files to consider.
+    matcher : ExcludeMatcher
+        Decides which files are excluded.
+
+    Returns
+    -------
+    list[str]
+        Matching .qmd file paths, in the order of `paths` then sorted.
+    """
+    candidates = sorted(
+        Path(f) for f in only if f.endswith(".qmd") and Path(f).is_file()
+    )
+    files: list[str] = []
+    seen: set[Path] = set()
+    for path in paths:
+        p = Path(path).resolve()
+        for abs_file in candidates:
+            if (
+                (abs_file == p or abs_file.is_relative_to(p))
+                and abs_file not in seen
+                and not matcher.is_excluded(abs_file)
+                # As when searching, skip e.g. files in a committed _site/
+                and not SKIPPED_DIRS.intersection(
+                    abs_file.relative_to(p).parts[:-1]
+                )
+            ):
+                seen.add(abs_file)
+                files.append(str(abs_file))
     return files
+
+
+def git_changed_files(
+    since: str | None = None,
+    *,
+    staged: bool = False,
+    cwd: str | Path = ".",
+) -> set[str]:
+    """
+    List files that git reports as added, copied, modified or renamed.
+
+    Parameters
+    ----------
+    since : str | None, optional
+        Git reference (e.g. `main` or `HEAD~3`) to compare the working tree
+        against. Untracked files (that aren't ignored) are also included.
+    staged : bool, optional
+        If True, list the files staged for commit instead.
+    cwd : str | Path, optional
+        Folder within the git repository. Defaults to the current directory.
+
+    Returns
+    -------
+    set[str]
+        Absolute, resolved paths of the changed files.
+
+    Raises
+    ------
+    RuntimeError
+        If git is not installed, `cwd` is not in a git repository, or the
+        reference is unknown.
+    ValueError
+        If neither or both of `since` and `staged` are given.
+    """
+    if (since is None) == (not staged):
+        msg = "Provide exactly one of 'since' or 'staged'."
+        raise ValueError(msg)
+
+    top_level = Path(_git(["rev-parse", "--show-toplevel"], cwd).strip())
+
+    # Only keep files that still exist (added, copied, modified, renamed)
+    diff = ["diff", "--name-only", "--diff-filter=ACMR", "-z"]
+    if since is not None:
+        names = _git([*diff, since, "--"], cwd).split("\0")
+        untracked = ["ls-files", "--others", "--exclude-standard", "-z"]
+        names += _git([*untracked, "--full-name"], cwd).split("\0")
+    else:
+        names = _git([*diff, "--cached"], cwd).split("\0")
+
+    return {str((top_level / name).resolve()) for name in names if name}
+
+
+def _git(arguments: list[str], cwd: str | Path) -> str:
+    """
+    Run a git command and return its output.
+
+    Parameters
+    ----------
+    arguments : list[str]
+        Arguments to pass to git.
+    cwd : str | Path
+        Folder to run git in.
+
+    Returns
+    -------
+    str
+        Standard output of the command.
+
+    Raises
+    ------
+    RuntimeError
+        If git could not be run, or reported an error.
+    """
+    try:
+        result = subprocess.run(
+            ["git", *arguments],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=cwd,
+        )
+    except FileNotFoundError as e:
+        msg = "git not found. Please install it."
+        raise RuntimeError(msg) from e
+    if result.returncode != 0:
+        msg = f"git {arguments[0]} failed: {result.stderr.strip()}"
+        raise RuntimeError(msg)
+    return result.stdout
@@ -3,9 +3,15 @@
 from __future__ import annotations
 
 import configparser
+from functools import cache
 from pathlib import Path
 
-import toml
+# Maximum line length each linter uses when none is configured
+DEFAULT_LINE_LENGTHS = {
+    "flake8": 79,
+    "pycodestyle": 79,
+    "ruff": 88,
+}
 
 
 class LineLengthDetector:
@@ -14,7 +20,8 @@ class LineLengthDetector:
 
     This class searches for relevant configuration files in the directory tree,
     extracts the maximum line length setting for the specified linter, and
-    returns the default value if no configuration is found.
+    returns the default value if no configuration is found. Lookups are
+    remembered by `find_line_length()`, so repeated detection is cheap.
 
     Attributes
     ----------
@@ -27,7 +34,7 @@ class LineLengthDetector:
 
     """
 
-    def __init__(self, linter: str, start_dir: str = ".") -> None:
+    def __init__(self, linter: str, start_dir: str | Path = ".") -> None:
         """
         Initialise a class object.
 
@@ -35,7 +42,7 @@ class LineLengthDetector:
         ----------
         linter : str
             The name of the linter to check ("flake8", "pycodestyle", "ruff").
-        start_dir : str, optional
+        start_dir : str | Path, optional
             The directory from which to start searching for configuration
             files. Defaults to the current directory.
 
@@ -45,11 +52,7 @@ class LineLengthDetector:
             If the specified linter is not supported.
 
         """
-        self.defaults = {
-            "flake8": 79,
-            "pycodestyle": 79,
-            "ruff": 88,
-        }
+        self.defaults = dict(DEFAULT_LINE_LENGTHS)
         self.linter = linter
         if self.linter not in self.defaults:
             msg = (
@@ -69,112 +72,169 @@ class LineLengthDetector:
             The maximum line length.
 
         """
-        if self.linter in ["flake8", "pycodestyle"]:
-            return self._get_flake8_line_length()
-        if self.linter == "ruff":
-            return self._get_ruff_line_length()
-        return self.defaults[self.linter]
+        return find_line_length(self.linter, str(self.start_dir))
 
-    def _get_flake8_line_length(self) -> int:
-        """
-        Search for max line length in Flake8-compatible configuration files.
 
-        This method checks `.flake8`, `setup.cfg`, and `tox.ini` files for the
-        `max-line-length` option under `[flake8]` or `[pycodestyle]` sections.
+# =============================================================================
+# Memoised lookups: each folder's configuration files are read once per run
+# =============================================================================
 
-        Returns
-        -------
-        int
-            The maximum line length.
 
-        """
-        config_files = [".flake8", "setup.cfg", "tox.ini"]
-        current = self.start_dir
-        while True:
-            # Iterate over possible config files in the current directory
-            for config_file in config_files:
-                path = current / config_file
-                if not path.is_file():
-                    continue  # Skip if file does not exist
-                config = configparser.ConfigParser()
-                config.read(path)
-                # Try to extract line length from the config
-                length = self._extract_line_length_from_config(config)
-                if length is not None:
-                    return length  # Return as soon as a value is found
-            # Move up to the parent directory
-            parent = current.parent
-            if parent == current:
-                break  # Stop if we've reached the filesystem root
-            current = parent
-        # Return default if no config value is found
-        return self.defaults[self.linter]
-
-    def _extract_line_length_from_config(
-        self,
-        config: configparser.ConfigParser,
-    ) -> int | None:
-        """
-        Extract max line length from a configparser.ConfigParser object.
+@cache
+def find_line_length(linter: str, directory: str) -> int:
+    """
+    Find the configured maximum line length for a linter within a folder.
 
-        This helper checks both the `[flake8]` and `[pycodestyle]` sections for
-        a `max-line-length` option. If found, it attempts to convert the value
-        to an integer and return it. If the value is missing or invalid,
-        returns None.
+    The folder's configuration files are checked first, then those of each
+    folder above it. Results are remembered for each linter and folder (as
+    are the values read from each folder), so converting many files reads
+    each configuration file at most once. Call `clear_line_length_cache()`
+    if the files may have changed.
 
-        Parameters
-        ----------
-        config : configparser.ConfigParser
-            The parsed configuration object.
+    Parameters
+    ----------
+    linter : str
+        The name of the linter ("flake8", "pycodestyle" or "ruff").
+    directory : str
+        Absolute, resolved path to the folder (e.g. the `.qmd` file's).
+
+    Returns
+    -------
+    int
+        The maximum line length, or the linter's default if none is set.
+
+    Raises
+    ------
+    ValueError
+        If the specified linter is not supported.
+    """
+    if linter in ("flake8", "pycodestyle"):
+        length = _flake8_line_length_in(directory)
+    elif linter == "ruff":
+        length = _ruff_line_length_in(directory)
+    else:
+        msg = (
+            f"LineLengthDetector not available for {linter}. "
+            f"Can only check: {list(DEFAULT_LINE_LENGTHS)}."
+        )
+        raise ValueError(msg)
+    if length is not None:
+        return length
+
+    # Reached the filesystem root without finding a value
+    parent = str(Path(directory).parent)
+    if parent == directory:
+        return DEFAULT_LINE_LENGTHS[linter]
+    return find_line_length(linter, parent)
+
+
+def clear_line_length_cache() -> None:
+    """Forget remembered line lengths, e.g. before re-running in watch mode."""
+    find_line_length.cache_clear()
+    _flake8_line_length_in.cache_clear()
+    _ruff_line_length_in.cache_clear()
+
+
+@cache
+def _flake8_line_length_in(directory: str) -> int | None:
+    """
+    Read max line length from Flake8-compatible configuration in a folder.
 
-        Returns
-        -------
-        int | None
-            The extracted line length, or None if not found or invalid.
+    This checks `.flake8`, `setup.cfg`, and `tox.ini` files (in that order)
+    for the `max-line-length` option under `[flake8]` or `[pycodestyle]`
+    sections.
 
-        """
-        for section in ["flake8", "pycodestyle"]:
-            # Check if section and option exist
-            if config.has_section(section) and config.has_option(
-                section,
-                "max-line-length",
-            ):
-                try:
-                    # Attempt to parse and return the integer value
-                    return int(config.get(section, "max-line-length"))
-                except (ValueError, configparser.Error):
-                    # Ignore invalid values or config errors and keep searching
-                    pass
-        # Return None if no valid value is found
+    Parameters
+    ----------
+    directory : str
+        Path to the folder.
+
+    Returns
+    -------
+    int | None
+        The maximum line length, or None if no file in the folder sets it.
+    """
+    for config_file in (".flake8", "setup.cfg", "tox.ini"):
+        path = Path(directory) / config_file
+        if not path.is_file():
+            continue  # Skip if file does not exist
+        config = configparser.ConfigParser()
+        config.read(path)
+        # Try to extract line length from the config
+        length = _extract_line_length_from_config(config)
+        if length is not None:
+            return length  # Return as soon as a value is found
+    return None
+
+
+@cache
+def _ruff_line_length_in(directory: str) -> int | None:
+    """
+    Read Ruff's maximum line length from `pyproject.toml` in a folder.
+
+    This checks the `[tool.ruff]` section for the `line-length` option.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the folder.
+
+    Returns
+    -------
+    int | None
+        The maximum line length, or None if the folder has no
+        `pyproject.toml` setting it.
+    """
+    path = Path(directory) / "pyproject.toml"
+    if not path.is_file():
         return None
 
-    def _get_ruff_line_length(self) -> int:
-        """
-        Search for the maximum line length in `pyproject.toml` for Ruff.
+    import toml  # noqa: PLC0415
 
-        This method checks the `[tool.ruff]` section for the `line-length`
-        option.
+    try:
+        config = toml.load(path)
+        ruff_config = config.get("tool", {}).get("ruff", {})
+        if "line-length" in ruff_config:
+            return int(ruff_config["line-length"])
+    except (toml.TomlDecodeError, OSError, ValueError):
+        # Ignore parse errors, file errors, or invalid values
+        pass
+    return None
 
-        Returns
-        -------
-        int
-            The maximum line length.
 
-        """
-        current = self.start_dir
-        while True:
-            path = current / "pyproject.toml"
-            if path.is_file():
-                try:
-                    config = toml.load(path)
-                    ruff_config = config.get("tool", {}).get("ruff", {})
-                    if "line-length" in ruff_config:
-                        return int(ruff_config["line-length"])
-                except (toml.TomlDecodeError, OSError, ValueError):
-                    # Ignore parse errors, file errors, or invalid values
-                    pass
-            parent = current.parent
-            if parent == current:
-                break
-            current = parent
-        return self.defaults[self.linter]
+def _extract_line_length_from_config(
+    config: configparser.ConfigParser,
+) -> int | None:
+    """
+    Extract max line length from a configparser.ConfigParser object.
+
+    This helper checks both the `[flake8]` and `[pycodestyle]` sections for
+    a `max-line-length` option. If found, it attempts to convert the value
+    to an integer and return it. If the value is missing or invalid,
+    returns None.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        The parsed configuration object.
+
+    Returns
+    -------
+    int | None
+        The extracted line length, or None if not found or invalid.
+
+    """
+    for section in ["flake8", "pycodestyle"]:
+        # Check if section and option exist
+        if config.has_section(section) and config.has_option(
+            section,
+            "max-line-length",
+        ):
+            try:
+                # Attempt to parse and return the integer value
+                return int(config.get(section, "max-line-length"))
+            except (ValueError, configparser.Error):
+                # Ignore invalid values or config errors and keep searching
+                pass
+    # Return None if no valid value is found
+    return None
@@ -1,17 +1,26 @@
 """Entry point for command line interface (CLI)."""
 
-import argparse
+from __future__ import annotations
+
+import copy
 import shlex
 import shutil
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from .args import CustomArgumentParser, build_parser
-from .config import load_config
-from .gather import gather_qmd_files
-from .merge import merge_config
 from .registry import Formatters, Linters
-from .runner import ToolRunner
+
+if TYPE_CHECKING:
+    import argparse
+    from collections.abc import Iterable, Iterator
+
+# Modules which are slow to import (e.g. because they load the Markdown
+# parser, YAML or TOML), or are only needed to run tools, are imported within
+# the functions that use them. This keeps `lintquarto list`, `--help` and
+# argument errors fast, which matters when run on every commit (e.g. from a
+# pre-commit hook).
 
 # ============================================================================
 # Main function: entry point for the lintquarto CLI.
@@ -32,42 +41,213 @@ def main() -> None:
     if args.command == "list":
         return list_tools()
 
+    # Run everything below several times, timing each phase
+    if args.command == "bench":
+        from .bench import bench  # noqa: PLC0415
+
+        sys.exit(
+            bench(
+                lambda: run(parser, copy.copy(args)),
+                repeat=args.repeat,
+                budget=args.budget,
+                json_path=args.json,
+            )
+        )
+
+    # Run once, timing each phase for every file and tool
+    if args.timings or args.trace is not None:
+        from .timings import recording  # noqa: PLC0415
+
+        with recording() as timings:
+            try:
+                exit_code = run(parser, args)
+            finally:
+                # Also report if the run stopped early (e.g. no files)
+                timings.stop()
+                if args.timings:
+                    timings.print_summary()
+                if args.trace is not None:
+                    timings.write_chrome_trace(args.trace)
+        sys.exit(exit_code)
+
+    sys.exit(run(parser, args))
+
+
+def run(parser: CustomArgumentParser, args: argparse.Namespace) -> int:
+    """
+    Load configuration, find the .qmd files, and run the tools on them.
+
+    Parameters
+    ----------
+    parser : CustomArgumentParser
+        CLI argument parser, used to report invalid arguments.
+    args : argparse.Namespace
+        Parsed command-line arguments.
+
+    Returns
+    -------
+    int
+        Exit status. Returns the highest exit code from any tool.
+    """
+    from .config import load_config  # noqa: PLC0415
+    from .gather import (  # noqa: PLC0415
+        FileStream,
+        git_changed_files,
+        iter_qmd_files,
+    )
+    from .merge import merge_config  # noqa: PLC0415
+    from .timings import phase  # noqa: PLC0415
+
     # Load pyproject.toml config and back-fill any unset CLI args
-    config = load_config()
-    args = merge_config(args, config, verbose=args.verbose)
+    with phase("config"):
+        config = load_config()
+        args = merge_config(args, config, verbose=args.verbose)
+
+    # Benchmarks measure lintquarto's own work. The linters are already
+    # replaced by a command that does nothing (see `bench()`), and so are
+    # custom commands below. Formatters are left out, as they would rewrite
+    # files with its empty output, and saved results are never replayed
+    if args.command == "bench":
+        args.formatters = None
+        args.no_cache = True
 
     linters = Linters()
     formatters = Formatters()
     validate_args(parser, args, linters, formatters)
 
-    custom_commands = parse_custom_commands(args.custom_commands, linters)
+    if args.command == "bench":
+        from .bench import noop_commands  # noqa: PLC0415
+
+        custom_commands = noop_commands(args.custom_commands, args.linters)
+    else:
+        custom_commands = parse_custom_commands(args.custom_commands, linters)
+
+    # If requested, ask git which files have changed, so that only those
+    # are gathered (and nothing else is searched or converted)
+    def changed_files() -> set[str] | None:
+        if args.changed_since is None and not args.staged:
+            return None
+        try:
+            return git_changed_files(args.changed_since, staged=args.staged)
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    # Find .qmd files from the provided arguments. Tools start on each file
+    # as soon as it is found, rather than waiting for the whole search
+    def find(only: set[str] | None) -> Iterator[str]:
+        return iter_qmd_files(
+            args.paths,
+            exclude=args.exclude,
+            only=only,
+            respect_gitignore=args.respect_gitignore,
+            respect_quarto_render=args.respect_quarto_render,
+        )
 
-    # Gather all .qmd files from the provided arguments
-    qmd_files = gather_qmd_files(args.paths, exclude=args.exclude)
-    if not qmd_files:
+    # Only searches until the first file is found
+    changed = changed_files()
+    qmd_files = FileStream(find(changed))
+    if qmd_files.is_empty():
+        # Nothing having changed is not an error
+        if changed is not None:
+            print(f"No changed .qmd files found in {args.paths}.")
+            sys.exit(0)
         print(f"No .qmd files found in {args.paths}.", file=sys.stderr)
         sys.exit(1)
 
+    # Keep running, and re-run tools on files as they change. Later runs
+    # reuse everything already loaded in this process. Each search for new
+    # files asks git again, so files changed since starting are picked up
+    if args.command == "watch":
+        from .watch import watch  # noqa: PLC0415
+
+        watch(
+            lambda: list(find(changed_files())),
+            lambda files: run_tools(args, files, custom_commands),
+            interval=args.interval,
+            debounce=args.debounce,
+            rescan=args.rescan,
+        )
+        return 0
+
+    return run_tools(args, qmd_files, custom_commands)
+
+
+def run_tools(
+    args: argparse.Namespace,
+    qmd_files: Iterable[str],
+    custom_commands: list[list[str]],
+) -> int:
+    """
+    Run the formatters, linters and custom commands on some .qmd files.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed (and merged) command-line arguments.
+    qmd_files : Iterable[str]
+        Paths to the `.qmd` files to process. These can still be being
+        found (e.g. a `FileStream`), as each tool goes through them in turn.
+    custom_commands : list[list[str]]
+        Custom commands to run, each as a list of command-line tokens.
+
+    Returns
+    -------
+    int
+        Exit status. Returns the highest exit code from any tool.
+    """
+    from .convert.build import BuildDir  # noqa: PLC0415
+    from .convert.scratch import ScratchDir  # noqa: PLC0415
+    from .linelength import clear_line_length_cache  # noqa: PLC0415
+    from .parallel import resolve_jobs  # noqa: PLC0415
+    from .runner import ToolRunner  # noqa: PLC0415
+
+    # Line lengths are read from each folder's configuration once per run,
+    # and may have been changed since the last run (in watch mode)
+    clear_line_length_cache()
+
+    # Setting a scratch folder implies using one
+    scratch = None
+    if args.scratch or args.scratch_dir is not None:
+        scratch = ScratchDir(args.scratch_dir)
+    build = None
+    if args.build or args.build_dir is not None:
+        build = BuildDir(args.build_dir)
+
     exit_code = 0
 
-    # Run the formatters, linters and/or custom commands
-    tool_runner = ToolRunner(
+    # Run the formatters, linters and/or custom commands. Leaving the `with`
+    # block removes the converted files that the linters shared
+    with ToolRunner(
         qmd_files=qmd_files,
         keep_temp=args.keep_temp,
         verbose=args.verbose,
         lint_non_exec=args.lint_non_exec,
-    )
-    if args.formatters:
-        for formatter in args.formatters:
-            exit_code = max(exit_code, tool_runner.run_formatter(formatter))
-    if args.linters:
-        for linter in args.linters:
-            exit_code = max(exit_code, tool_runner.run_linter(linter))
-    if args.custom_commands:
-        for command in custom_commands:
-            exit_code = max(exit_code, tool_runner.run_custom(command))
-
-    sys.exit(exit_code)
+        batch=args.batch,
+        jobs=resolve_jobs(args.jobs),
+        cache=not args.no_cache,
+        scratch=scratch,
+        build=build,
+        check=args.check,
+        diff=args.diff,
+    ) as tool_runner:
+        # The formatters are chained on the same converted code, so each
+        # .qmd file is only converted and rewritten once. As they rewrite
+        # the .qmd files, they run before anything else - unless only
+        # checking, when nothing is written
+        check_only = args.check or args.diff
+        if args.formatters and not check_only:
+            exit_code = tool_runner.run_formatters(args.formatters)
+        # Linters and custom commands (and formatter checks) can run at the
+        # same time (if --jobs > 1)
+        return max(
+            exit_code,
+            tool_runner.run_checks(
+                args.linters or [],
+                custom_commands,
+                formatters=args.formatters if check_only else None,
+            ),
+        )
 
 
 # ============================================================================
@@ -100,12 +280,7 @@ def validate_args(
             "the following arguments are required for linting: -p/--paths "
             "(or set 'paths' under [tool.lintquarto] in pyproject.toml)"
         )
-    if not args.linters and not args.formatters and not args.custom_commands:
-        parser.error(
-            "at least one tool is required: use -l/--linters, "
-            "-f/--formatters, and/or --custom-commands (or set under "
-            "[tool.lintquarto] in pyproject.toml)"
-        )
+    validate_tool_choice(parser, args)
 
     # Enforce space-separated paths with clear error
     validate_no_commas(args.paths, "paths")
@@ -132,6 +307,44 @@ def validate_args(
             sys.exit(1)
 
 
+def validate_tool_choice(
+    parser: CustomArgumentParser,
+    args: argparse.Namespace,
+) -> None:
+    """
+    Check that the chosen tools can be used together, and with the options.
+
+    Parameters
+    ----------
+    parser : CustomArgumentParser
+        CLI argument parser.
+    args : argparse.Namespace
+        Parsed command-line arguments.
+    """
+    # Benchmarks bring their own tool, which does nothing
+    if (
+        args.command != "bench"
+        and not args.linters
+        and not args.formatters
+        and not args.custom_commands
+    ):
+        parser.error(
+            "at least one tool is required: use -l/--linters, "
+            "-f/--formatters, and/or --custom-commands (or set under "
+            "[tool.lintquarto] in pyproject.toml)"
+        )
+    if (args.check or args.diff) and not args.formatters:
+        parser.error(
+            "--check and --diff only apply to formatters: use -f/--formatters "
+            "(or set 'formatters' under [tool.lintquarto] in pyproject.toml)"
+        )
+    if args.command == "watch" and args.formatters:
+        parser.error(
+            "formatters can't be used with watch, as they rewrite the files "
+            "being watched"
+        )
+
+
 def validate_no_commas(list_of_paths: list[str], argname: str) -> None:
     """
     Check for commas in list of paths and raise ValueError if found.
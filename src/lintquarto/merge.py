@@ -60,6 +60,13 @@ def merge_config(
         )
 
     # Behaviour modifications
+    for arg_name in ("jobs", "scratch_dir", "build_dir"):
+        _merge_scalar_prefer_cli(
+            args,
+            config,
+            arg_name=arg_name,
+            verbose=verbose,
+        )
     for arg_name in ("exclude", "custom_commands"):
         _merge_additive(
             args,
@@ -67,7 +74,17 @@ def merge_config(
             arg_name=arg_name,
             verbose=verbose,
         )
-    for flag in ("lint_non_exec", "verbose", "keep_temp"):
+    for flag in (
+        "lint_non_exec",
+        "verbose",
+        "keep_temp",
+        "batch",
+        "no_cache",
+        "scratch",
+        "build",
+        "respect_gitignore",
+        "respect_quarto_render",
+    ):
         _merge_bool_or(
             args,
             config,
@@ -121,6 +138,46 @@ def _merge_prefer_cli(
             print(f"  - {arg_name}: from [tool.lintquarto]: {config_val}")
 
 
+def _merge_scalar_prefer_cli(
+    args: argparse.Namespace,
+    config: LintquartoConfig,
+    *,
+    arg_name: str,
+    verbose: bool,
+) -> None:
+    """
+    Merge a single-value option, preferring the CLI value when set.
+
+    Unlike `_merge_prefer_cli`, a CLI value of `0` still counts as set.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed command-line arguments to update in place.
+    config : LintquartoConfig
+        Settings loaded from `pyproject.toml`.
+    arg_name : str
+        Name of the attribute to merge.
+    verbose : bool
+        If `True`, print the source of the final value.
+    """
+    cli_val = getattr(args, arg_name)
+    config_val = getattr(config, arg_name)
+
+    if cli_val is not None:
+        if verbose and config_val is not None:
+            print(
+                f"  - {arg_name}: from CLI "
+                f"(ignoring [tool.lintquarto]): {cli_val}"
+            )
+        return
+
+    if config_val is not None:
+        setattr(args, arg_name, config_val)
+        if verbose:
+            print(f"  - {arg_name}: from [tool.lintquarto]: {config_val}")
+
+
 def _merge_additive(
     args: argparse.Namespace,
     config: LintquartoConfig,
@@ -0,0 +1,239 @@
+"""Run work concurrently, while keeping printed output in a fixed order."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, TextIO, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# =============================================================================
+# Main function: run a function over items using a pool of threads
+# =============================================================================
+
+
+def run_in_order(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    jobs: int,
+) -> list[R]:
+    """
+    Call `func` on each item, using up to `jobs` threads at once.
+
+    Tools are run as subprocesses, so threads spend most of their time
+    waiting and can run side by side. Anything printed by `func` is held
+    back, then printed in the same order as `items` - so the output is the
+    same as if the items had been processed one after another.
+
+    Parameters
+    ----------
+    func : Callable[[T], R]
+        Function to call on each item.
+    items : Iterable[T]
+        Items to process.
+    jobs : int
+        Maximum number of items to process at once. If 1, items are
+        processed one at a time in the current thread.
+
+    Returns
+    -------
+    list[R]
+        Values returned by `func`, in the same order as `items`.
+    """
+    if jobs <= 1:
+        return [func(item) for item in items]
+
+    with (
+        _thread_output() as local,
+        ThreadPoolExecutor(max_workers=jobs) as executor,
+    ):
+        futures = [
+            executor.submit(_call_buffered, func, item, local)
+            for item in items
+        ]
+
+        # Print each item's output as soon as it, and every item before it,
+        # has finished
+        results = []
+        for future in futures:
+            value, records = future.result()
+            for is_error, text in records:
+                (sys.stderr if is_error else sys.stdout).write(text)
+            results.append(value)
+
+    return results
+
+
+def resolve_jobs(jobs: int | None) -> int:
+    """
+    Convert the `--jobs` setting into a number of threads.
+
+    Parameters
+    ----------
+    jobs : int | None
+        Requested number of jobs. `None` means one job, and `0` means one
+        job per CPU.
+
+    Returns
+    -------
+    int
+        Number of items to process at once (at least 1).
+    """
+    if jobs is None:
+        return 1
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return max(1, jobs)
+
+
+# =============================================================================
+# Helpers which capture output written by each thread
+# =============================================================================
+
+
+class ThreadOutput:
+    """
+    Text stream that sends each thread's writes to its own record, if any.
+
+    Threads without a record write straight through to the wrapped stream.
+    A stdout and stderr pair share `local`, so writes to both are recorded in
+    one list, in the order they happened.
+
+    Attributes
+    ----------
+    stream : TextIO
+        Stream to write to when the current thread has no record.
+    is_error : bool
+        Whether this wraps stderr (`True`) or stdout (`False`).
+    local : threading.local
+        Per-thread storage, holding the current thread's `records` list.
+    """
+
+    def __init__(
+        self, stream: TextIO, local: threading.local, *, is_error: bool
+    ) -> None:
+        """
+        Initialise ThreadOutput.
+
+        Parameters
+        ----------
+        stream : TextIO
+            Stream to write to when the current thread has no record.
+        local : threading.local
+            Per-thread storage, shared with the paired stream.
+        is_error : bool
+            Whether this wraps stderr (`True`) or stdout (`False`).
+        """
+        self.stream = stream
+        self.local = local
+        self.is_error = is_error
+
+    def write(self, text: str) -> int:
+        """
+        Write text to the current thread's record, or the wrapped stream.
+
+        Parameters
+        ----------
+        text : str
+            Text to write.
+
+        Returns
+        -------
+        int
+            Number of characters written.
+        """
+        records = getattr(self.local, "records", None)
+        if records is None:
+            return self.stream.write(text)
+        records.append((self.is_error, text))
+        return len(text)
+
+    def flush(self) -> None:
+        """Flush the wrapped stream (records need no flushing)."""
+        if getattr(self.local, "records", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name: str) -> object:
+        """
+        Pass any other attribute (e.g. `encoding`) to the wrapped stream.
+
+        Parameters
+        ----------
+        name : str
+            Name of the attribute.
+
+        Returns
+        -------
+        object
+            Attribute of the wrapped stream.
+        """
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def _thread_output() -> Iterator[threading.local]:
+    """
+    Temporarily replace stdout and stderr with `ThreadOutput` wrappers.
+
+    If they have already been replaced (e.g. when pools are nested), the
+    existing wrappers are reused.
+
+    Yields
+    ------
+    threading.local
+        Per-thread storage shared by the stdout and stderr wrappers.
+    """
+    if isinstance(sys.stdout, ThreadOutput) and isinstance(
+        sys.stderr, ThreadOutput
+    ):
+        yield sys.stdout.local
+        return
+
+    original_stdout, original_stderr = sys.stdout, sys.stderr
+    local = threading.local()
+    stdout = ThreadOutput(original_stdout, local, is_error=False)
+    stderr = ThreadOutput(original_stderr, local, is_error=True)
+    sys.stdout, sys.stderr = stdout, stderr  # type: ignore[assignment]
+    try:
+        yield local
+    finally:
+        sys.stdout, sys.stderr = original_stdout, original_stderr
+
+
+def _call_buffered(
+    func: Callable[[T], R],
+    item: T,
+    local: threading.local,
+) -> tuple[R, list[tuple[bool, str]]]:
+    """
+    Call `func` on `item`, recording anything it prints.
+
+    Parameters
+    ----------
+    func : Callable[[T], R]
+        Function to call.
+    item : T
+        Item to pass to `func`.
+    local : threading.local
+        Per-thread storage shared by the stdout and stderr wrappers.
+
+    Returns
+    -------
+    tuple[R, list[tuple[bool, str]]]
+        Value returned by `func`, and the recorded output as a list of
+        `(is_error, text)` pairs.
+    """
+    local.records = []
+    try:
+        value = func(item)
+        return value, local.records
+    finally:
+        local.records = None
@@ -1,6 +1,45 @@
 """Retrieve supported linters."""
 
 import shutil
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Linters whose results also depend on other files - the modules the code
+# imports, and the installed packages - so can't be safely reused just
+# because the .qmd file is unchanged
+CROSS_FILE_LINTERS = [
+    "basedpyright",
+    "mypy",
+    "pylint",
+    "pyrefly",
+    "pyright",
+    "pytype",
+]
+
+
+# Command run in place of every linter's own, if set (see `stand_in()`)
+_stand_in: list[str] | None = None
+
+
+class StdinMode(NamedTuple):
+    """
+    How a tool reads Python code from standard input.
+
+    Attributes
+    ----------
+    arguments : list[str]
+        Arguments added to the tool's command so that it reads from standard
+        input. Any `{filename}` is replaced by the path of the `.py` file the
+        code would otherwise have been written to, so that the tool reports
+        (and finds configuration for) that path.
+    label : str | None
+        Name the tool gives to standard input in its output (e.g. `stdin`),
+        for tools that can't be told a path. None if `{filename}` is used.
+    """
+
+    arguments: list[str]
+    label: str | None = None
 
 
 class ToolRegistry:
@@ -12,12 +51,19 @@ class ToolRegistry:
     supported : dict[str, list[str]]
         Dictionary of supported tools. The key (e.g. `radon-cc`) maps to the
         full command (e.g. `["radon", "cc"]`).
+    stdin : dict[str, StdinMode]
+        Tools which can read code from standard input, so don't need a
+        temporary .py file, and how to ask them to.
     tool_label : str
         Used in error messages, e.g., "linter" or "formatter".
 
     """
 
-    def __init__(self, supported: dict[str, list[str]]) -> None:
+    def __init__(
+        self,
+        supported: dict[str, list[str]],
+        stdin: dict[str, StdinMode] | None = None,
+    ) -> None:
         """
         Initialise Linters object.
 
@@ -26,8 +72,12 @@ class ToolRegistry:
         supported : dict[str, list[str]]
             Dictionary of supported tools. The key (e.g. `radon-cc`) maps to
             the full command (e.g. `["radon", "cc"]`).
+        stdin : dict[str, StdinMode] | None, optional
+            Tools which can read code from standard input, and how to ask
+            them to. Defaults to none.
         """
         self.supported = supported
+        self.stdin = stdin or {}
         self.tool_label = "tool"
 
     def check_supported(self, tool_name: str) -> None:
@@ -72,6 +122,34 @@ class ToolRegistry:
             msg = (f"{executable} not found. Please install it.",)
             raise FileNotFoundError(msg)
 
+    def stdin_command(
+        self, tool_name: str, filename: str
+    ) -> tuple[list[str], str | None] | None:
+        """
+        Return the command to run a tool on code from standard input.
+
+        Parameters
+        ----------
+        tool_name : str
+            Name of the tool.
+        filename : str
+            Path of the `.py` file the code would otherwise be written to.
+
+        Returns
+        -------
+        tuple[list[str], str | None] | None
+            The full command, and the name the tool gives to standard input
+            in its output (None if it uses `filename`). None if the tool
+            can't read from standard input.
+        """
+        mode = self.stdin.get(tool_name)
+        if mode is None:
+            return None
+        arguments = [
+            arg.replace("{filename}", filename) for arg in mode.arguments
+        ]
+        return [*self.supported[tool_name], *arguments], mode.label
+
     def status_list(self) -> list[dict[str, object]]:
         """
         Return list of availability of all supported tools.
@@ -139,10 +217,24 @@ class Linters(ToolRegistry):
                     "lint.ignore = ['RUF100', 'INP001']",
                 ],
                 "vulture": ["vulture"],
-            }
+            },
+            stdin={
+                "flake8": StdinMode(
+                    ["--stdin-display-name", "{filename}", "-"]
+                ),
+                "pycodestyle": StdinMode(["-"], label="stdin"),
+                # pyflakes reads from standard input when given no files
+                "pyflakes": StdinMode([], label="<stdin>"),
+                "ruff": StdinMode(["--stdin-filename", "{filename}", "-"]),
+            },
         )
         self.tool_label = "linter"
 
+        # Each linter keeps its name, and so its conversion, standard input
+        # and batching settings, but runs the stand-in command (if any)
+        if _stand_in is not None:
+            self.supported = {name: list(_stand_in) for name in self.supported}
+
 
 class Formatters(ToolRegistry):
     """Registry of supported code formatters."""
@@ -152,6 +244,42 @@ class Formatters(ToolRegistry):
             {
                 "ruff-format": ["ruff", "format"],
                 "ruff-check-fix": ["ruff", "check", "--fix"],
-            }
+            },
+            # Formatted code is written to standard output, and any messages
+            # (e.g. remaining violations) to standard error
+            stdin={
+                "ruff-format": StdinMode(
+                    ["--stdin-filename", "{filename}", "-"]
+                ),
+                "ruff-check-fix": StdinMode(
+                    ["--stdin-filename", "{filename}", "-"]
+                ),
+            },
         )
         self.tool_label = "formatter"
+
+
+@contextmanager
+def stand_in(command: list[str]) -> Iterator[None]:
+    """
+    Run a command in place of every linter, until the end of the `with` block.
+
+    Used by `lintquarto bench`, with a command that does nothing, to time
+    lintquarto's own work on each chosen linter's usual path.
+
+    Parameters
+    ----------
+    command : list[str]
+        Command to run in place of each linter's own.
+
+    Yields
+    ------
+    None
+        Nothing; the command stands in during the block.
+    """
+    global _stand_in  # noqa: PLW0603
+    previous, _stand_in = _stand_in, command
+    try:
+        yield
+    finally:
+        _stand_in = previous
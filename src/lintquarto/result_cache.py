@@ -0,0 +1,392 @@
+"""Store linter results on disk, so unchanged files aren't linted again."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+from . import __version__
+from .convert.converter import QmdToPyConverter
+from .registry import CROSS_FILE_LINTERS, Linters
+
+# Folder (relative to the working directory) used for the cache by default
+DEFAULT_CACHE_DIR = ".lintquarto_cache"
+
+# Once the cache grows past this size, the least recently used results are
+# removed
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Configuration files that linters may read. Each one found in a .qmd file's
+# folder, or any folder above it (or the working directory), is hashed into
+# the key, so editing tool settings invalidates the cached results
+CONFIG_FILES = (
+    ".flake8",
+    ".pycodestyle",
+    ".pylintrc",
+    ".ruff.toml",
+    ".vulture",
+    "mypy.ini",
+    ".mypy.ini",
+    "pylintrc",
+    "pyproject.toml",
+    "pyrefly.toml",
+    "pyrightconfig.json",
+    "ruff.toml",
+    "setup.cfg",
+    "tox.ini",
+)
+
+# =============================================================================
+# Main class: look up and save results
+# =============================================================================
+
+
+@dataclass
+class CachedResult:
+    """
+    Output from running a linter on one .qmd file.
+
+    Attributes
+    ----------
+    stdout : str
+        Tool's standard output, with .py paths replaced by the .qmd path.
+    stderr : str
+        Tool's standard error, with .py paths replaced by the .qmd path.
+    exit_code : int
+        Exit status returned by `lint_qmd`.
+    """
+
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+class ResultCache:
+    """
+    Content-addressed cache of linter results.
+
+    Each result is saved as a JSON file named after a hash of everything that
+    can change it: the .qmd file's path and contents, the linter and its
+    command and version, the conversion settings (such as line length and
+    `lint_non_exec`), the tool configuration files, and the lintquarto
+    version. When the cache grows past `max_bytes`, the least recently used
+    results are removed.
+
+    Results from linters in `CROSS_FILE_LINTERS` are never saved, as they
+    also depend on imported modules and installed packages, which aren't
+    part of the key.
+
+    Attributes
+    ----------
+    directory : Path
+        Folder where results are saved.
+    max_bytes : int
+        Maximum total size of saved results.
+    lint_non_exec : bool
+        If True, also lint non-executable Python code chunks.
+    verbose : bool
+        If True, print a message for each cached result used.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = DEFAULT_CACHE_DIR,
+        *,
+        lint_non_exec: bool,
+        verbose: bool,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """
+        Initialise ResultCache.
+
+        Parameters
+        ----------
+        directory : str | Path, optional
+            Folder where results are saved.
+        lint_non_exec : bool
+            If True, also lint non-executable Python code chunks.
+        verbose : bool
+            If True, print a message for each cached result used.
+        max_bytes : int, optional
+            Maximum total size of saved results.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.lint_non_exec = lint_non_exec
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._config_hashes: dict[Path, list[tuple[str, str]]] = {}
+
+    def key(self, qmd_file: str | Path, linter: str) -> str | None:
+        """
+        Work out the cache key for running a linter on a .qmd file.
+
+        Parameters
+        ----------
+        qmd_file : str | Path
+            Path to the `.qmd` file, as given on the command line.
+        linter : str
+            Name of the linter.
+
+        Returns
+        -------
+        str | None
+            Hex digest identifying the result, or None if the linter's
+            results can't be cached or the file can't be read (in which case
+            it should be linted as normal).
+        """
+        if linter in CROSS_FILE_LINTERS:
+            return None
+        qmd_path = Path(qmd_file)
+        try:
+            content = qmd_path.read_bytes()
+            converter = QmdToPyConverter(
+                tool=linter,
+                lint_non_exec=self.lint_non_exec,
+                config_dir=qmd_path.parent,
+            )
+        except (OSError, ValueError):
+            return None
+
+        command = Linters().supported[linter]
+        parts = {
+            "lintquarto": [__version__, _source_fingerprint()],
+            # Output refers to the file by the path it was given as
+            "qmd_file": str(qmd_file),
+            "content": hashlib.sha256(content).hexdigest(),
+            "linter": linter,
+            "command": command,
+            "version": tool_version(command[0]),
+            "conversion": repr(converter.output_key),
+            "config": self._config_for(qmd_path),
+        }
+        encoded = json.dumps(parts, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> CachedResult | None:
+        """
+        Return a saved result, if there is one.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, from `key()`.
+
+        Returns
+        -------
+        CachedResult | None
+            The saved result, or None if there is no (readable) result.
+        """
+        path = self._entry_path(key)
+        try:
+            with path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            result = CachedResult(
+                stdout=data["stdout"],
+                stderr=data["stderr"],
+                exit_code=data["exit_code"],
+            )
+            # Mark as recently used, so it is kept when pruning
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return result
+
+    def put(self, key: str, result: CachedResult) -> None:
+        """
+        Save a result.
+
+        Errors are ignored, as the cache is only an optimisation.
+
+        Parameters
+        ----------
+        key : str
+            Cache key, from `key()`.
+        result : CachedResult
+            Result to save.
+        """
+        path = self._entry_path(key)
+        try:
+            self._ensure_directory()
+            # Write to a temporary file then rename, so that other runs never
+            # see a partly written result
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "stdout": result.stdout,
+                        "stderr": result.stderr,
+                        "exit_code": result.exit_code,
+                    },
+                    f,
+                )
+            Path(tmp_name).replace(path)
+        except OSError as e:
+            if self.verbose:
+                print(
+                    f"Warning: Could not save result to cache: {e}",
+                    file=sys.stderr,
+                )
+
+    def prune(self) -> None:
+        """Remove the least recently used results, down to `max_bytes`."""
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry)
+                for entry in self.directory.glob("*.json")
+            ]
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    def _entry_path(self, key: str) -> Path:
+        """
+        Return the path of the file holding a result.
+
+        Parameters
+        ----------
+        key : str
+            Cache key.
+
+        Returns
+        -------
+        Path
+            Path to the JSON file.
+        """
+        return self.directory / f"{key}.json"
+
+    def _ensure_directory(self) -> None:
+        """Create the cache folder, and tell git to ignore it."""
+        if self.directory.is_dir():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        gitignore = self.directory / ".gitignore"
+        gitignore.write_text(
+            "# Created by lintquarto automatically.\n*\n", encoding="utf-8"
+        )
+
+    def _config_for(self, qmd_path: Path) -> list[tuple[str, str]]:
+        """
+        Hash the configuration files that apply to a .qmd file.
+
+        Results are remembered for each folder, as many files share one.
+
+        Parameters
+        ----------
+        qmd_path : Path
+            Path to the `.qmd` file.
+
+        Returns
+        -------
+        list[tuple[str, str]]
+            Path and content hash of each configuration file found.
+        """
+        folder = qmd_path.resolve().parent
+        with self._lock:
+            hashes = self._config_hashes.get(folder)
+        if hashes is None:
+            hashes = _hash_config_files([folder, Path.cwd().resolve()])
+            with self._lock:
+                self._config_hashes[folder] = hashes
+        return hashes
+
+
+# =============================================================================
+# Helper functions
+# =============================================================================
+
+
+@cache
+def tool_version(executable: str) -> str:
+    """
+    Return a tool's version string, as printed by `--version`.
+
+    This is only run once per tool in each lintquarto run.
+
+    Parameters
+    ----------
+    executable : str
+        Name of the tool's executable.
+
+    Returns
+    -------
+    str
+        Output of `<executable> --version`, or an empty string if it failed.
+    """
+    try:
+        result = subprocess.run(
+            [executable, "--version"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return ""
+    return (result.stdout + result.stderr).strip()
+
+
+@cache
+def _source_fingerprint() -> str:
+    """
+    Summarise lintquarto's own source files.
+
+    Included in the key alongside the version, so editing lintquarto (e.g.
+    in a development install) invalidates cached results.
+
+    Returns
+    -------
+    str
+        Hash of the name, size and modification time of each source file.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.rglob("*.py")):
+        stat = path.stat()
+        digest.update(
+            f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+        )
+    return digest.hexdigest()
+
+
+def _hash_config_files(start_dirs: list[Path]) -> list[tuple[str, str]]:
+    """
+    Hash every known configuration file in and above some folders.
+
+    Parameters
+    ----------
+    start_dirs : list[Path]
+        Folders to start searching from (resolved).
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Path and content hash of each configuration file found, sorted.
+    """
+    found: dict[str, str] = {}
+    for start in start_dirs:
+        for folder in [start, *start.parents]:
+            for name in CONFIG_FILES:
+                path = folder / name
+                if str(path) in found or not path.is_file():
+                    continue
+                try:
+                    found[str(path)] = hashlib.sha256(
+                        path.read_bytes()
+                    ).hexdigest()
+                except OSError:
+                    found[str(path)] = ""
+    return sorted(found.items())
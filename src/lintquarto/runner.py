@@ -2,18 +2,45 @@
 
 from __future__ import annotations
 
+import os
 import subprocess
 import sys
-from contextlib import contextmanager
+from collections.abc import Iterator
+from contextlib import (
+    AbstractContextManager,
+    ExitStack,
+    contextmanager,
+    nullcontext,
+    suppress,
+)
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Iterator
+    from collections.abc import Callable, Iterable
 
+    from .convert.build import BuildDir
+    from .convert.scratch import ScratchDir
+
+from .convert.cache import ConversionCache
+from .convert.constants import MODULE_NAME_LINTERS
 from .convert.converter import QmdToPyConverter, convert_qmd_to_py
-from .convert.rebuild_qmd import recreate_qmd_from_formatted_py
+from .convert.filename import module_safe_stem
+from .convert.rebuild_qmd import (
+    diff_qmd_with_formatted_lines,
+    recreate_qmd_from_formatted_lines,
+    recreate_qmd_from_formatted_py,
+)
+from .gather import FileStream
+from .parallel import run_in_order
 from .registry import Formatters, Linters
+from .result_cache import CachedResult, ResultCache
+from .timings import phase
+
+# Command-line length limit used on Windows, where CreateProcess accepts at
+# most 32,767 characters (a little headroom is left for quoting)
+WINDOWS_MAX_COMMAND_LENGTH = 32_000
 
 # =============================================================================
 # Main class - gets settings, then calls lint_qmd or format_qmd to run across
@@ -25,44 +52,158 @@ class ToolRunner:
     """
     Run built-in and custom tools across a set of Quarto files.
 
+    Linters and custom commands share converted .py files where their
+    conversion settings match, so use as a context manager (or call
+    `close()`) to remove those files afterwards.
+
     Attributes
     ----------
-    qmd_files : list[str]
-        List of paths to `.qmd` files to process.
+    qmd_files : list[str] | FileStream
+        Paths to `.qmd` files to process. Each tool goes through them in
+        turn, so iterators (e.g. from `iter_qmd_files()`) are wrapped in a
+        `FileStream`.
     keep_temp : bool
         If True, keep temporary Python files.
     verbose : bool
         If True, print progress messages during execution.
     lint_non_exec : bool
         If True, also process non-executable Python code chunks.
+    batch : bool
+        If True, run each tool once across all files rather than once per
+        file.
+    jobs : int
+        Maximum number of files (or batches) to process at once.
+    conversions : ConversionCache
+        Converted .py files, shared between linters and custom commands.
+    results : ResultCache | None
+        On-disk cache of linter results, or None if not caching.
+    scratch : ScratchDir | None
+        Folder that converted .py files are written to, or None to write
+        them next to each .qmd file.
+    build : BuildDir | None
+        Persistent folder that linters' and custom commands' converted .py
+        files are written to (and kept in), or None.
+    check : bool
+        If True, formatters don't rewrite the .qmd files, but report (with
+        exit code 1) those that would change.
+    diff : bool
+        If True, as `check`, and also print a unified diff of each change.
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
-        qmd_files: list[str],
+        qmd_files: Iterable[str],
         *,
         keep_temp: bool,
         verbose: bool,
         lint_non_exec: bool,
+        batch: bool = False,
+        jobs: int = 1,
+        cache: bool = False,
+        scratch: ScratchDir | None = None,
+        build: BuildDir | None = None,
+        check: bool = False,
+        diff: bool = False,
     ) -> None:
         """
         Initialise ToolRunner.
 
         Parameters
         ----------
-        qmd_files : list[str]
-            List of paths to `.qmd` files to process.
+        qmd_files : Iterable[str]
+            Paths to `.qmd` files to process. An iterator (e.g. from
+            `iter_qmd_files()`) is read as the first tool needs each file,
+            so that tools start before every file has been found.
         keep_temp : bool
             If True, keep temporary Python files.
         verbose : bool
             If True, print progress messages during execution.
         lint_non_exec : bool
             If True, also process non-executable Python code chunks.
+        batch : bool, optional
+            If True, run each tool once across all files rather than once per
+            file.
+        jobs : int, optional
+            Maximum number of files (or batches) to process at once. Output
+            is still printed in the same order as `qmd_files`.
+        cache : bool, optional
+            If True, reuse saved linter results for files that haven't
+            changed, and save new results. Not used with `keep_temp` (as
+            no .py files would be made for cached results).
+        scratch : ScratchDir | None, optional
+            If provided, write converted .py files to this folder, which is
+            removed as a whole at the end, rather than next to each .qmd
+            file.
+        build : BuildDir | None, optional
+            If provided, write the .py files for linters and custom commands
+            to this folder, under the same names on every run, so that the
+            tools' own caches can be reused. Formatters still use
+            temporary files.
+        check : bool, optional
+            If True, formatters don't rewrite the .qmd files, but report
+            (with exit code 1) those that would change.
+        diff : bool, optional
+            If True, as `check`, and also print a unified diff of each
+            change.
         """
-        self.qmd_files = qmd_files
+        # Iterators can only be read once, so the files are kept as they
+        # are found, for the tools that follow
+        self.qmd_files = (
+            FileStream(qmd_files)
+            if isinstance(qmd_files, Iterator)
+            else qmd_files
+        )
         self.keep_temp = keep_temp
         self.verbose = verbose
         self.lint_non_exec = lint_non_exec
+        self.batch = batch
+        self.jobs = jobs
+        self.scratch = scratch
+        self.build = build
+        self.check = check
+        self.diff = diff
+        self.conversions = ConversionCache(
+            lint_non_exec=lint_non_exec,
+            verbose=verbose,
+            scratch=scratch,
+            build=build,
+        )
+        self.results = (
+            ResultCache(lint_non_exec=lint_non_exec, verbose=verbose)
+            if cache and not keep_temp
+            else None
+        )
+
+    def __enter__(self) -> ToolRunner:  # noqa: PYI034
+        """
+        Enter the runner's context.
+
+        Returns
+        -------
+        ToolRunner
+            This runner.
+        """
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """
+        Remove converted files on exit.
+
+        Parameters
+        ----------
+        *exc_info : object
+            Exception details, if any (ignored).
+        """
+        self.close()
+
+    def close(self) -> None:
+        """Remove shared converted files, and trim the result cache."""
+        if not self.keep_temp:
+            self.conversions.cleanup()
+        elif self.scratch is not None and self.scratch.run_dir is not None:
+            print(f"Kept temporary .py files in {self.scratch.run_dir}")
+        if self.results is not None:
+            self.results.prune()
 
     def run_formatter(self, formatter: str) -> int:
         """
@@ -73,13 +214,48 @@ class ToolRunner:
         formatter : str
             Name of formatter to run.
         """
+        return self.run_formatters([formatter])
+
+    def run_formatters(
+        self, formatters: list[str], jobs: int | None = None
+    ) -> int:
+        """
+        Run built-in formatters, one after another, across all qmd files.
+
+        Each file is converted once, every formatter is run on the same
+        Python code, and the file is rebuilt once at the end - rather than
+        converting and rewriting it once per formatter.
+
+        Parameters
+        ----------
+        formatters : list[str]
+            Names of formatters to run, in order.
+        jobs : int | None, optional
+            Maximum number of files (or batches) to process at once. Defaults
+            to `self.jobs`.
+        """
+        label = ", ".join(formatters)
+        if self.batch:
+            return self._run_batched(
+                label=label,
+                runner=format_qmd_batch,
+                jobs=jobs,
+                formatter=formatters,
+                scratch=self.scratch,
+                check=self.check,
+                diff=self.diff,
+            )
         return self._run_across_files(
-            label=formatter,
+            label=label,
             runner=format_qmd,
-            formatter=formatter,
+            jobs=jobs,
+            formatter=formatters,
+            scratch=self.scratch,
+            check=self.check,
+            diff=self.diff,
         )
 
-    def run_linter(self, linter: str) -> int:
+    def run_linter(self, linter: str, jobs: int | None = None) -> int:
         """
         Run one built-in linter across all qmd files.
 
@@ -87,14 +263,30 @@ class ToolRunner:
         ----------
         linter : str
             Name of linter to run.
+        jobs : int | None, optional
+            Maximum number of files (or batches) to process at once. Defaults
+            to `self.jobs`.
         """
+        if self.batch:
+            return self._run_batched(
+                label=linter,
+                runner=lint_qmd_batch,
+                jobs=jobs,
+                release=linter,
+                linter=linter,
+                conversions=self.conversions,
+            )
         return self._run_across_files(
             label=linter,
             runner=lint_qmd,
+            jobs=jobs,
+            release=linter,
             linter=linter,
+            conversions=self.conversions,
+            results=self.results,
         )
 
-    def run_custom(self, command: list[str]) -> int:
+    def run_custom(self, command: list[str], jobs: int | None = None) -> int:
         """
         Run one custom command across all qmd files.
 
@@ -102,17 +294,94 @@ class ToolRunner:
         ----------
         command : list[str]
             Custom command, represented as list of command-line tokens.
+        jobs : int | None, optional
+            Maximum number of files (or batches) to process at once. Defaults
+            to `self.jobs`.
         """
+        label = f"custom command: {' '.join(command)}"
+        if self.batch:
+            return self._run_batched(
+                label=label,
+                runner=lint_qmd_batch,
+                jobs=jobs,
+                release="custom",
+                custom_command=command,
+                conversions=self.conversions,
+            )
         return self._run_across_files(
-            label=f"custom command: {' '.join(command)}",
+            label=label,
             runner=lint_qmd,
+            jobs=jobs,
+            release="custom",
             custom_command=command,
+            conversions=self.conversions,
         )
 
+    def run_checks(
+        self,
+        linters: list[str],
+        custom_commands: list[list[str]],
+        formatters: list[str] | None = None,
+    ) -> int:
+        """
+        Run linters and custom commands across all qmd files.
+
+        With `jobs` above 1, the tools run at the same time. They only read
+        the generated .py files, so don't interfere with each other. The
+        `jobs` limit is shared between the tools, and each tool's output is
+        printed under its own header, in the order the tools were given.
+
+        Each converted .py file is removed once the last tool needing it
+        has finished with it (unless keeping temporary files).
+
+        Parameters
+        ----------
+        linters : list[str]
+            Names of linters to run.
+        custom_commands : list[list[str]]
+            Custom commands to run, each as a list of command-line tokens.
+        formatters : list[str] | None, optional
+            Formatters to run first (as one chain). Only for `check` or
+            `diff`, where the .qmd files aren't rewritten, so the formatters
+            can run at the same time as the other tools.
+
+        Returns
+        -------
+        int
+            Exit status. Returns the highest exit code from any tool.
+        """
+        if not self.keep_temp:
+            self.conversions.expect(
+                [*linters, *(["custom"] * len(custom_commands))]
+            )
+        tasks: list[Callable[[int | None], int]] = [
+            *(
+                [partial(self.run_formatters, formatters)]
+                if formatters
+                else []
+            ),
+            *(partial(self.run_linter, linter) for linter in linters),
+            *(
+                partial(self.run_custom, command)
+                for command in custom_commands
+            ),
+        ]
+        if self.jobs <= 1 or len(tasks) <= 1:
+            return max((task(None) for task in tasks), default=0)
+
+        # Share the jobs between tools, so that (roughly) no more than `jobs`
+        # files are processed at once in total
+        tool_jobs = min(self.jobs, len(tasks))
+        file_jobs = max(1, self.jobs // tool_jobs)
+        results = run_in_order(lambda task: task(file_jobs), tasks, tool_jobs)
+        return max(results)
+
     def _run_across_files(
         self,
         label: str,
         runner: Callable[..., int],
+        jobs: int | None = None,
+        release: str | None = None,
         **runner_kwargs: object,
     ) -> int:
         """
@@ -124,6 +393,12 @@ class ToolRunner:
             Human-readable label to print before running.
         runner : Callable[..., int]
             Function to call for each `.qmd` file.
+        jobs : int | None, optional
+            Maximum number of files to process at once. Defaults to
+            `self.jobs`.
+        release : str | None, optional
+            If provided, the tool name to release each file's conversions
+            for (see `ConversionCache.release()`) once it has been processed.
         **runner_kwargs : object
             Extra keyword arguments forwarded to `runner`.
 
@@ -134,11 +409,10 @@ class ToolRunner:
             otherwise returns the highest non-zero exit code seen.
         """
         self._print_run_header(label)
-        exit_code = 0
 
-        for qmd_file in self.qmd_files:
+        def process(qmd_file: str) -> int:
             try:
-                ret = runner(
+                return runner(
                     qmd_file=qmd_file,
                     keep_temp_files=self.keep_temp,
                     verbose=self.verbose,
@@ -150,11 +424,68 @@ class ToolRunner:
                     f"Error: Unexpected error processing {qmd_file}: {e}",
                     file=sys.stderr,
                 )
-                ret = 1
+                return 1
+            finally:
+                if release is not None:
+                    self.conversions.release(qmd_file, release)
+
+        if jobs is None:
+            jobs = self.jobs
+        return max(run_in_order(process, self.qmd_files, jobs), default=0)
+
+    def _run_batched(
+        self,
+        label: str,
+        runner: Callable[..., int],
+        jobs: int | None = None,
+        release: str | None = None,
+        **runner_kwargs: object,
+    ) -> int:
+        """
+        Run a tool once across all qmd files.
 
-            exit_code = max(exit_code, ret)
+        Parameters
+        ----------
+        label : str
+            Human-readable label to print before running.
+        runner : Callable[..., int]
+            Function to call with all of the `.qmd` files (e.g.
+            `lint_qmd_batch`).
+        jobs : int | None, optional
+            Maximum number of files to convert, or chunks to process, at
+            once. Defaults to `self.jobs`.
+        release : str | None, optional
+            If provided, the tool name to release every file's conversions
+            for (see `ConversionCache.release()`) once the tool has finished.
+        **runner_kwargs : object
+            Extra keyword arguments forwarded to `runner`.
 
-        return exit_code
+        Returns
+        -------
+        int
+            Exit status. Returns 0 if all files are processed successfully,
+            otherwise returns 1.
+        """
+        self._print_run_header(label)
+        try:
+            return runner(
+                qmd_files=self.qmd_files,
+                keep_temp_files=self.keep_temp,
+                verbose=self.verbose,
+                lint_non_exec=self.lint_non_exec,
+                jobs=self.jobs if jobs is None else jobs,
+                **runner_kwargs,
+            )
+        except Exception as e:  # noqa: BLE001
+            print(
+                f"Error: Unexpected error processing batch: {e}",
+                file=sys.stderr,
+            )
+            return 1
+        finally:
+            if release is not None:
+                for qmd_file in self.qmd_files:
+                    self.conversions.release(qmd_file, release)
 
     def _print_run_header(self, label: str) -> None:
         """
@@ -175,7 +506,7 @@ class ToolRunner:
 # =============================================================================
 
 
-def lint_qmd(  # noqa: PLR0913
+def lint_qmd(  # noqa: C901, PLR0913
     qmd_file: str | Path,
     linter: str | None = None,
     custom_command: list[str] | None = None,
@@ -183,6 +514,8 @@ def lint_qmd(  # noqa: PLR0913
     keep_temp_files: bool = False,
     verbose: bool = False,
     lint_non_exec: bool = False,
+    conversions: ConversionCache | None = None,
+    results: ResultCache | None = None,
 ) -> int:
     """
     Convert a .qmd file to .py, lint it, and clean up.
@@ -201,6 +534,13 @@ def lint_qmd(  # noqa: PLR0913
         If True, print detailed progress information.
     lint_non_exec : bool, optional
         If True, also lint non-executable Python code chunks.
+    conversions : ConversionCache | None, optional
+        If provided, get the .py file from this cache (which then owns it,
+        and removes it in `cleanup()`), rather than converting afresh.
+    results : ResultCache | None, optional
+        If provided, replay the saved result for a built-in linter when
+        nothing that affects it has changed (without converting or running
+        anything), and otherwise save the new result.
 
     Returns
     -------
@@ -208,36 +548,303 @@ def lint_qmd(  # noqa: PLR0913
         0 on success, nonzero on error.
 
     """
+    base_command = tool_command(linter, custom_command)
+    if base_command is None:
+        return 1
+
+    # Replay a saved result, if there is one
+    cache_key = None
+    if results is not None and linter is not None:
+        cache_key = results.key(qmd_file, linter)
+        cached = results.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            if verbose:
+                print(f"Using cached {linter} result for {qmd_file}")
+            print_output(cached.stdout, cached.stderr)
+            return cached.exit_code
+
+    # Tools that can read from standard input are sent the converted code
+    # directly, so no .py file is written (unless asked to keep them). They
+    # are told the code comes from the .py file that would have been written
+    py_file = Path(qmd_file).with_suffix(".py")
+    if (
+        linter is not None
+        and conversions is not None
+        and not keep_temp_files
+        and can_use_stdin(py_file)
+        and (stdin := Linters().stdin_command(linter, str(py_file)))
+        is not None
+    ):
+        command, label = stdin
+        py_code = convert_for_stdin(
+            qmd_file, linter, verbose=verbose, conversions=conversions
+        )
+        if py_code is None:
+            return 1
+        cleanup = nullcontext(py_file)
+    else:
+        py_code = label = None
+        prepared = prepare_py_file(
+            qmd_file,
+            linter,
+            base_command,
+            keep_temp_files=keep_temp_files,
+            verbose=verbose,
+            lint_non_exec=lint_non_exec,
+            conversions=conversions,
+        )
+        if prepared is None:
+            return 1
+        py_file, command, cleanup = prepared
+
+    tool = linter or command[0]
+    with cleanup:
+        try:
+            # Run command on the temporary .py file (or the code sent to
+            # standard input) and capture output
+            with phase("tool", file=qmd_file, tool=tool):
+                result = subprocess.run(
+                    command,
+                    input=py_code,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                    env=search_path_env([(Path(qmd_file), py_file)]),
+                )
+            with phase("rewrite", file=qmd_file, tool=tool):
+                if label is not None:
+                    result.stdout = relabel_stdin(
+                        result.stdout, label, py_file
+                    )
+                    result.stderr = relabel_stdin(
+                        result.stderr, label, py_file
+                    )
+
+                # Replace all references to the .py file with the .qmd file
+                stdout, stderr = print_tool_output(
+                    result, path_replacements(Path(qmd_file), py_file)
+                )
+        except Exception as e:  # noqa: BLE001
+            print(
+                f"Error: Unexpected failure while linting {qmd_file}: {e}",
+                file=sys.stderr,
+            )
+            return 1
+
+    if results is not None and cache_key is not None:
+        results.put(cache_key, CachedResult(stdout, stderr, exit_code=0))
+    return 0
+
+
+def lint_qmd_batch(  # noqa: PLR0913
+    qmd_files: Iterable[str | Path],
+    linter: str | None = None,
+    custom_command: list[str] | None = None,
+    *,
+    keep_temp_files: bool = False,
+    verbose: bool = False,
+    lint_non_exec: bool = False,
+    jobs: int = 1,
+    conversions: ConversionCache | None = None,
+) -> int:
+    """
+    Convert many .qmd files to .py, lint them together, and clean up.
+
+    Every file is converted first. The tool is then run once on all of the
+    temporary .py files (split into several runs if the command line would
+    be too long), and each reference to a .py file in the output is mapped
+    back to the .qmd file it came from. For type checkers that name modules
+    after files (`MODULE_NAME_LINTERS`), each .py file is given a unique
+    module name, so `.qmd` files with the same name (e.g. `index.qmd` in
+    several folders) aren't reported as duplicate modules.
+
+    Parameters
+    ----------
+    qmd_files : Iterable[str | Path]
+        Paths to the `.qmd` files to process. Each is converted as soon as
+        it is read, so these can still be being found (e.g. a `FileStream`).
+    linter : str | None, optional
+        Name of the linter to run.
+    custom_command : list[str] | None, optional
+        Custom command to run against the generated .py files.
+    keep_temp_files : bool, optional
+        If True, retain the temporary .py files after linting.
+    verbose : bool, optional
+        If True, print detailed progress information.
+    lint_non_exec : bool, optional
+        If True, also lint non-executable Python code chunks.
+    jobs : int, optional
+        Maximum number of files to convert, or chunks to lint, at once. When
+        more than 1, the files are split into at least `jobs` chunks.
+    conversions : ConversionCache | None, optional
+        If provided, get the .py files from this cache (which then owns
+        them, and removes them in `cleanup()`), rather than converting
+        afresh.
+
+    Returns
+    -------
+    int
+        0 on success, nonzero if any file could not be converted or linted.
+    """
+    base_command = tool_command(linter, custom_command)
+    if base_command is None:
+        return 1
+    tool = linter or base_command[0]
+
+    exit_code = 0
+    with ExitStack() as stack:
+        # Convert every file, registering each .py file for clean up
+        def convert(qmd_file: str | Path) -> tuple[str | Path, Path | None]:
+            return qmd_file, convert_for_lint(
+                qmd_file,
+                linter=linter,
+                verbose=verbose,
+                lint_non_exec=lint_non_exec,
+                conversions=conversions,
+                module_safe=linter in MODULE_NAME_LINTERS,
+            )
+
+        # The files are only read once, so may still be being found
+        converted: list[tuple[Path, Path]] = []
+        for qmd_file, py_file in run_in_order(convert, qmd_files, jobs):
+            if py_file is None:
+                exit_code = 1
+                continue
+            if conversions is None:
+                stack.enter_context(
+                    temp_py_file(py_file=py_file, keep=keep_temp_files)
+                )
+            converted.append((Path(qmd_file), py_file))
+
+        py_files = [str(py_file) for _, py_file in converted]
+        replacements = batch_path_replacements(converted)
+        env = search_path_env(converted)
+
+        def run_chunk(chunk: list[str]) -> int:
+            if verbose:
+                print(f"Running {base_command[0]} on {len(chunk)} file(s)")
+            try:
+                with phase("tool", tool=tool):
+                    result = subprocess.run(
+                        [*base_command, *chunk],
+                        capture_output=True,
+                        text=True,
+                        check=False,
+                        env=env,
+                    )
+                with phase("rewrite", tool=tool):
+                    print_tool_output(result, replacements)
+            except Exception as e:  # noqa: BLE001
+                print(
+                    f"Error: Unexpected failure while linting batch: {e}",
+                    file=sys.stderr,
+                )
+                return 1
+            return 0
+
+        chunks = list(chunk_arguments(base_command, py_files, parts=jobs))
+        return max([exit_code, *run_in_order(run_chunk, chunks, jobs)])
+
+
+def tool_command(
+    linter: str | None, custom_command: list[str] | None
+) -> list[str] | None:
+    """
+    Return the command for a linter or custom command, given exactly one.
+
+    Parameters
+    ----------
+    linter : str | None
+        Name of the linter to run.
+    custom_command : list[str] | None
+        Custom command to run.
+
+    Returns
+    -------
+    list[str] | None
+        The command (without any file), or None if not exactly one of
+        `linter` and `custom_command` was given (the error will have been
+        printed).
+    """
+    if linter is not None and custom_command is None:
+        return list(Linters().supported[linter])
+    if custom_command is not None and linter is None:
+        return list(custom_command)
+    print(
+        "Error: Provide exactly one of 'linter' or 'custom_command'.",
+        file=sys.stderr,
+    )
+    return None
+
+
+def convert_for_lint(  # noqa: PLR0913
+    qmd_file: str | Path,
+    linter: str | None,
+    *,
+    verbose: bool,
+    lint_non_exec: bool,
+    conversions: ConversionCache | None = None,
+    module_safe: bool = False,
+) -> Path | None:
+    """
+    Validate a .qmd file and convert it to a .py file for linting.
+
+    Parameters
+    ----------
+    qmd_file : str | Path
+        Path to the `.qmd` file to process.
+    linter : str | None
+        Name of the linter to run, or None for a custom command.
+    verbose : bool
+        If True, print detailed progress information.
+    lint_non_exec : bool
+        If True, also lint non-executable Python code chunks.
+    conversions : ConversionCache | None, optional
+        If provided, reuse a .py file from this cache where one was already
+        made with the same conversion settings.
+    module_safe : bool, optional
+        If True, name the .py file with `module_safe_stem()`, so that it can
+        be type checked alongside files from `.qmd` files of the same name.
+
+    Returns
+    -------
+    Path | None
+        Path to the generated .py file, or None if there was an error (which
+        will have been printed).
+    """
     # Convert input to Path object
     qmd_path = Path(qmd_file)
 
     # Validate that the file exists and has a .qmd extension
     if not qmd_path.exists() or qmd_path.suffix != ".qmd":
         print(f"Error: {qmd_file} is not a valid .qmd file.", file=sys.stderr)
-        return 1
-
-    if (linter is None) == (custom_command is None):
-        print(
-            "Error: Provide exactly one of 'linter' or 'custom_command'.",
-            file=sys.stderr,
-        )
-        return 1
+        return None
 
     # Convert the .qmd file to a .py file
     try:
-        py_file = convert_qmd_to_py(
-            qmd_path=str(qmd_path),
-            linter=linter,
-            verbose=verbose,
-            lint_non_exec=lint_non_exec,
-        )
+        if conversions is not None:
+            py_file = conversions.get(
+                qmd_path, linter or "custom", module_safe=module_safe
+            )
+        else:
+            py_file = convert_qmd_to_py(
+                qmd_path=str(qmd_path),
+                linter=linter,
+                output_path=(
+                    qmd_path.with_name(f"{module_safe_stem(qmd_path)}.py")
+                    if module_safe
+                    else None
+                ),
+                verbose=verbose,
+                lint_non_exec=lint_non_exec,
+            )
     # Catch for if the function raises an error
     except Exception as e:  # noqa: BLE001
         print(
             f"Error: Failed to convert {qmd_file} to .py: {e}",
             file=sys.stderr,
         )
-        return 1
+        return None
 
     # Catch for if the function returns None
     if py_file is None:
@@ -245,46 +852,113 @@ def lint_qmd(  # noqa: PLR0913
             f"Error: Failed to convert {qmd_file} to .py",
             file=sys.stderr,
         )
-        return 1
+    return py_file
 
-    with temp_py_file(py_file=py_file, keep=keep_temp_files):
-        try:
-            if custom_command is not None:
-                command = [*custom_command, str(py_file)]
-            else:
-                command = Linters().supported[linter] + [str(py_file)]
-
-            # Run command on the temporary .py file and capture output
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
 
-            # Get the base filename from the full file paths
-            qmd_filename = str(qmd_path.name)
-            py_filename = str(py_file.name)
+def prepare_py_file(  # noqa: PLR0913
+    qmd_file: str | Path,
+    linter: str | None,
+    base_command: list[str],
+    *,
+    keep_temp_files: bool,
+    verbose: bool,
+    lint_non_exec: bool,
+    conversions: ConversionCache | None,
+) -> tuple[Path, list[str], AbstractContextManager[Path]] | None:
+    """
+    Convert a .qmd file to a .py file, and build the command to lint it.
+
+    Parameters
+    ----------
+    qmd_file : str | Path
+        Path to the `.qmd` file to process.
+    linter : str | None
+        Name of the linter to run, or None for a custom command.
+    base_command : list[str]
+        Command to run, from `tool_command()`, to which the path of the .py
+        file is added.
+    keep_temp_files : bool
+        If True, retain the temporary .py file after linting.
+    verbose : bool
+        If True, print detailed progress information.
+    lint_non_exec : bool
+        If True, also lint non-executable Python code chunks.
+    conversions : ConversionCache | None
+        If provided, get the .py file from this cache.
+
+    Returns
+    -------
+    tuple[Path, list[str], AbstractContextManager[Path]] | None
+        Path to the .py file, the command to run, and a context manager
+        which removes the .py file on exit (if it isn't kept or shared). None
+        if conversion failed (the error will have been printed).
+    """
+    py_file = convert_for_lint(
+        qmd_file,
+        linter=linter,
+        verbose=verbose,
+        lint_non_exec=lint_non_exec,
+        conversions=conversions,
+    )
+    if py_file is None:
+        return None
 
-            # Replace all references to the .py file with the .qmd file
-            result.stdout = result.stdout.replace(py_filename, qmd_filename)
-            print(result.stdout, end="")
+    command = [*base_command, str(py_file)]
 
-            # If there is an error - which will include some linter outputs
-            # that get classed as errors - then also replace `.py` and print
-            if result.stderr:
-                result.stderr = result.stderr.replace(
-                    py_filename, qmd_filename
-                )
-                print(result.stderr, file=sys.stderr)
-        except Exception as e:  # noqa: BLE001
-            print(
-                f"Error: Unexpected failure while linting {qmd_file}: {e}",
-                file=sys.stderr,
-            )
-            return 1
+    # Files from the cache are shared with other tools, so are removed later
+    if conversions is not None:
+        return py_file, command, nullcontext(py_file)
+    return (
+        py_file,
+        command,
+        temp_py_file(py_file=py_file, keep=keep_temp_files),
+    )
 
-    return 0
+
+def convert_for_stdin(
+    qmd_file: str | Path,
+    linter: str,
+    *,
+    verbose: bool,
+    conversions: ConversionCache,
+) -> str | None:
+    """
+    Validate a .qmd file and convert it to Python code held in memory.
+
+    Parameters
+    ----------
+    qmd_file : str | Path
+        Path to the `.qmd` file to process.
+    linter : str
+        Name of the linter to run.
+    verbose : bool
+        If True, print detailed progress information.
+    conversions : ConversionCache
+        Cache of conversions, so linters needing the same output share it.
+
+    Returns
+    -------
+    str | None
+        The Python code (ending in a newline), or None if there was an error
+        (which will have been printed).
+    """
+    qmd_path = Path(qmd_file)
+    if not qmd_path.exists() or qmd_path.suffix != ".qmd":
+        print(f"Error: {qmd_file} is not a valid .qmd file.", file=sys.stderr)
+        return None
+
+    try:
+        py_lines = conversions.lines(qmd_path, linter)
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Error: Failed to convert {qmd_file} to .py: {e}",
+            file=sys.stderr,
+        )
+        return None
+
+    if verbose:
+        print(f"Sending converted {qmd_file} to {linter} on standard input")
+    return "\n".join(py_lines) + "\n"
 
 
 # =============================================================================
@@ -292,13 +966,16 @@ def lint_qmd(  # noqa: PLR0913
 # =============================================================================
 
 
-def format_qmd(
+def format_qmd(  # noqa: PLR0913
     qmd_file: str | Path,
-    formatter: str,
+    formatter: str | list[str],
     *,
     keep_temp_files: bool = False,
     verbose: bool = False,
     lint_non_exec: bool = False,
+    scratch: ScratchDir | None = None,
+    check: bool = False,
+    diff: bool = False,
 ) -> int:
     """
     Format Python code in a Quarto file.
@@ -307,37 +984,68 @@ def format_qmd(
     `.py` file, runs the requested formatter on it, writes the formatted Python
     code back into the original `.qmd` file.
 
+    Given several formatters, each is run in turn on the same Python code,
+    and the `.qmd` file is only rebuilt once, at the end.
+
     Parameters
     ----------
     qmd_file : str | Path
         Path to the `.qmd` file to process.
-    formatter : str
-        Name of the supported formatter to run.
+    formatter : str | list[str]
+        Name of the supported formatter to run, or names of formatters to
+        run one after another.
     keep_temp_files : bool, optional
         If True, keep the temporary `.py` file after processing.
     verbose : bool, optional
         If True, print verbose progress messages.
     lint_non_exec : bool, optional
         If True, also format non-executable Python code chunks.
+    scratch : ScratchDir | None, optional
+        If provided, write the temporary `.py` file to this folder (which
+        is removed as a whole later) rather than next to the `.qmd` file.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` file, but return 1 if it would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of the change.
 
     Returns
     -------
     int
-        0 on success, nonzero on error.
+        0 on success, nonzero on error (or, with `check` or `diff`, if the
+        file would change).
     """
     # Convert input to Path object
     qmd_path = Path(qmd_file)
+    formatters = _formatter_chain(formatter)
 
     # Validate that the file exists and has a .qmd extension
     if not qmd_path.exists() or qmd_path.suffix != ".qmd":
         print(f"Error: {qmd_file} is not a valid .qmd file.", file=sys.stderr)
         return 1
 
+    # Formatters that read from standard input are sent the converted code
+    # directly, and write the formatted code back, so no .py file is needed
+    if (
+        not keep_temp_files
+        and all(name in Formatters().stdin for name in formatters)
+        and can_use_stdin(qmd_path)
+    ):
+        return _format_stdin(
+            qmd_path=qmd_path,
+            formatters=formatters,
+            verbose=verbose,
+            lint_non_exec=lint_non_exec,
+            check=check,
+            diff=diff,
+        )
+
     # Convert the .qmd file to a .py file
     try:
         py_file, converter = convert_qmd_to_py(
             qmd_path=str(qmd_path),
-            formatter=formatter,
+            formatter=formatters[0],
+            output_path=scratch.target(qmd_path) if scratch else None,
             verbose=verbose,
             lint_non_exec=lint_non_exec,
         )
@@ -357,26 +1065,298 @@ def format_qmd(
         )
         return 1
 
-    with temp_py_file(py_file=py_file, keep=keep_temp_files):
+    # Files in a scratch folder are all removed at once, with the folder
+    if scratch is not None:
+        cleanup = nullcontext(py_file)
+    else:
+        cleanup = temp_py_file(py_file=py_file, keep=keep_temp_files)
+    with cleanup:
         return _format_temp_py(
             qmd_path=qmd_path,
             py_file=py_file,
             converter=converter,
-            formatter=formatter,
+            formatters=formatters,
             verbose=verbose,
+            check=check,
+            diff=diff,
         )
 
 
-def _format_temp_py(
+def format_qmd_batch(  # noqa: PLR0913
+    qmd_files: Iterable[str | Path],
+    formatter: str | list[str],
     *,
-    qmd_path: Path,
-    py_file: Path,
-    converter: QmdToPyConverter,
-    formatter: str,
-    verbose: bool,
+    keep_temp_files: bool = False,
+    verbose: bool = False,
+    lint_non_exec: bool = False,
+    jobs: int = 1,
+    scratch: ScratchDir | None = None,
+    check: bool = False,
+    diff: bool = False,
 ) -> int:
     """
-    Run formatter on temporary py file, then recreate QMD from py.
+    Format Python code in many Quarto files with one run of the formatter.
+
+    Every file is converted first. The formatter is then run once on all of
+    the temporary .py files (split into several runs if the command line
+    would be too long), and the formatted code is written back into each
+    `.qmd` file. Given several formatters, each is run in turn on the same
+    .py files before any `.qmd` file is rebuilt.
+
+    Parameters
+    ----------
+    qmd_files : Iterable[str | Path]
+        Paths to the `.qmd` files to process. Each is converted as soon as
+        it is read, so these can still be being found (e.g. a `FileStream`).
+    formatter : str | list[str]
+        Name of the supported formatter to run, or names of formatters to
+        run one after another.
+    keep_temp_files : bool, optional
+        If True, keep the temporary `.py` files after processing.
+    verbose : bool, optional
+        If True, print verbose progress messages.
+    lint_non_exec : bool, optional
+        If True, also format non-executable Python code chunks.
+    jobs : int, optional
+        Maximum number of files to convert, or chunks to format, at once.
+        When more than 1, the files are split into at least `jobs` chunks.
+    scratch : ScratchDir | None, optional
+        If provided, write the temporary `.py` files to this folder (which
+        is removed as a whole later) rather than next to each `.qmd` file.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` files, but return 1 if any would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of each change.
+
+    Returns
+    -------
+    int
+        0 on success, nonzero if any file could not be converted or
+        formatted (or, with `check` or `diff`, would change).
+    """
+    formatters = _formatter_chain(formatter)
+
+    exit_code = 0
+    with ExitStack() as stack:
+        # Convert every file, registering each .py file for clean up
+        def convert(
+            qmd_file: str | Path,
+        ) -> tuple[str | Path, tuple[Path, QmdToPyConverter, str] | None]:
+            return qmd_file, convert_for_format(
+                qmd_file,
+                formatters[0],
+                verbose=verbose,
+                lint_non_exec=lint_non_exec,
+                scratch=scratch,
+            )
+
+        # The files are only read once, so may still be being found
+        converted: list[tuple[Path, Path, QmdToPyConverter, str]] = []
+        for qmd_file, result in run_in_order(convert, qmd_files, jobs):
+            if result is None:
+                exit_code = 1
+                continue
+            py_file, converter, original = result
+            # Files in a scratch folder are removed at once, with the folder
+            if scratch is None:
+                stack.enter_context(
+                    temp_py_file(py_file=py_file, keep=keep_temp_files)
+                )
+            converted.append((Path(qmd_file), py_file, converter, original))
+
+        py_files = [str(py_file) for _, py_file, _, _ in converted]
+        replacements = batch_path_replacements(
+            [(qmd_path, py_file) for qmd_path, py_file, _, _ in converted]
+        )
+
+        def run_chunk(name: str, chunk: list[str]) -> int:
+            base_command = Formatters().supported[name]
+            if verbose:
+                print(f"Running {base_command[0]} on {len(chunk)} file(s)")
+            try:
+                with phase("tool", tool=name):
+                    result = subprocess.run(
+                        [*base_command, *chunk],
+                        capture_output=True,
+                        text=True,
+                        check=False,
+                    )
+            except Exception as e:  # noqa: BLE001
+                print(
+                    f"Error: Unexpected failure while formatting batch: {e}",
+                    file=sys.stderr,
+                )
+                return 1
+            with phase("rewrite", tool=name):
+                print_tool_output(result, replacements)
+            if _should_rebuild(name, result.returncode):
+                return 0
+            return result.returncode
+
+        # Each formatter finishes with every file before the next starts
+        for name in formatters:
+            chunks = chunk_arguments(
+                Formatters().supported[name], py_files, parts=jobs
+            )
+            exit_code = max(
+                [
+                    exit_code,
+                    *run_in_order(partial(run_chunk, name), chunks, jobs),
+                ]
+            )
+
+        return max(
+            [
+                exit_code,
+                *(
+                    _rebuild_if_formatted(
+                        qmd_path=qmd_path,
+                        py_file=py_file,
+                        converter=converter,
+                        original=original,
+                        verbose=verbose,
+                        check=check,
+                        diff=diff,
+                    )
+                    for qmd_path, py_file, converter, original in converted
+                ),
+            ]
+        )
+
+
+def convert_for_format(
+    qmd_file: str | Path,
+    formatter: str,
+    *,
+    verbose: bool,
+    lint_non_exec: bool,
+    scratch: ScratchDir | None = None,
+) -> tuple[Path, QmdToPyConverter, str] | None:
+    """
+    Convert a .qmd file to a .py file for a formatter, reporting errors.
+
+    Parameters
+    ----------
+    qmd_file : str | Path
+        Path to the `.qmd` file to convert.
+    formatter : str
+        Name of the formatter the file is converted for.
+    verbose : bool
+        If True, print detailed progress information.
+    lint_non_exec : bool
+        If True, also include non-executable Python code chunks.
+    scratch : ScratchDir | None, optional
+        If provided, write the `.py` file to this folder rather than next to
+        the `.qmd` file.
+
+    Returns
+    -------
+    tuple[Path, QmdToPyConverter, str] | None
+        The `.py` file, the converter (needed to rebuild the `.qmd` file),
+        and the code written to the `.py` file. None if the file couldn't be
+        converted (after printing an error).
+    """
+    qmd_path = Path(qmd_file)
+    if not qmd_path.exists() or qmd_path.suffix != ".qmd":
+        print(f"Error: {qmd_file} is not a valid .qmd file.", file=sys.stderr)
+        return None
+    try:
+        result = convert_qmd_to_py(
+            qmd_path=str(qmd_path),
+            formatter=formatter,
+            output_path=scratch.target(qmd_path) if scratch else None,
+            verbose=verbose,
+            lint_non_exec=lint_non_exec,
+        )
+        if result is None:
+            print(
+                f"Error: Failed to convert {qmd_file} to .py", file=sys.stderr
+            )
+            return None
+        py_file, converter = result
+        return py_file, converter, py_file.read_text(encoding="utf-8")
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Error: Failed to convert {qmd_file} to .py: {e}",
+            file=sys.stderr,
+        )
+        return None
+
+
+def _rebuild_if_formatted(  # noqa: PLR0913
+    *,
+    qmd_path: Path,
+    py_file: Path,
+    converter: QmdToPyConverter,
+    original: str,
+    verbose: bool,
+    check: bool = False,
+    diff: bool = False,
+) -> int:
+    """
+    Rebuild a QMD file from its .py file, if the formatter changed it.
+
+    When formatting a batch, the formatter's exit code covers every file.
+    It leaves files it couldn't format (e.g. due to a syntax error) as they
+    were, so only files whose code changed are rebuilt.
+
+    Parameters
+    ----------
+    qmd_path : Path
+        Path to the source `.qmd` file being formatted.
+    py_file : Path
+        Path to the `.py` file the formatter was run on.
+    converter : QmdToPyConverter
+        Converter used to make the `.py` file.
+    original : str
+        Code in the `.py` file before the formatter was run.
+    verbose : bool
+        If True, print verbose progress messages.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` file, but return 1 if it would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of the change.
+
+    Returns
+    -------
+    int
+        `0` on success, or `1` if the file couldn't be rebuilt (or, with
+        `check` or `diff`, would change).
+    """
+    try:
+        if py_file.read_text(encoding="utf-8") == original:
+            print(f"{qmd_path}: unchanged")
+            return 0
+        return _rebuild_qmd(
+            qmd_path=qmd_path,
+            converter=converter,
+            verbose=verbose,
+            formatted=py_file,
+            check=check,
+            diff=diff,
+        )
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Error: Unexpected error formatting {qmd_path}: {e}",
+            file=sys.stderr,
+        )
+        return 1
+
+
+def _format_temp_py(  # noqa: PLR0913
+    *,
+    qmd_path: Path,
+    py_file: Path,
+    converter: QmdToPyConverter,
+    formatters: list[str],
+    verbose: bool,
+    check: bool = False,
+    diff: bool = False,
+) -> int:
+    """
+    Run formatters on temporary py file, then recreate QMD from py.
 
     Parameters
     ----------
@@ -387,53 +1367,178 @@ def _format_temp_py(
     converter :
         Converter object returned by `convert_qmd_to_py`. Must provide
         `python_blocks` metadata used to reconstruct the Quarto file.
-    formatter : str
-        Name of the formatter to run.
+    formatters : list[str]
+        Names of the formatters to run, one after another.
     verbose : bool
         If True, print verbose progress messages.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` file, but return 1 if it would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of the change.
 
     Returns
     -------
     int
-        Formatter return code. Returns `0` on success, or the
-        formatter's nonzero exit code if formatting fails.
+        Formatter return code. Returns `0` on success, or the highest
+        nonzero exit code from any formatter that failed.
     """
     try:
-        command = list(Formatters().supported[formatter])
-        command.append(str(py_file))
-        if verbose:
-            print(f"Running command: {' '.join(command)}")
-        result = subprocess.run(
-            command, capture_output=True, text=True, check=False
+        exit_code = 0
+        formatted = False
+        for formatter in formatters:
+            command = list(Formatters().supported[formatter])
+            command.append(str(py_file))
+            if verbose:
+                print(f"Running command: {' '.join(command)}")
+            with phase("tool", file=qmd_path, tool=formatter):
+                result = subprocess.run(
+                    command, capture_output=True, text=True, check=False
+                )
+            if result.stdout:
+                print(result.stdout, end="")
+            if result.stderr:
+                print(result.stderr, file=sys.stderr, end="")
+
+            # A formatter that fails leaves the file as it was, so the next
+            # one is still run on the code from the formatters before it
+            if _should_rebuild(formatter, result.returncode):
+                formatted = True
+            else:
+                exit_code = max(exit_code, result.returncode)
+
+        if not formatted:
+            return exit_code
+        return max(
+            exit_code,
+            _rebuild_qmd(
+                qmd_path=qmd_path,
+                converter=converter,
+                verbose=verbose,
+                formatted=py_file,
+                check=check,
+                diff=diff,
+            ),
         )
-        if result.stdout:
-            print(result.stdout, end="")
-        if result.stderr:
-            print(result.stderr, file=sys.stderr, end="")
-
-        # Slightly different for ruff check --fix as prints remaining
-        # violations that it wasn't able to fix
-        should_rebuild = result.returncode == 0
-        if formatter == "ruff-check-fix":
-            should_rebuild = result.returncode in {0, 1}
-        if not should_rebuild:
-            return result.returncode
 
-        if not converter.python_blocks:
-            print(
-                "Error: Converter has no python_blocks metadata.",
-                file=sys.stderr,
-            )
-            return 1
-        recreate_qmd_from_formatted_py(
-            qmd_path=qmd_path,
-            py_path=py_file,
-            python_blocks=converter.python_blocks,
-            verbose=verbose,
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Error: Unexpected error formatting {qmd_path}: {e}",
+            file=sys.stderr,
+        )
+        return 1
+
+
+def _format_stdin(  # noqa: PLR0913
+    *,
+    qmd_path: Path,
+    formatters: list[str],
+    verbose: bool,
+    lint_non_exec: bool,
+    check: bool = False,
+    diff: bool = False,
+) -> int:
+    """
+    Run formatters on converted code sent to standard input, then rebuild QMD.
+
+    Each formatter's output is sent to the next, so the code is only
+    converted, and the QMD file rebuilt, once.
+
+    Parameters
+    ----------
+    qmd_path : Path
+        Path to the source `.qmd` file being formatted.
+    formatters : list[str]
+        Names of the formatters to run, one after another. Each must be in
+        `Formatters().stdin`.
+    verbose : bool
+        If True, print verbose progress messages.
+    lint_non_exec : bool
+        If True, also format non-executable Python code chunks.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` file, but return 1 if it would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of the change.
+
+    Returns
+    -------
+    int
+        Formatter return code. Returns `0` on success, or the highest
+        nonzero exit code from any formatter that failed.
+    """
+    try:
+        converter = QmdToPyConverter(
+            tool=formatters[0], lint_non_exec=lint_non_exec, mode="format"
+        )
+        with (
+            phase("convert", file=qmd_path),
+            qmd_path.open(encoding="utf-8") as f,
+        ):
+            py_lines = converter.convert(qmd_lines=f.readlines())
+    except Exception as e:  # noqa: BLE001
+        print(
+            f"Error: Failed to convert {qmd_path} to .py: {e}",
+            file=sys.stderr,
+        )
+        return 1
+
+    # The formatter is told the code comes from the .py file that would have
+    # been written, so it finds the same configuration
+    py_file = qmd_path.with_suffix(".py")
+    try:
+        exit_code = 0
+        formatted = False
+        for formatter in formatters:
+            stdin = Formatters().stdin_command(formatter, str(py_file))
+            if stdin is None:
+                print(
+                    f"Error: {formatter} can't read from standard input.",
+                    file=sys.stderr,
+                )
+                return 1
+            command, _ = stdin
+            if verbose:
+                print(f"Running command: {' '.join(command)}")
+            with phase("tool", file=qmd_path, tool=formatter):
+                result = subprocess.run(
+                    command,
+                    input="\n".join(py_lines) + "\n",
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+
+            # Formatted code is written to stdout, so only print stderr
+            # (which holds any messages, e.g. violations ruff check
+            # couldn't fix)
+            with phase("rewrite", file=qmd_path, tool=formatter):
+                stderr = rewrite_paths(
+                    result.stderr, path_replacements(qmd_path, py_file)
+                )
+            if stderr:
+                print(stderr, file=sys.stderr, end="")
+
+            # If a formatter fails, the next is sent the code from before it
+            if _should_rebuild(formatter, result.returncode):
+                formatted = True
+                py_lines = result.stdout.splitlines()
+            else:
+                exit_code = max(exit_code, result.returncode)
+
+        if not formatted:
+            return exit_code
+        return max(
+            exit_code,
+            _rebuild_qmd(
+                qmd_path=qmd_path,
+                converter=converter,
+                verbose=verbose,
+                formatted=py_lines,
+                check=check,
+                diff=diff,
+            ),
         )
-        if verbose:
-            print(f"✓ Successfully formatted {qmd_path}")
-        return 0  # noqa: TRY300
 
     except Exception as e:  # noqa: BLE001
         print(
@@ -443,6 +1548,130 @@ def _format_temp_py(
         return 1
 
 
+def _formatter_chain(formatter: str | list[str]) -> list[str]:
+    """
+    Return the formatters to run, one after another, as a list.
+
+    Parameters
+    ----------
+    formatter : str | list[str]
+        Name of a formatter, or names of formatters.
+
+    Returns
+    -------
+    list[str]
+        Names of the formatters, in order.
+    """
+    if isinstance(formatter, str):
+        return [formatter]
+    return list(formatter)
+
+
+def _should_rebuild(formatter: str, returncode: int) -> bool:
+    """
+    Check whether a formatter succeeded, so the QMD file should be rebuilt.
+
+    Parameters
+    ----------
+    formatter : str
+        Name of the formatter that was run.
+    returncode : int
+        Formatter's exit code.
+
+    Returns
+    -------
+    bool
+        True if the formatted code should be written back to the QMD file.
+    """
+    # Slightly different for ruff check --fix as it exits with 1 when there
+    # are remaining violations that it wasn't able to fix
+    if formatter == "ruff-check-fix":
+        return returncode in {0, 1}
+    return returncode == 0
+
+
+def _rebuild_qmd(  # noqa: PLR0913
+    *,
+    qmd_path: Path,
+    converter: QmdToPyConverter,
+    verbose: bool,
+    formatted: Path | list[str],
+    check: bool = False,
+    diff: bool = False,
+) -> int:
+    """
+    Write formatted Python back into the QMD file's code chunks.
+
+    The file is only rewritten if its code changed. Either way, a line
+    saying whether it changed is printed. With `check` or `diff`, nothing
+    is written, and the line says whether the file would change.
+
+    Parameters
+    ----------
+    qmd_path : Path
+        Path to the source `.qmd` file being formatted.
+    converter : QmdToPyConverter
+        Converter used to make the Python code. Must provide
+        `python_blocks` metadata used to reconstruct the Quarto file.
+    verbose : bool
+        If True, print verbose progress messages.
+    formatted : Path | list[str]
+        Formatted `.py` file, or the lines of formatted Python.
+    check : bool, optional
+        If True, don't rewrite the `.qmd` file, but return 1 if it would
+        change.
+    diff : bool, optional
+        If True, as `check`, and also print a unified diff of the change.
+
+    Returns
+    -------
+    int
+        `0` on success, or `1` if there was no block metadata (or, with
+        `check` or `diff`, if the file would change).
+    """
+    if not converter.python_blocks:
+        print(
+            "Error: Converter has no python_blocks metadata.",
+            file=sys.stderr,
+        )
+        return 1
+    if check or diff:
+        py_lines = (
+            formatted
+            if isinstance(formatted, list)
+            else formatted.read_text(encoding="utf-8").splitlines()
+        )
+        with phase("rebuild", file=qmd_path):
+            changes = diff_qmd_with_formatted_lines(
+                qmd_path=qmd_path,
+                py_lines=py_lines,
+                python_blocks=converter.python_blocks,
+            )
+        if diff and changes:
+            print(changes, end="")
+        print(f"{qmd_path}: {'would change' if changes else 'unchanged'}")
+        return 1 if changes else 0
+    with phase("rebuild", file=qmd_path):
+        if isinstance(formatted, list):
+            changed = recreate_qmd_from_formatted_lines(
+                qmd_path=qmd_path,
+                py_lines=formatted,
+                python_blocks=converter.python_blocks,
+                verbose=verbose,
+            )
+        else:
+            changed = recreate_qmd_from_formatted_py(
+                qmd_path=qmd_path,
+                py_path=formatted,
+                python_blocks=converter.python_blocks,
+                verbose=verbose,
+            )
+    print(f"{qmd_path}: {'changed' if changed else 'unchanged'}")
+    if verbose:
+        print(f"✓ Successfully formatted {qmd_path}")
+    return 0
+
+
 # =============================================================================
 # Helper functions
 # =============================================================================
@@ -468,9 +1697,348 @@ def temp_py_file(py_file: Path, *, keep: bool) -> Iterator[Path]:
     finally:
         if not keep and py_file.exists():
             try:
-                py_file.unlink()
+                with phase("cleanup"):
+                    py_file.unlink()
             except Exception as e:  # noqa: BLE001
                 print(
                     f"Warning: Could not remove temporary file {py_file}: {e}",
                     file=sys.stderr,
                 )
+
+
+def print_tool_output(
+    result: subprocess.CompletedProcess[str],
+    replacements: dict[str, str],
+) -> tuple[str, str]:
+    """
+    Print a tool's output, with .py file paths replaced by .qmd file paths.
+
+    Parameters
+    ----------
+    result : subprocess.CompletedProcess[str]
+        Completed tool process, with captured text output.
+    replacements : dict[str, str]
+        Mapping from .py file paths to the .qmd file paths to show instead.
+
+    Returns
+    -------
+    tuple[str, str]
+        The rewritten stdout and stderr, as printed.
+    """
+    stdout = rewrite_paths(result.stdout, replacements)
+    stderr = rewrite_paths(result.stderr, replacements)
+    print_output(stdout, stderr)
+    return stdout, stderr
+
+
+def print_output(stdout: str, stderr: str) -> None:
+    """
+    Print a tool's (already rewritten) output.
+
+    Parameters
+    ----------
+    stdout : str
+        Text for standard output.
+    stderr : str
+        Text for standard error.
+    """
+    print(stdout, end="")
+
+    # If there is an error - which will include some linter outputs that get
+    # classed as errors - then also print that
+    if stderr:
+        print(stderr, file=sys.stderr)
+
+
+def can_use_stdin(path: Path) -> bool:
+    """
+    Check whether code for a file can be sent to a tool on standard input.
+
+    Given file paths, tools such as ruff fall back to configuration in the
+    working directory when there is none above the file - but they don't
+    for code on standard input. So only files within the working directory
+    (where both find the same configuration) are sent on standard input.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the file.
+
+    Returns
+    -------
+    bool
+        True if the file is within the working directory.
+    """
+    return path.resolve().is_relative_to(Path.cwd().resolve())
+
+
+def relabel_stdin(text: str, label: str, py_path: Path) -> str:
+    """
+    Replace the name a tool gives to standard input with a .py path.
+
+    The path can then be rewritten to the .qmd path like any other. Only
+    the start of each line is changed (e.g. `stdin:2:1: E225 ...`), so
+    messages which happen to mention the label are left alone.
+
+    Parameters
+    ----------
+    text : str
+        Tool output.
+    label : str
+        Name the tool gives to standard input (e.g. `stdin`).
+    py_path : Path
+        Path of the `.py` file the code would otherwise have been written to.
+
+    Returns
+    -------
+    str
+        Output with each line starting `{label}:` changed to start with the
+        .py path instead.
+    """
+    prefix = f"{label}:"
+    return "".join(
+        f"{py_path}:{line[len(prefix) :]}" if line.startswith(prefix) else line
+        for line in text.splitlines(keepends=True)
+    )
+
+
+def path_replacements(qmd_path: Path, py_path: Path) -> dict[str, str]:
+    """
+    Map the forms a tool might print a .py path in to the .qmd equivalents.
+
+    Tools may report a file as it was passed to them, as an absolute path,
+    relative to the working directory, or by its name alone.
+
+    Parameters
+    ----------
+    qmd_path : Path
+        Path to the source `.qmd` file.
+    py_path : Path
+        Path to the `.py` file generated from `qmd_path`.
+
+    Returns
+    -------
+    dict[str, str]
+        Mapping from each form of the .py path to the matching .qmd path.
+    """
+    replacements = {
+        str(py_path): str(qmd_path),
+        str(py_path.absolute()): str(qmd_path.absolute()),
+        py_path.name: qmd_path.name,
+    }
+    # On Windows, there is no relative path between different drives
+    with suppress(ValueError):
+        replacements[os.path.relpath(py_path)] = os.path.relpath(qmd_path)
+
+    # Tools report files within the working directory relative to it, so a
+    # .py file written outside it (e.g. with --scratch) is shown as its .qmd
+    # file would be, rather than by its full path
+    cwd = Path.cwd()
+    outside = not py_path.absolute().is_relative_to(cwd)
+    if outside and qmd_path.absolute().is_relative_to(cwd):
+        shown = str(qmd_path.absolute().relative_to(cwd))
+        replacements[str(py_path)] = shown
+        replacements[str(py_path.absolute())] = shown
+    return replacements
+
+
+def batch_path_replacements(
+    converted: list[tuple[Path, Path]],
+) -> dict[str, str]:
+    """
+    Combine `path_replacements()` for several converted files.
+
+    Parameters
+    ----------
+    converted : list[tuple[Path, Path]]
+        Pairs of `.qmd` file path and the `.py` file generated from it.
+
+    Returns
+    -------
+    dict[str, str]
+        Mapping from each form of each .py path to the matching .qmd path.
+        Short forms (e.g. basenames) shared by files that map to different
+        .qmd files are left out, as they can't be rewritten reliably.
+    """
+    replacements: dict[str, str] = {}
+    ambiguous: set[str] = set()
+    for qmd_path, py_path in converted:
+        for key, value in path_replacements(qmd_path, py_path).items():
+            if replacements.setdefault(key, value) != value:
+                ambiguous.add(key)
+    for key in ambiguous:
+        del replacements[key]
+    return replacements
+
+
+def search_path_env(
+    converted: Iterable[tuple[Path, Path]],
+) -> dict[str, str] | None:
+    """
+    Return an environment in which imports from each .qmd file's folder work.
+
+    A .py file written away from its .qmd file (e.g. with `--scratch` or
+    `--build`) is no longer next to the modules it imports from that folder.
+    So the folders are added to the front of `PYTHONPATH` (used by pylint,
+    and by the Python that pyright and pyrefly ask for search paths) and
+    `MYPYPATH` (used by mypy).
+
+    Parameters
+    ----------
+    converted : Iterable[tuple[Path, Path]]
+        Pairs of `.qmd` file path and the `.py` file generated from it.
+
+    Returns
+    -------
+    dict[str, str] | None
+        The environment for the tool, or None if every .py file is in its
+        .qmd file's folder (so the tool can inherit the environment as is).
+    """
+    folders: dict[str, None] = {}
+    for qmd_path, py_path in converted:
+        folder = qmd_path.absolute().parent
+        if py_path.absolute().parent != folder:
+            folders[str(folder)] = None
+    if not folders:
+        return None
+
+    env = dict(os.environ)
+    for name in ("PYTHONPATH", "MYPYPATH"):
+        paths = [*folders, *filter(None, [env.get(name)])]
+        env[name] = os.pathsep.join(paths)
+    return env
+
+
+def rewrite_paths(text: str, replacements: dict[str, str]) -> str:
+    """
+    Replace references to generated .py files in tool output.
+
+    Each occurrence of `.py` is checked against the known paths that end
+    there, longest first, so that a full path is preferred over its own
+    basename. Matches must not continue a longer name, so `index.py` does
+    not rewrite `myindex.py`.
+
+    Parameters
+    ----------
+    text : str
+        Tool output to rewrite.
+    replacements : dict[str, str]
+        Mapping from paths ending in `.py` to their replacements.
+
+    Returns
+    -------
+    str
+        Output with every known .py path replaced.
+    """
+    if not text or not replacements:
+        return text
+
+    lengths = sorted({len(key) for key in replacements}, reverse=True)
+    pieces: list[str] = []
+    last = 0
+    pos = text.find(".py")
+    while pos != -1:
+        end = pos + len(".py")
+        for length in lengths:
+            start = end - length
+            if start < last:
+                continue
+            key = text[start:end]
+            if key in replacements and (
+                start == 0 or not _is_name_char(text[start - 1])
+            ):
+                pieces.extend((text[last:start], replacements[key]))
+                last = end
+                break
+        pos = text.find(".py", end)
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def _is_name_char(char: str) -> bool:
+    """
+    Check whether a character can continue a file name.
+
+    Parameters
+    ----------
+    char : str
+        Single character to check.
+
+    Returns
+    -------
+    bool
+        True for letters, digits, underscores, dots and hyphens.
+    """
+    return char.isalnum() or char in "_.-"
+
+
+def chunk_arguments(
+    command: list[str],
+    arguments: list[str],
+    max_length: int | None = None,
+    parts: int = 1,
+) -> Iterator[list[str]]:
+    """
+    Split arguments into chunks that keep each command under the OS limit.
+
+    Parameters
+    ----------
+    command : list[str]
+        Command that each chunk of arguments will be appended to.
+    arguments : list[str]
+        Arguments to split (e.g. file paths).
+    max_length : int | None, optional
+        Maximum length of each full command line. Defaults to the value from
+        `max_command_length()`.
+    parts : int, optional
+        Minimum number of chunks to split the arguments into (if there are
+        enough), so that they can be run in parallel.
+
+    Yields
+    ------
+    list[str]
+        Chunk of `arguments`. A single argument that is too long on its own
+        is still yielded, in a chunk by itself.
+    """
+    if max_length is None:
+        max_length = max_command_length()
+
+    # Largest chunk that still gives the requested number of parts
+    max_count = max(1, -(-len(arguments) // max(1, parts)))
+
+    # Each argument costs its own length plus a separator
+    base_length = sum(len(part) + 1 for part in command)
+    chunk: list[str] = []
+    length = base_length
+    for argument in arguments:
+        if chunk and (
+            length + len(argument) + 1 > max_length or len(chunk) == max_count
+        ):
+            yield chunk
+            chunk = []
+            length = base_length
+        chunk.append(argument)
+        length += len(argument) + 1
+    if chunk:
+        yield chunk
+
+
+def max_command_length() -> int:
+    """
+    Return a safe maximum length for a single command line.
+
+    Returns
+    -------
+    int
+        On Windows, the CreateProcess limit. Elsewhere, half of the space
+        that `ARG_MAX` leaves after the environment, to allow for overheads
+        that aren't counted (such as pointers to each argument).
+    """
+    if sys.platform == "win32":
+        return WINDOWS_MAX_COMMAND_LENGTH
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        return WINDOWS_MAX_COMMAND_LENGTH
+    environ_length = sum(len(k) + len(v) + 2 for k, v in os.environ.items())
+    return max(WINDOWS_MAX_COMMAND_LENGTH, (arg_max - environ_length) // 2)
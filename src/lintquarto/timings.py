@@ -0,0 +1,348 @@
+"""Record how long each phase of a run takes, for each file and tool."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from typing import TextIO
+
+# Recorder for the current run, or None when not recording (so timing a
+# phase costs one check)
+_active: Timings | None = None
+
+# Phases open in each thread, innermost last, which nested phases take
+# their file and tool from
+_open = threading.local()
+
+# Number of files and tools listed in the summary as the slowest
+SLOWEST = 10
+
+
+class Span(NamedTuple):
+    """
+    One timed phase.
+
+    Attributes
+    ----------
+    phase : str
+        Name of the phase, e.g. `convert` or `tool`.
+    start : float
+        Start time, in seconds since the recording started.
+    duration : float
+        Length of the phase, in seconds.
+    file : str | None
+        The `.qmd` file the phase was for, if any.
+    tool : str | None
+        The tool the phase was for, if any.
+    thread : int
+        Identifier of the thread the phase ran in.
+    depth : int
+        Number of phases it ran within (0 for a top-level phase, e.g.
+        `parse` is within `convert`).
+    """
+
+    phase: str
+    start: float
+    duration: float
+    file: str | None
+    tool: str | None
+    thread: int
+    depth: int = 0
+
+
+class Timings:
+    """
+    Collect timed phases from every thread of a run.
+
+    Attributes
+    ----------
+    origin : float
+        `time.perf_counter()` when recording started.
+    spans : list[Span]
+        Every phase recorded so far.
+    elapsed : float | None
+        Length of the recording in seconds, once it has ended.
+    """
+
+    def __init__(self) -> None:
+        """Initialise Timings, starting the clock."""
+        self.origin = time.perf_counter()
+        self.spans: list[Span] = []
+        self.elapsed: float | None = None
+        self._lock = threading.Lock()
+
+    def stop(self) -> None:
+        """Stop the clock, setting `elapsed` (unless already stopped)."""
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.origin
+
+    def add(  # noqa: PLR0913
+        self,
+        phase: str,
+        start: float,
+        end: float,
+        *,
+        file: str | Path | None = None,
+        tool: str | None = None,
+        depth: int = 0,
+    ) -> None:
+        """
+        Record a phase.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        start : float
+            `time.perf_counter()` when the phase started.
+        end : float
+            `time.perf_counter()` when the phase ended.
+        file : str | Path | None, optional
+            The `.qmd` file the phase was for.
+        tool : str | None, optional
+            The tool the phase was for.
+        depth : int, optional
+            Number of phases it ran within.
+        """
+        span = Span(
+            phase=phase,
+            start=start - self.origin,
+            duration=end - start,
+            file=str(file) if file is not None else None,
+            tool=tool,
+            thread=threading.get_ident(),
+            depth=depth,
+        )
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self) -> dict[str, float]:
+        """
+        Return the total time spent in each top-level phase.
+
+        Phases within others (e.g. `parse` within `convert`) are left out,
+        so no time is counted twice.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds for each phase, in the order phases were first seen.
+        """
+        return self._sum(lambda span: span.phase)
+
+    def per_file(self) -> dict[str, float]:
+        """
+        Return the total time spent in top-level phases for each file.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds for each `.qmd` file, in the order files were first seen.
+        """
+        return self._sum(lambda span: span.file)
+
+    def per_tool(self) -> dict[str, float]:
+        """
+        Return the total time spent in top-level phases for each tool.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds for each tool, in the order tools were first seen.
+        """
+        return self._sum(lambda span: span.tool)
+
+    def _sum(self, key: Callable[[Span], str | None]) -> dict[str, float]:
+        """
+        Total the length of top-level phases, grouped by `key`.
+
+        Parameters
+        ----------
+        key : Callable[[Span], str | None]
+            Function giving the group of a phase, or None to leave it out.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds for each group.
+        """
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            name = key(span)
+            if span.depth == 0 and name is not None:
+                totals[name] = totals.get(name, 0.0) + span.duration
+        return totals
+
+    def to_chrome_trace(self) -> dict[str, object]:
+        """
+        Return the phases in Chrome's trace event format.
+
+        Each phase is a complete (`X`) event, with times in microseconds,
+        and its file and tool in `args`. Threads are numbered in the order
+        they were first seen.
+
+        Returns
+        -------
+        dict[str, object]
+            Trace, which can be saved as JSON and opened in Perfetto or
+            chrome://tracing.
+        """
+        pid = os.getpid()
+        threads: dict[int, int] = {}
+        events: list[dict[str, object]] = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            if span.thread not in threads:
+                threads[span.thread] = tid = len(threads) + 1
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": f"thread {tid}"},
+                    }
+                )
+            args = {"file": span.file, "tool": span.tool}
+            events.append(
+                {
+                    "name": span.phase,
+                    "cat": "lintquarto",
+                    "ph": "X",
+                    "ts": round(span.start * 1e6, 3),
+                    "dur": round(span.duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": threads[span.thread],
+                    "args": {k: v for k, v in args.items() if v is not None},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str | Path) -> None:
+        """
+        Save the phases as a Chrome trace.
+
+        Parameters
+        ----------
+        path : str | Path
+            JSON file to write.
+        """
+        import json  # noqa: PLC0415
+
+        Path(path).write_text(
+            json.dumps(self.to_chrome_trace()), encoding="utf-8"
+        )
+
+    def print_summary(self, file: TextIO | None = None) -> None:
+        """
+        Print the time spent in each phase, and the slowest files and tools.
+
+        Parameters
+        ----------
+        file : TextIO | None, optional
+            Stream to print to (default stderr).
+        """
+        file = sys.stderr if file is None else file
+
+        # Phases in the order they started, with those within others
+        # indented below them
+        phases: dict[tuple[int, str], list[float]] = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            phases.setdefault((span.depth, span.phase), []).append(
+                span.duration
+            )
+
+        total = f" in {self.elapsed:.2f} s" if self.elapsed is not None else ""
+        print(f"\nlintquarto timings{total}:", file=file)
+        print(f"{'phase':<16} {'total ms':>10} {'count':>7}", file=file)
+        for (depth, name), durations in phases.items():
+            label = "  " * depth + name
+            print(
+                f"{label:<16} {sum(durations) * 1e3:>10.2f} "
+                f"{len(durations):>7}",
+                file=file,
+            )
+
+        for title, totals in (
+            ("files", self.per_file()),
+            ("tools", self.per_tool()),
+        ):
+            if totals:
+                print(f"\nSlowest {title}:", file=file)
+                slowest = sorted(totals.items(), key=lambda item: -item[1])
+                for name, seconds in slowest[:SLOWEST]:
+                    print(f"  {seconds * 1e3:>10.2f} ms  {name}", file=file)
+
+
+@contextmanager
+def recording() -> Iterator[Timings]:
+    """
+    Record phases until the end of the `with` block.
+
+    Yields
+    ------
+    Timings
+        The recorder, which holds the phases once the block ends.
+    """
+    global _active  # noqa: PLW0603
+    timings = Timings()
+    previous, _active = _active, timings
+    try:
+        yield timings
+    finally:
+        timings.stop()
+        _active = previous
+
+
+@contextmanager
+def phase(
+    name: str,
+    *,
+    file: str | Path | None = None,
+    tool: str | None = None,
+) -> Iterator[None]:
+    """
+    Time the `with` block as a phase, if recording.
+
+    A phase within another (in the same thread) is recorded as nested in
+    it, and is for the same file and tool unless they are given.
+
+    Parameters
+    ----------
+    name : str
+        Name of the phase.
+    file : str | Path | None, optional
+        The `.qmd` file the phase is for.
+    tool : str | None, optional
+        The tool the phase is for.
+
+    Yields
+    ------
+    None
+        Nothing; the block is timed.
+    """
+    recorder = _active
+    if recorder is None:
+        yield
+        return
+    stack = _open.__dict__.setdefault("stack", [])
+    if stack:
+        outer_file, outer_tool = stack[-1]
+        file = outer_file if file is None else file
+        tool = outer_tool if tool is None else tool
+    depth = len(stack)
+    stack.append((file, tool))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        stack.pop()
+        recorder.add(name, start, end, file=file, tool=tool, depth=depth)
@@ -0,0 +1,218 @@
+"""Watch .qmd files, and re-run tools on the ones that change."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .defaults import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL, DEFAULT_RESCAN
+
+if TYPE_CHECKING:
+    import threading
+    from collections.abc import Callable
+
+# A file's state: modification time and size (or None if it has gone)
+FileState = tuple[int, int] | None
+
+# =============================================================================
+# Main function: poll for changes and run tools
+# =============================================================================
+
+
+def watch(  # noqa: PLR0913
+    gather: Callable[[], list[str]],
+    run: Callable[[list[str]], int],
+    *,
+    interval: float = DEFAULT_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    rescan: float = DEFAULT_RESCAN,
+    stop: threading.Event | None = None,
+) -> None:
+    """
+    Run tools on every file, then again on each file that changes.
+
+    The process stays running between runs, so later runs don't pay for
+    starting Python, importing lintquarto or loading the Markdown parser.
+    Files are checked for changes by polling their modification time and
+    size, which works on every platform and file system. Only the files
+    already found are checked on each poll; the search for new (or no
+    longer matching) files is repeated every `rescan` seconds.
+
+    Parameters
+    ----------
+    gather : Callable[[], list[str]]
+        Function returning the `.qmd` files to watch. It is called at the
+        start, then every `rescan` seconds, so that new files are picked up.
+    run : Callable[[list[str]], int]
+        Function that runs the tools on a list of `.qmd` files.
+    interval : float, optional
+        Number of seconds between checks for changes.
+    debounce : float, optional
+        Number of seconds a change must settle before tools are run.
+    rescan : float, optional
+        Number of seconds between searches for new files.
+    stop : threading.Event | None, optional
+        If provided, stop watching once this is set. Otherwise, watch until
+        interrupted (e.g. with Ctrl+C).
+    """
+    try:
+        files = gather()
+        states = snapshot(files)
+        print(f"Watching {len(files)} .qmd file(s) for changes...")
+        run(files)
+        print("Waiting for changes (press Ctrl+C to stop)...")
+
+        searched = time.monotonic()
+        while not _wait(stop, interval):
+            if time.monotonic() - searched >= rescan:
+                files = gather()
+                searched = time.monotonic()
+            current = snapshot(files)
+            if not changed_files(states, current):
+                continue
+
+            # Wait until there have been no changes for `debounce` seconds
+            settled = _settle(files, current, stop, debounce)
+            if settled is None:
+                return
+            changed = changed_files(states, settled)
+            states = settled
+            if not changed:
+                continue
+
+            start = time.perf_counter()
+            print(f"\nChanged: {', '.join(changed)}")
+            run(changed)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Finished in {elapsed:.0f} ms. Waiting for changes...")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+# =============================================================================
+# Helpers which compare the state of files between checks
+# =============================================================================
+
+
+def snapshot(files: list[str]) -> dict[str, FileState]:
+    """
+    Record the modification time and size of each file.
+
+    Parameters
+    ----------
+    files : list[str]
+        Paths to the files.
+
+    Returns
+    -------
+    dict[str, FileState]
+        Mapping from each path to its `(mtime_ns, size)`, or None if the
+        file could not be read.
+    """
+    return {file: _file_state(file) for file in files}
+
+
+def _file_state(file: str) -> FileState:
+    """
+    Return a file's modification time and size.
+
+    Parameters
+    ----------
+    file : str
+        Path to the file.
+
+    Returns
+    -------
+    FileState
+        `(mtime_ns, size)`, or None if the file could not be read.
+    """
+    try:
+        stat = Path(file).stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def changed_files(
+    before: dict[str, FileState],
+    after: dict[str, FileState],
+) -> list[str]:
+    """
+    List files which are new, or have changed, since an earlier snapshot.
+
+    Files which have been removed are not included, as there is nothing to
+    run tools on.
+
+    Parameters
+    ----------
+    before : dict[str, FileState]
+        Earlier snapshot.
+    after : dict[str, FileState]
+        Later snapshot.
+
+    Returns
+    -------
+    list[str]
+        Paths of changed files, in the order of `after`.
+    """
+    return [
+        file
+        for file, state in after.items()
+        if state is not None and before.get(file) != state
+    ]
+
+
+def _settle(
+    files: list[str],
+    current: dict[str, FileState],
+    stop: threading.Event | None,
+    debounce: float,
+) -> dict[str, FileState] | None:
+    """
+    Wait until files stop changing, so quick saves are handled together.
+
+    Parameters
+    ----------
+    files : list[str]
+        Paths to the `.qmd` files being watched.
+    current : dict[str, FileState]
+        Snapshot in which changes were just found.
+    stop : threading.Event | None
+        Event which is set when watching should stop, if any.
+    debounce : float
+        Number of seconds files must stay unchanged.
+
+    Returns
+    -------
+    dict[str, FileState] | None
+        Snapshot once files have settled, or None if asked to stop.
+    """
+    while not _wait(stop, debounce):
+        latest = snapshot(files)
+        if latest == current:
+            return current
+        current = latest
+    return None
+
+
+def _wait(stop: threading.Event | None, seconds: float) -> bool:
+    """
+    Sleep for a number of seconds, returning early if asked to stop.
+
+    Parameters
+    ----------
+    stop : threading.Event | None
+        Event which is set when watching should stop, if any.
+    seconds : float
+        Number of seconds to wait.
+
+    Returns
+    -------
+    bool
+        True if watching should stop.
+    """
+    if stop is None:
+        time.sleep(seconds)
+        return False
+    return stop.wait(seconds)
@@ -2,7 +2,7 @@
 
 import pytest
 
-from lintquarto.args import CustomArgumentParser
+from lintquarto.args import CustomArgumentParser, build_parser
 
 
 def test_error_prints_custom_message_and_exits(capsys):
@@ -87,3 +87,25 @@ def test_error_method_directly(capsys):
 
     # Confirm the help text is in stdout
     assert "usage: prog" in captured.out
+
+
+def test_watch_accepts_options_before_and_after():
+    """Options can be given before or after the watch subcommand."""
+    args = build_parser().parse_args(
+        ["-v", "-j", "2", "watch", "-l", "ruff", "-p", "a.qmd", "-c", "x"]
+    )
+    assert args.command == "watch"
+    assert args.verbose is True
+    assert args.jobs == 2
+    assert args.linters == ["ruff"]
+    assert args.paths == ["a.qmd"]
+    assert args.custom_commands == ["x"]
+    assert args.exclude == []
+    assert args.interval > 0
+
+
+def test_watch_rejects_non_positive_interval(capsys):
+    """The watch interval must be above zero."""
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["watch", "--interval", "0"])
+    assert "expected a number above 0" in capsys.readouterr().err
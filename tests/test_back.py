@@ -181,6 +181,7 @@ def test_back_contains(case):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "-l",
             case["linter"],
             "-p",
@@ -218,6 +219,7 @@ def test_back_file_type(case):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "-l",
             case["linter"],
             "-p",
@@ -41,7 +41,10 @@ FORMATTER_CASES = [
     FORMATTER_CASES,
     ids=[case["formatter"] for case in FORMATTER_CASES],
 )
-def test_formatter_rewrites_expected_content(tmp_path, case):
+# Within the working directory, code is sent to the formatter on stdin, and
+# otherwise is written to a temporary .py file
+@pytest.mark.parametrize("in_cwd", [False, True], ids=["file", "stdin"])
+def test_formatter_rewrites_expected_content(tmp_path, case, in_cwd):
     """Back test checking formatter rewrites QMD as expected."""
     skip_if_linter_unexpected("ruff")
 
@@ -49,6 +52,10 @@ def test_formatter_rewrites_expected_content(tmp_path, case):
     src_qmd = test_dir / "examples" / case["input"]
     work_qmd = tmp_path / case["input"]
     shutil.copy(src_qmd, work_qmd)
+    if in_cwd:
+        # Match the line length from this repository's configuration, which
+        # ruff falls back to when run from here
+        (tmp_path / "ruff.toml").write_text("line-length = 79\n")
 
     result = subprocess.run(
         [
@@ -63,6 +70,7 @@ def test_formatter_rewrites_expected_content(tmp_path, case):
         capture_output=True,
         text=True,
         check=False,
+        cwd=tmp_path if in_cwd else None,
     )
 
     assert result.returncode == 0, (
@@ -86,3 +94,189 @@ def test_formatter_rewrites_expected_content(tmp_path, case):
             f"{case['formatter']}.\n"
             f"Full file:\n{output_text}"
         )
+
+
+@pytest.mark.parametrize("formatter", ["ruff-format", "ruff-check-fix"])
+def test_formatter_leaves_unchanged_file_alone(tmp_path, formatter):
+    """Files the formatter doesn't change aren't rewritten."""
+    skip_if_linter_unexpected("ruff")
+
+    work_qmd = tmp_path / "doc.qmd"
+    work_qmd.write_text(
+        "# Title\n\n```{python}\nx = 1\n```\n\nText.\n", encoding="utf-8"
+    )
+
+    def run():
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-f",
+                formatter,
+                "-p",
+                work_qmd,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    before = work_qmd.stat().st_mtime_ns
+    result = run()
+    assert result.returncode == 0, result.stderr
+    assert f"{work_qmd}: unchanged" in result.stdout
+    assert work_qmd.stat().st_mtime_ns == before
+
+    # Once something needs formatting, the file is rewritten
+    # (ruff format adds spaces, and ruff check --fix removes the import)
+    unformatted = "```{python}\nimport os\nx=1\n```\n"
+    work_qmd.write_text(unformatted, encoding="utf-8")
+    result = run()
+    assert f"{work_qmd}: changed" in result.stdout
+    assert work_qmd.read_text(encoding="utf-8") != unformatted
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_formatter_batch(tmp_path, jobs):
+    """One formatter run rewrites each file it changed, and only those."""
+    skip_if_linter_unexpected("ruff")
+
+    unformatted = tmp_path / "unformatted.qmd"
+    unformatted.write_text("```{python}\nx=1\n```\n", encoding="utf-8")
+    formatted = tmp_path / "formatted.qmd"
+    formatted.write_text("```{python}\ny = 2\n```\n", encoding="utf-8")
+    broken = tmp_path / "broken.qmd"
+    broken_text = "```{python}\ndef (:\nz=3\n```\n"
+    broken.write_text(broken_text, encoding="utf-8")
+    before = formatted.stat().st_mtime_ns
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "-f",
+            "ruff-format",
+            "-p",
+            tmp_path,
+            "--batch",
+            "-j",
+            jobs,
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    # ruff reports the syntax error against the .qmd file, and fails
+    assert result.returncode != 0
+    assert "broken.qmd" in result.stderr
+    assert ".py" not in result.stderr
+
+    # The other files are still formatted, or left alone
+    assert unformatted.read_text(encoding="utf-8") == (
+        "```{python}\nx = 1\n```\n"
+    )
+    assert f"{unformatted}: changed" in result.stdout
+    assert f"{formatted}: unchanged" in result.stdout
+    assert formatted.stat().st_mtime_ns == before
+    assert broken.read_text(encoding="utf-8") == broken_text
+    assert f"{broken}: unchanged" in result.stdout
+
+    # No temporary files are left behind
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "broken.qmd",
+        "formatted.qmd",
+        "unformatted.qmd",
+    ]
+
+
+@pytest.mark.parametrize("mode", ["file", "stdin", "batch"])
+def test_formatter_chain_rewrites_once(tmp_path, mode):
+    """Chained formatters give the same code, with one rewrite per file."""
+    skip_if_linter_unexpected("ruff")
+
+    work_qmd = tmp_path / "doc.qmd"
+    work_qmd.write_text(
+        "```{python}\nimport os\nx=1\ndef f( a ):\n  return a\n```\n",
+        encoding="utf-8",
+    )
+    if mode == "stdin":
+        (tmp_path / "ruff.toml").write_text("line-length = 79\n")
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "-f",
+            "ruff-check-fix",
+            "ruff-format",
+            "-p",
+            work_qmd,
+            *(["--batch"] if mode == "batch" else []),
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+        cwd=tmp_path if mode == "stdin" else None,
+    )
+    assert result.returncode == 0, result.stderr
+
+    # ruff check --fix removes the import, then ruff format adds spaces
+    assert work_qmd.read_text(encoding="utf-8") == (
+        "```{python}\nx = 1\n\n\ndef f(a):\n    return a\n```\n"
+    )
+    assert result.stdout.count("Running ruff-check-fix, ruff-format") == 1
+    assert result.stdout.count(f"{work_qmd}: changed") == 1
+
+
+@pytest.mark.parametrize("option", ["--check", "--diff"])
+@pytest.mark.parametrize("mode", ["file", "stdin", "batch"])
+def test_formatter_check_never_writes(tmp_path, option, mode):
+    """--check and --diff report files that would change, without writing."""
+    skip_if_linter_unexpected("ruff")
+
+    unformatted = tmp_path / "unformatted.qmd"
+    unformatted_text = "# Title\n\n```{python}\nx=1\n```\n"
+    unformatted.write_text(unformatted_text, encoding="utf-8")
+    formatted = tmp_path / "formatted.qmd"
+    formatted.write_text("```{python}\ny = 2\n```\n", encoding="utf-8")
+    if mode == "stdin":
+        (tmp_path / "ruff.toml").write_text("line-length = 79\n")
+    before = unformatted.stat().st_mtime_ns
+
+    def run(*paths):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-f",
+                "ruff-format",
+                "-p",
+                *paths,
+                option,
+                *(["--batch"] if mode == "batch" else []),
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=tmp_path if mode == "stdin" else None,
+        )
+
+    result = run(unformatted, formatted)
+    assert result.returncode == 1, result.stderr
+    assert f"{unformatted}: would change" in result.stdout
+    assert f"{formatted}: unchanged" in result.stdout
+    assert unformatted.read_text(encoding="utf-8") == unformatted_text
+    assert unformatted.stat().st_mtime_ns == before
+
+    # Only --diff prints the changes, against the .qmd file
+    diff = f"--- {unformatted}\n+++ {unformatted}\n@@ -1,5 +1,5 @@\n"
+    assert (diff in result.stdout) == (option == "--diff")
+    assert ("-x=1\n+x = 1\n" in result.stdout) == (option == "--diff")
+
+    # Files that are already formatted pass
+    assert run(formatted).returncode == 0
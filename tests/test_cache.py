@@ -0,0 +1,181 @@
+"""Tests for the ConversionCache class."""
+
+import threading
+
+import pytest
+
+from lintquarto.convert.build import BuildDir
+from lintquarto.convert.cache import ConversionCache
+from lintquarto.runner import ToolRunner
+
+QMD = """---
+title: Example
+---
+
+```{python}
+x = 1
+```
+"""
+
+
+def test_same_settings_share_one_file(tmp_path):
+    """Tools with the same conversion settings share a converted file."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    mypy_file = cache.get(qmd, "mypy")
+    assert cache.get(qmd, "pylint") == mypy_file
+    assert cache.get(qmd, "custom") == mypy_file
+    assert cache.py_files == [mypy_file]
+    assert mypy_file.read_text(encoding="utf-8").count("\n") == len(
+        QMD.splitlines()
+    )
+
+
+def test_different_settings_get_own_file(tmp_path):
+    """Tools with other conversion settings get separate files."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    mypy_file = cache.get(qmd, "mypy")
+    radon_file = cache.get(qmd, "radon-raw")
+    assert radon_file != mypy_file
+    assert len(cache.py_files) == 2
+
+
+def test_lines_are_not_written(tmp_path):
+    """lines() builds the Python view in memory, and get() then reuses it."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    lines = cache.lines(qmd, "mypy")
+    assert len(lines) == len(QMD.splitlines())
+    assert cache.py_files == []
+    assert not (tmp_path / "doc.py").exists()
+
+    py_file = cache.get(qmd, "pylint")
+    assert py_file.read_text(encoding="utf-8").splitlines() == lines
+
+
+def test_concurrent_requests_convert_once(tmp_path):
+    """Threads asking for the same file at once all get the same file."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(qmd, "mypy")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    assert len(cache.py_files) == 1
+
+
+def test_cleanup_removes_files(tmp_path):
+    """cleanup() removes every converted file."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    py_files = [cache.get(qmd, "mypy"), cache.get(qmd, "radon-raw")]
+    cache.cleanup()
+    assert not any(py_file.exists() for py_file in py_files)
+    assert cache.py_files == []
+
+
+def test_release_after_last_expected_tool(tmp_path):
+    """Each output is removed once the last tool needing it releases it."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+    cache.expect(["mypy", "radon-raw", "custom"])
+
+    mypy_file = cache.get(qmd, "mypy")
+    radon_file = cache.get(qmd, "radon-raw")
+    cache.release(qmd, "mypy")
+    assert mypy_file.exists()
+
+    # radon-raw's output isn't shared, so goes straight away
+    cache.release(qmd, "radon-raw")
+    assert not radon_file.exists()
+    assert cache.py_files == [mypy_file]
+
+    # The custom command shares mypy's file, and is the last to use it
+    assert cache.get(qmd, "custom") == mypy_file
+    cache.release(qmd, "custom")
+    assert not mypy_file.exists()
+    assert cache.py_files == []
+    assert not cache._parsed
+    assert not cache._built
+
+
+def test_release_does_nothing_unless_expected(tmp_path):
+    """Without expect(), files are kept until cleanup()."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    cache = ConversionCache(lint_non_exec=False, verbose=False)
+
+    py_file = cache.get(qmd, "mypy")
+    cache.release(qmd, "mypy")
+    assert py_file.exists()
+    cache.cleanup()
+    assert not py_file.exists()
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_tool_runner_removes_shared_files(tmp_path, batch):
+    """ToolRunner removes the shared files once used, unless keeping them."""
+    qmd = tmp_path / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+
+    with ToolRunner(
+        [str(qmd)],
+        keep_temp=False,
+        verbose=False,
+        lint_non_exec=False,
+        batch=batch,
+    ) as runner:
+        runner.run_checks(["pyflakes", "vulture"], [])
+        # Removed once both linters are done, before the runner closes
+        assert not (tmp_path / "doc.py").exists()
+        assert runner.conversions.py_files == []
+
+    with ToolRunner(
+        [str(qmd)], keep_temp=True, verbose=False, lint_non_exec=False
+    ) as runner:
+        runner.run_checks(["pyflakes", "vulture"], [])
+    assert (tmp_path / "doc.py").exists()
+
+
+def test_build_files_are_stable_and_kept(tmp_path, monkeypatch):
+    """With a build folder, each setting has a fixed file, kept on cleanup."""
+    monkeypatch.chdir(tmp_path)
+    qmd = tmp_path / "docs" / "doc.qmd"
+    qmd.parent.mkdir()
+    qmd.write_text(QMD, encoding="utf-8")
+    build = BuildDir(tmp_path / "build")
+
+    cache = ConversionCache(lint_non_exec=False, verbose=False, build=build)
+    mypy_file = cache.get(qmd, "mypy")
+    radon_file = cache.get(qmd, "radon-raw")
+    assert mypy_file == tmp_path / "build" / "lint" / "docs" / "doc.py"
+    assert radon_file == (
+        tmp_path / "build" / "lint-compact" / "docs" / "doc.py"
+    )
+    cache.cleanup()
+    assert mypy_file.exists()
+    assert radon_file.exists()
+
+    # A later run gets the same file, without rewriting it
+    assert not build.write(qmd, "lint", mypy_file.read_text())
+    cache = ConversionCache(lint_non_exec=False, verbose=False, build=build)
+    assert cache.get(qmd, "pylint") == mypy_file
@@ -1,5 +1,7 @@
 """Tests for the cli module."""
 
+import json
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -7,6 +9,7 @@ from unittest.mock import patch
 
 import pytest
 
+from lintquarto.bench import noop_command
 from lintquarto.main import main
 
 CORE_LINTER = "flake8"
@@ -25,6 +28,7 @@ def test_main_runs_functional(tmp_path):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "-l",
             CORE_LINTER,
             "-p",
@@ -71,7 +75,16 @@ def test_decorator():
     # Normally, flake8 would raise E302 ("expected 2 blank lines before
     # function definition"), but lintquarto should suppress this warning
     result = subprocess.run(
-        [sys.executable, "-m", "lintquarto", "-l", "flake8", "-p", qmd_path],
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "--no-cache",
+            "-l",
+            "flake8",
+            "-p",
+            qmd_path,
+        ],
         capture_output=True,
         text=True,
         check=False,
@@ -90,7 +103,16 @@ def test_eval_false():
 
     # Run lintquarto with flake8 on the example file.
     result = subprocess.run(
-        [sys.executable, "-m", "lintquarto", "-l", "flake8", "-p", qmd_path],
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "--no-cache",
+            "-l",
+            "flake8",
+            "-p",
+            qmd_path,
+        ],
         capture_output=True,
         text=True,
         check=False,
@@ -178,6 +200,7 @@ def test_cli_runs_linter_and_custom_command(tmp_path):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "--paths",
             str(qmd_file),
             "--linters",
@@ -240,3 +263,448 @@ def test_cli_runs_multiple_custom_commands(tmp_path):
     assert result.returncode == 0
     assert "CUSTOM1" in output
     assert "CUSTOM2" in output
+
+
+def test_cli_batch(tmp_path):
+    """Run a linter once across several files with --batch."""
+    for name in ("one", "two"):
+        (tmp_path / f"{name}.qmd").write_text(
+            "```{python}\nimport os\n```\n",
+            encoding="utf-8",
+        )
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "-l",
+            CORE_LINTER,
+            "-p",
+            str(tmp_path),
+            "--batch",
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 0
+    assert "one.qmd:2:1: F401" in result.stdout
+    assert "two.qmd:2:1: F401" in result.stdout
+    assert not any(tmp_path.glob("*.py"))
+
+
+def test_cli_jobs_keeps_file_order(tmp_path):
+    """With --jobs, output for each file is printed in the gathered order."""
+    names = [f"file{i}" for i in range(6)]
+    for name in names:
+        (tmp_path / f"{name}.qmd").write_text(
+            "```{python}\nimport os\n```\n",
+            encoding="utf-8",
+        )
+
+    def run(*extra):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "--no-cache",
+                "-l",
+                CORE_LINTER,
+                "-p",
+                str(tmp_path),
+                *extra,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    serial = run()
+    parallel = run("--jobs", "4")
+
+    assert parallel.returncode == serial.returncode == 0
+    assert parallel.stdout == serial.stdout
+    for name in names:
+        assert f"{name}.qmd:2:1: F401" in parallel.stdout
+
+
+def test_cli_jobs_rejects_negative(monkeypatch):
+    """A negative number of jobs is a usage error."""
+    monkeypatch.setattr(
+        sys, "argv", ["lintquarto", "-l", CORE_LINTER, "-p", ".", "-j", "-1"]
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+
+
+def test_cli_jobs_runs_linters_concurrently(tmp_path):
+    """With --jobs, each linter's output matches a serial run, in order."""
+    for name in ("one", "two"):
+        (tmp_path / f"{name}.qmd").write_text(
+            "```{python}\nimport os\n```\n",
+            encoding="utf-8",
+        )
+
+    def run(*extra):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "--no-cache",
+                "-l",
+                "flake8",
+                "ruff",
+                "pyflakes",
+                "-p",
+                str(tmp_path),
+                *extra,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    serial = run()
+    parallel = run("-j", "4")
+
+    assert parallel.returncode == serial.returncode == 0
+    assert parallel.stdout == serial.stdout
+    headers = [
+        line for line in parallel.stdout.splitlines() if "Running" in line
+    ]
+    assert headers == [
+        "Running flake8...",
+        "Running ruff...",
+        "Running pyflakes...",
+    ]
+    assert not any(tmp_path.glob("*.py"))
+
+
+def test_cli_result_cache(tmp_path):
+    """Results are saved and replayed, unless --no-cache is used."""
+    (tmp_path / "doc.qmd").write_text(
+        "```{python}\nimport os\n```\n", encoding="utf-8"
+    )
+
+    def run(*extra):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-l",
+                CORE_LINTER,
+                "-p",
+                "doc.qmd",
+                *extra,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=tmp_path,
+        )
+
+    uncached = run("--no-cache")
+    assert not (tmp_path / ".lintquarto_cache").exists()
+
+    first = run()
+    assert list((tmp_path / ".lintquarto_cache").glob("*.json"))
+    second = run("--verbose")
+
+    assert first.stdout == uncached.stdout
+    assert "doc.qmd:2:1: F401" in second.stdout
+    assert f"Using cached {CORE_LINTER} result for" in second.stdout
+
+
+def test_cli_scratch(tmp_path):
+    """With --scratch-dir, .py files are written there, mirroring the .qmd."""
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "doc.qmd").write_text(
+        "```{python}\nimport os\n```\n", encoding="utf-8"
+    )
+
+    def run(*extra):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-l",
+                "vulture",
+                "-p",
+                "docs",
+                "--no-cache",
+                "--scratch-dir",
+                "scratch",
+                *extra,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=tmp_path,
+        )
+
+    # Diagnostics still refer to the .qmd file, and the folder is removed
+    result = run()
+    assert "doc.qmd:2: unused import 'os'" in result.stdout
+    assert not list((tmp_path / "scratch").iterdir())
+    assert not (tmp_path / "docs" / "doc.py").exists()
+
+    # With --keep-temp, the folder is kept (and its location printed)
+    result = run("--keep-temp")
+    (run_dir,) = (tmp_path / "scratch").iterdir()
+    assert (run_dir / "docs" / "doc.py").exists()
+    assert f"Kept temporary .py files in {run_dir}" in result.stdout
+
+
+def test_cli_build(tmp_path):
+    """With --build, .py files are kept and only rewritten when changed."""
+    qmd = tmp_path / "docs" / "doc.qmd"
+    qmd.parent.mkdir()
+    qmd.write_text("```{python}\nimport os\n```\n", encoding="utf-8")
+
+    def run():
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-l",
+                "vulture",
+                "-p",
+                "docs",
+                "--no-cache",
+                "--build",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=tmp_path,
+        )
+
+    # Diagnostics still refer to the .qmd file, and the .py file is kept
+    result = run()
+    assert "doc.qmd:2: unused import 'os'" in result.stdout
+    py_file = tmp_path / ".lintquarto" / "build" / "lint" / "docs" / "doc.py"
+    assert "import os" in py_file.read_text()
+    assert not (tmp_path / "docs" / "doc.py").exists()
+
+    # The same file is reused, and left alone if nothing changed
+    os.utime(py_file, ns=(0, 0))
+    run()
+    assert py_file.stat().st_mtime_ns == 0
+    qmd.write_text("```{python}\nimport re\n```\n", encoding="utf-8")
+    assert "unused import 're'" in run().stdout
+    assert "import re" in py_file.read_text()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--scratch-dir", "../scratch"],
+        ["--scratch-dir", "../scratch", "--batch"],
+        ["--build"],
+        ["--build", "--batch"],
+    ],
+)
+def test_cli_sibling_imports(tmp_path, options):
+    """Modules next to the .qmd file are found, wherever the .py file is."""
+    project = tmp_path / "project"
+    (project / "docs").mkdir(parents=True)
+    (project / "docs" / "helpers.py").write_text(
+        "def f() -> int:\n    return 1\n", encoding="utf-8"
+    )
+    (project / "docs" / "page.qmd").write_text(
+        "```{python}\nfrom helpers import f\nx: str = f()\n```\n",
+        encoding="utf-8",
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "-l",
+            "mypy",
+            "-p",
+            "docs",
+            "--no-cache",
+            *options,
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+        cwd=project,
+    )
+
+    # The real error is reported (not a missing import), labelled as it
+    # would be for a .py file next to the .qmd file
+    assert "import-not-found" not in result.stdout
+    assert f"{Path('docs') / 'page.qmd'}:3: error" in result.stdout
+    assert "[assignment]" in result.stdout
+
+
+def test_cli_changed_since(tmp_path):
+    """Only files changed since a git reference are linted."""
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+
+    def run(*extra):
+        return subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "lintquarto",
+                "-l",
+                CORE_LINTER,
+                "-p",
+                ".",
+                "--no-cache",
+                *extra,
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=tmp_path,
+        )
+
+    git("init", "-q")
+    for name in ("old", "new"):
+        (tmp_path / f"{name}.qmd").write_text(
+            "```{python}\nimport os\n```\n", encoding="utf-8"
+        )
+    git("add", "old.qmd")
+    git("commit", "-q", "-m", "first")
+
+    result = run("--changed-since", "HEAD")
+    assert result.returncode == 0
+    assert "new.qmd:2:1: F401" in result.stdout
+    assert "old.qmd" not in result.stdout
+
+    # Nothing staged, so nothing to do
+    result = run("--staged")
+    assert result.returncode == 0
+    assert "No changed .qmd files found" in result.stdout
+
+
+def test_cli_watch_rejects_formatters(tmp_path):
+    """Formatters can't be watched, as they rewrite the watched files."""
+    (tmp_path / "doc.qmd").write_text("```{python}\nx = 1\n```\n")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "watch",
+            "-f",
+            "ruff-format",
+            "-p",
+            str(tmp_path),
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 2
+    assert "formatters can't be used with watch" in result.stderr
+
+
+def test_cli_check_requires_formatters(monkeypatch):
+    """--check only applies to formatters, so is a usage error without."""
+    monkeypatch.setattr(
+        sys, "argv", ["lintquarto", "-l", CORE_LINTER, "-p", ".", "--check"]
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 2
+
+
+def test_cli_bench(tmp_path, monkeypatch, capsys):
+    """The bench command times each phase, and checks the budget."""
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.qmd").write_text("```{python}\nx = 1\n```\n")
+    results = tmp_path / "bench.json"
+    monkeypatch.chdir(tmp_path)
+    args = ["lintquarto", "bench", "-p", ".", "--repeat", "2"]
+
+    monkeypatch.setattr(sys, "argv", [*args, "--json", str(results)])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+    output = capsys.readouterr().out
+    assert "2 file(s), fastest of 2 run(s)" in output
+    summary = json.loads(results.read_text())
+    assert summary["files"] == 2
+    for name in ("config", "gather", "convert", "write", "tool", "rewrite"):
+        assert summary["phases"][name] > 0
+    assert not list(tmp_path.glob("*.py"))
+
+    assert summary["tools"] == [noop_command()[0]]
+
+    # Chosen linters take their usual path, running the command in their
+    # place (so needn't be installed)
+    monkeypatch.setattr(
+        sys, "argv", [*args, "-l", "ruff", "mypy", "--json", str(results)]
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+    assert "in place of: ruff, mypy" in capsys.readouterr().out
+    assert json.loads(results.read_text())["tools"] == ["ruff", "mypy"]
+
+    monkeypatch.setattr(sys, "argv", [*args, "--budget", "0.001"])
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+    assert "over the budget of 0.001 ms" in capsys.readouterr().err
+
+
+def test_cli_timings(tmp_path, monkeypatch, capsys):
+    """Phases for each file and tool are summarised, and saved as a trace."""
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.qmd").write_text("```{python}\nx = 1\n```\n")
+    trace = tmp_path / "trace.json"
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "lintquarto",
+            "-l",
+            "pyflakes",
+            "-p",
+            ".",
+            "--no-cache",
+            "--timings",
+            "--trace",
+            str(trace),
+        ],
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+
+    summary = capsys.readouterr().err
+    assert "lintquarto timings in" in summary
+    assert "  parse" in summary
+    assert "Slowest files:" in summary
+    assert "Slowest tools:" in summary
+
+    events = json.loads(trace.read_text())["traceEvents"]
+    phases = {event["name"] for event in events if event["ph"] == "X"}
+    assert {"config", "gather", "convert", "parse", "tool"} <= phases
+    assert any(
+        event["args"] == {"file": str(tmp_path / "a.qmd"), "tool": "pyflakes"}
+        for event in events
+        if event["name"] == "tool"
+    )
@@ -94,6 +94,15 @@ def test_load_config_full_section(tmp_path: Path) -> None:
         "lint-non-exec = true\n"
         "verbose = true\n"
         "keep-temp = true\n"
+        "batch = true\n"
+        "jobs = 4\n"
+        "no-cache = true\n"
+        "scratch = true\n"
+        'scratch-dir = "build/scratch"\n'
+        "build = true\n"
+        'build-dir = "build/py"\n'
+        "respect-gitignore = true\n"
+        "respect-quarto-render = true\n"
         'custom-commands = ["mytool --flag"]\n',
     )
 
@@ -104,6 +113,15 @@ def test_load_config_full_section(tmp_path: Path) -> None:
     assert cfg.lint_non_exec is True
     assert cfg.verbose is True
     assert cfg.keep_temp is True
+    assert cfg.batch is True
+    assert cfg.jobs == 4
+    assert cfg.no_cache is True
+    assert cfg.scratch is True
+    assert cfg.scratch_dir == "build/scratch"
+    assert cfg.build is True
+    assert cfg.build_dir == "build/py"
+    assert cfg.respect_gitignore is True
+    assert cfg.respect_quarto_render is True
     assert cfg.custom_commands == ["mytool --flag"]
     assert cfg.config_path == tmp_path / "pyproject.toml"
 
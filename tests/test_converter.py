@@ -1,5 +1,6 @@
 """Unit tests for the converter module."""
 
+import threading
 from pathlib import Path
 from unittest import mock
 
@@ -7,11 +8,17 @@ import pytest
 import tree_sitter_markdown as tsmd
 from tree_sitter import Language, Parser
 
-from lintquarto.convert.analyse_python import parse_chunk_eval
+from lintquarto.convert.analyse_python import get_rows, parse_chunk_eval
 from lintquarto.convert.converter import (
     QmdToPyConverter,
     convert_qmd_to_py,
+    get_parser,
     get_unique_filename,
+    parse_qmd,
+)
+from lintquarto.convert.filename import (
+    module_safe_stem,
+    reserve_unique_filename,
 )
 from lintquarto.convert.parse_yaml import (
     find_metadata_node,
@@ -420,6 +427,47 @@ def test_get_unique_filename(tmp_path):
     assert unique.suffix == ".py"
 
 
+def test_reserve_unique_filename(tmp_path):
+    """Each reservation creates a different file."""
+    file = tmp_path / "test.py"
+    first = reserve_unique_filename(file)
+    second = reserve_unique_filename(file)
+
+    assert first == file
+    assert second.name == "test_1.py"
+    assert first.exists()
+    assert second.exists()
+
+
+def test_module_safe_stem(tmp_path):
+    """Stems are identifiers, unique per folder, and the same on each call."""
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = module_safe_stem(tmp_path / "a" / "index.qmd")
+    second = module_safe_stem(tmp_path / "b" / "index.qmd")
+
+    assert first.startswith("index__")
+    assert first != second
+    assert first == module_safe_stem(tmp_path / "a" / "index.qmd")
+    assert module_safe_stem(tmp_path / "01-my intro.qmd").isidentifier()
+
+
+def test_get_parser_reused_per_thread():
+    """The parser is created once per thread, then reused."""
+    parser = get_parser()
+    assert get_parser() is parser
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_parser()))
+    thread.start()
+    thread.join()
+    assert other[0] is not parser
+
+    # The reused parser still parses each document afresh
+    tree = parser.parse(b"```{python}\nx = 1\n```\n")
+    assert tree.root_node.text == b"```{python}\nx = 1\n```\n"
+
+
 @pytest.mark.parametrize("linter", PRESERVE_LINTERS)
 def test_output_file_overwrite(tmp_path, linter):
     """Uses a unique filename if output file exists."""
@@ -678,6 +726,30 @@ def test_parse_chunk_eval(line, expected):
     assert parse_chunk_eval(option_text, current_eval=None) is expected
 
 
+def test_get_rows_slices_line_table():
+    """Unit: get_rows returns rows from the line table, clamped to its end."""
+    lines = ["a", "b", "c"]
+    assert get_rows(lines, 1, 1) == [(1, "b")]
+    assert get_rows(lines, 1, 10) == [(1, "b"), (2, "c")]
+
+
+def test_parse_qmd_builds_line_table_once():
+    """Unit: The document is decoded once, and its lines shared by blocks."""
+    qmd_lines = ["# Title\n", "```{python}\n", "x = 1\n", "```"]
+    parsed = parse_qmd(qmd_lines)
+    assert parsed.lines == ["# Title", "```{python}", "x = 1", "```"]
+    assert parsed.python_blocks[0]["first_code_row"] == 2
+
+    # Builders only read the line table
+    parsed.src_bytes = b""
+    assert QmdToPyConverter("pylint").build(parsed) == [
+        "# -",
+        "# %% [python]",
+        "x = 1",
+        "# -",
+    ]
+
+
 def test_parse_chunk_eval_preserves_current_when_no_eval_key():
     """Unit: Leaves current value unchanged if no eval key."""
     assert (
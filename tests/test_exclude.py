@@ -0,0 +1,114 @@
+"""Tests for the exclude module."""
+
+import pytest
+
+from lintquarto.exclude import (
+    ExcludeMatcher,
+    PatternSet,
+    is_pattern,
+    pattern_to_regex,
+    quarto_render_excludes,
+)
+
+
+@pytest.mark.parametrize(
+    ("pattern", "relative", "is_dir", "expected"),
+    [
+        # Patterns without a slash match at any depth
+        ("*_scratch.qmd", "a_scratch.qmd", False, True),
+        ("*_scratch.qmd", "docs/a_scratch.qmd", False, True),
+        ("*_scratch.qmd", "docs/a.qmd", False, None),
+        # "*" and "?" don't match the folder separator
+        ("docs/*.qmd", "docs/a.qmd", False, True),
+        ("docs/*.qmd", "docs/sub/a.qmd", False, None),
+        ("doc?/a.qmd", "docs/a.qmd", False, True),
+        # Patterns with a slash are relative to their folder
+        ("/index.qmd", "index.qmd", False, True),
+        ("/index.qmd", "docs/index.qmd", False, None),
+        # "**" matches any number of folders
+        ("**/drafts/**", "drafts/a.qmd", False, True),
+        ("**/drafts/**", "docs/drafts/sub/a.qmd", False, True),
+        ("docs/**/a.qmd", "docs/a.qmd", False, True),
+        ("docs/**/a.qmd", "docs/x/y/a.qmd", False, True),
+        # A trailing slash only matches folders
+        ("build/", "build", True, True),
+        ("build/", "build", False, None),
+        # Character classes, including negated ones
+        ("[ab].qmd", "a.qmd", False, True),
+        ("[!ab].qmd", "a.qmd", False, None),
+        ("[!ab].qmd", "c.qmd", False, True),
+        # Escaped wildcards are literal
+        ("\\*.qmd", "*.qmd", False, True),
+        ("\\*.qmd", "a.qmd", False, None),
+    ],
+)
+def test_pattern_set_match(pattern, relative, is_dir, expected):
+    """Patterns follow .gitignore rules."""
+    assert PatternSet([pattern]).match(relative, is_dir=is_dir) is expected
+
+
+def test_pattern_set_last_match_wins():
+    """Later patterns (including `!` ones) take precedence."""
+    patterns = PatternSet(["*.qmd", "!keep.qmd", "# comment", ""])
+    assert patterns.match("a.qmd", is_dir=False) is True
+    assert patterns.match("keep.qmd", is_dir=False) is False
+    assert patterns.match("a.py", is_dir=False) is None
+    assert PatternSet(["!keep.qmd", "*.qmd"]).match("keep.qmd", is_dir=False)
+
+
+def test_pattern_to_regex_skips_blank_and_comments():
+    """Blank lines and comments aren't patterns, but escaped `#` is."""
+    assert pattern_to_regex("") is None
+    assert pattern_to_regex("   ") is None
+    assert pattern_to_regex("# note") is None
+    assert pattern_to_regex("\\#file.qmd") is not None
+    assert not PatternSet(["", "# note"])
+
+
+def test_is_pattern():
+    """Only entries with wildcards, or starting with `!`, are patterns."""
+    assert is_pattern("**/drafts/**")
+    assert is_pattern("!keep.qmd")
+    assert is_pattern("file?.qmd")
+    assert not is_pattern("docs/drafts")
+
+
+def test_matcher_paths_and_patterns(tmp_path):
+    """Literal paths exclude everything within; patterns are relative."""
+    matcher = ExcludeMatcher(
+        ["skip", "*_scratch.qmd", "./top.qmd"], base_dir=tmp_path
+    )
+    assert matcher.is_excluded(tmp_path / "skip" / "a.qmd")
+    assert matcher.is_excluded(tmp_path / "docs" / "a_scratch.qmd")
+    assert matcher.is_excluded(tmp_path / "top.qmd")
+    assert not matcher.is_excluded(tmp_path / "docs" / "top.qmd")
+    assert not matcher.is_excluded(tmp_path / "docs" / "a.qmd")
+
+
+def test_matcher_gitignore_needs_repo(tmp_path):
+    """`.gitignore` files only apply within a git repository."""
+    (tmp_path / ".gitignore").write_text("ignored.qmd\n")
+    matcher = ExcludeMatcher(gitignore=True)
+    assert not matcher.is_excluded(tmp_path / "ignored.qmd")
+
+    (tmp_path / ".git").mkdir()
+    matcher = ExcludeMatcher(gitignore=True)
+    assert matcher.is_excluded(tmp_path / "ignored.qmd")
+    assert not ExcludeMatcher().is_excluded(tmp_path / "ignored.qmd")
+
+
+def test_quarto_render_excludes(tmp_path):
+    """Only `!` entries under `project: render:` are read."""
+    config = tmp_path / "_quarto.yml"
+    config.write_text(
+        "project:\n"
+        "  render:\n"
+        '    - "*.qmd"\n'
+        '    - "!drafts/"\n'
+        '    - "!**/notes.qmd"\n'
+    )
+    assert quarto_render_excludes(config) == ["/drafts/", "**/notes.qmd"]
+
+    config.write_text("project:\n  type: website\n")
+    assert quarto_render_excludes(config) == []
+    assert quarto_render_excludes(tmp_path / "missing.yml") == []
@@ -0,0 +1,102 @@
+"""Tests that the CLI starts quickly, by only importing what it needs."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules which are slow to import, or only run tools (or the bench and watch
+# subcommands), so should only be imported once they are needed
+HEAVY_MODULES = (
+    "tree_sitter",
+    "tree_sitter_markdown",
+    "yaml",
+    "toml",
+    "lintquarto.runner",
+    "lintquarto.convert",
+    "lintquarto.bench",
+    "lintquarto.timings",
+    "lintquarto.watch",
+)
+
+# Maximum time (in milliseconds) allowed for `import lintquarto.main`. The
+# default is well above the usual time of roughly 40 ms, as times vary
+# between machines (and under coverage), so catches large regressions. Set
+# this environment variable for a tighter budget (e.g. 75, below the roughly
+# 100 ms taken when the modules above are imported)
+IMPORT_BUDGET_VARIABLE = "LINTQUARTO_IMPORT_BUDGET_MS"
+DEFAULT_IMPORT_BUDGET_MS = 250.0
+
+
+def import_times(code: str) -> dict[str, int]:
+    """
+    Run Python code with `-X importtime`, and return each module's time.
+
+    Parameters
+    ----------
+    code : str
+        Python code to run in a new interpreter.
+
+    Returns
+    -------
+    dict[str, int]
+        Mapping from each imported module to its cumulative import time (in
+        microseconds).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # Lines look like: "import time:   self |   cumulative |   module"
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import lintquarto.main",
+        # Run `lintquarto list` in the same way as the console script
+        (
+            "import sys; sys.argv = ['lintquarto', 'list']; "
+            "from lintquarto.main import main; main()"
+        ),
+    ],
+)
+def test_list_skips_heavy_imports(code):
+    """`lintquarto list` should not import the parser, YAML or TOML."""
+    imported = import_times(code)
+    heavy = [
+        module
+        for module in imported
+        if any(
+            module == name or module.startswith(f"{name}.")
+            for name in HEAVY_MODULES
+        )
+    ]
+    assert not heavy, f"Imported at startup: {heavy}"
+
+
+def test_import_time_budget():
+    """Importing the CLI should stay within the time budget."""
+    budget = float(
+        os.environ.get(IMPORT_BUDGET_VARIABLE, DEFAULT_IMPORT_BUDGET_MS)
+    )
+    # Take the fastest of a few runs, to reduce noise from the machine
+    fastest = min(
+        import_times("import lintquarto.main")["lintquarto.main"]
+        for _ in range(3)
+    )
+    assert fastest / 1000 < budget, (
+        f"Importing lintquarto.main took {fastest / 1000:.0f} ms "
+        f"(budget {budget:g} ms)"
+    )
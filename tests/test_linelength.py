@@ -7,7 +7,12 @@ from pathlib import Path
 import pytest
 import toml
 
-from lintquarto.linelength import LineLengthDetector
+from lintquarto.convert.converter import QmdToPyConverter
+from lintquarto.linelength import (
+    LineLengthDetector,
+    clear_line_length_cache,
+    find_line_length,
+)
 
 DEFAULT_RUFF_LINE_LENGTH = 88
 CUSTOM_RUFF_LINE_LENGTH = 101
@@ -164,3 +169,48 @@ def test_ruff_pyproject_toml_invalid():
         # Confirm that default value was used
         detector = LineLengthDetector("ruff", start_dir=tmpdir)
         assert detector.get_line_length() == DEFAULT_RUFF_LINE_LENGTH
+
+
+# =============================================================================
+# 4. Memoised lookups
+# =============================================================================
+
+
+def test_config_files_read_once(tmp_path, monkeypatch):
+    """Each folder's configuration is read once, whichever linter asks."""
+    clear_line_length_cache()
+    (tmp_path / ".flake8").write_text("[flake8]\nmax-line-length = 120\n")
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+
+    reads = []
+    read = configparser.ConfigParser.read
+
+    def record(self, filenames, *args, **kwargs):
+        reads.append(Path(filenames))
+        return read(self, filenames, *args, **kwargs)
+
+    monkeypatch.setattr(configparser.ConfigParser, "read", record)
+    for _ in range(3):
+        assert find_line_length("flake8", str(nested)) == 120
+        assert find_line_length("pycodestyle", str(tmp_path / "a")) == 120
+    assert reads == [tmp_path / ".flake8"]
+
+    # Changes are only seen once the cache is cleared
+    (nested / "setup.cfg").write_text("[flake8]\nmax-line-length = 99\n")
+    assert find_line_length("flake8", str(nested)) == 120
+    clear_line_length_cache()
+    assert find_line_length("flake8", str(nested)) == 99
+
+
+def test_converter_uses_nearest_project(tmp_path):
+    """Nested projects use their own line length, not the working dir's."""
+    clear_line_length_cache()
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "pyproject.toml").write_text("[tool.ruff]\nline-length = 100\n")
+
+    converter = QmdToPyConverter("ruff", config_dir=project)
+    assert converter.max_line_length == 100
+    converter = QmdToPyConverter("ruff", config_dir=tmp_path)
+    assert converter.max_line_length == DEFAULT_RUFF_LINE_LENGTH
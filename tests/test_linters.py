@@ -8,7 +8,7 @@ from unittest.mock import patch
 import pytest
 from utils import skip_if_linter_unexpected
 
-from lintquarto.registry import Linters
+from lintquarto.registry import Linters, stand_in
 
 ALL_LINTERS = [
     "basedpyright",
@@ -78,6 +78,37 @@ def test_supported_error_message_content():
     assert "Supported" in str(excinfo.value)
 
 
+def test_stdin_command():
+    """Tools reading from stdin are told the path of the .py file."""
+    linters = Linters()
+    command, label = linters.stdin_command("flake8", "doc.py")
+    assert command == ["flake8", "--stdin-display-name", "doc.py", "-"]
+    assert label is None
+
+    # pycodestyle can't be told a path, so reports its own label
+    assert linters.stdin_command("pycodestyle", "doc.py") == (
+        ["pycodestyle", "-"],
+        "stdin",
+    )
+
+    # Tools which need files return None
+    assert linters.stdin_command("mypy", "doc.py") is None
+    assert set(linters.stdin) <= set(linters.supported)
+
+
+def test_stand_in():
+    """A stand-in command runs in place of each linter, on the same path."""
+    with stand_in(["true"]):
+        linters = Linters()
+        assert linters.supported["mypy"] == ["true"]
+        assert linters.stdin_command("flake8", "doc.py") == (
+            ["true", "--stdin-display-name", "doc.py", "-"],
+            None,
+        )
+        assert "noop" not in linters.supported
+    assert Linters().supported["mypy"] == ["mypy"]
+
+
 # =============================================================================
 # 2. Linter availability
 # =============================================================================
@@ -142,6 +173,7 @@ def test_inp001_not_raised(tmp_path):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "-l",
             "ruff",
             "-p",
@@ -181,6 +213,7 @@ def test_ruf100_not_raised(tmp_path):
             sys.executable,
             "-m",
             "lintquarto",
+            "--no-cache",
             "-l",
             "ruff",
             "-p",
@@ -0,0 +1,67 @@
+"""Tests for the parallel module."""
+
+import sys
+import time
+
+import pytest
+
+from lintquarto.parallel import resolve_jobs, run_in_order
+
+
+def test_run_in_order_output_follows_input_order(capsys):
+    """Output is printed in input order, even if later items finish first."""
+
+    def work(item):
+        # Earlier items take longer, so they finish last
+        time.sleep(0.05 * (3 - item))
+        print(f"out {item}")
+        print(f"err {item}", file=sys.stderr)
+        return item * 10
+
+    results = run_in_order(work, [0, 1, 2], jobs=3)
+    captured = capsys.readouterr()
+
+    assert results == [0, 10, 20]
+    assert captured.out == "out 0\nout 1\nout 2\n"
+    assert captured.err == "err 0\nerr 1\nerr 2\n"
+
+
+def test_run_in_order_restores_streams():
+    """The original stdout and stderr are restored after running."""
+    stdout, stderr = sys.stdout, sys.stderr
+    run_in_order(print, ["a", "b"], jobs=2)
+    assert sys.stdout is stdout
+    assert sys.stderr is stderr
+
+
+def test_run_in_order_nested(capsys):
+    """Nested pools keep output in order at both levels."""
+
+    def inner(item):
+        print(item)
+
+    def outer(group):
+        run_in_order(inner, [f"{group}{i}" for i in range(3)], jobs=3)
+
+    run_in_order(outer, ["a", "b"], jobs=2)
+    assert capsys.readouterr().out.split() == [
+        "a0",
+        "a1",
+        "a2",
+        "b0",
+        "b1",
+        "b2",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("jobs", "expected"), [(None, 1), (1, 1), (4, 4), (-2, 1)]
+)
+def test_resolve_jobs(jobs, expected):
+    """Job counts are converted to a number of threads."""
+    assert resolve_jobs(jobs) == expected
+
+
+def test_resolve_jobs_zero_uses_cpus():
+    """Zero jobs means one per CPU."""
+    assert resolve_jobs(0) >= 1
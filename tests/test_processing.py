@@ -1,6 +1,8 @@
 """Tests for the processing module."""
 
+import os
 import re
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -8,9 +10,18 @@ from unittest.mock import patch
 
 import pytest
 
-from lintquarto.gather import gather_qmd_files
+from lintquarto import runner
+from lintquarto.convert.cache import ConversionCache
+from lintquarto.gather import FileStream, gather_qmd_files, git_changed_files
 from lintquarto.main import validate_no_commas
-from lintquarto.runner import lint_qmd
+from lintquarto.runner import (
+    ToolRunner,
+    chunk_arguments,
+    lint_qmd,
+    lint_qmd_batch,
+    relabel_stdin,
+    rewrite_paths,
+)
 
 CORE_LINTER = "flake8"
 
@@ -60,6 +71,33 @@ def test_lint_qmd_keep_temp(tmp_path):
     )
 
 
+@pytest.mark.parametrize(
+    ("linter", "expected"),
+    [
+        ("flake8", "doc.qmd:2:1: F401"),
+        ("pycodestyle", "doc.qmd:3:2: E225"),
+        ("pyflakes", "doc.qmd:2:1: 'os' imported but unused"),
+        ("ruff", "doc.qmd:2:8"),
+    ],
+)
+def test_lint_qmd_stdin(tmp_path, monkeypatch, capsys, linter, expected):
+    """Tools that read from stdin are linted without writing a .py file."""
+    monkeypatch.chdir(tmp_path)
+    qmd_file = tmp_path / "doc.qmd"
+    qmd_file.write_text("```{python}\nimport os\nx=1\n```\n")
+    conversions = ConversionCache(lint_non_exec=False, verbose=False)
+
+    ret = lint_qmd(str(qmd_file), linter, conversions=conversions)
+    output = capsys.readouterr().out
+
+    assert ret == 0
+    assert expected in output
+    assert "stdin:" not in output
+    assert ".py" not in output
+    assert conversions.py_files == []
+    assert not any(tmp_path.glob("*.py"))
+
+
 def test_lint_qmd_pylint_filepath(capsys):
     """Checks filepath in pylint output is not repeating folder names."""
     # Get path to the example QMD file that already produces pylint warnings.
@@ -99,7 +137,16 @@ def test_filename_warning():
 
     # Run lintquarto on the file
     result = subprocess.run(
-        [sys.executable, "-m", "lintquarto", "-l", "pylint", "-p", qmd_path],
+        [
+            sys.executable,
+            "-m",
+            "lintquarto",
+            "--no-cache",
+            "-l",
+            "pylint",
+            "-p",
+            qmd_path,
+        ],
         capture_output=True,
         text=True,
         check=False,
@@ -158,6 +205,230 @@ def test_gather_qmd_files_exclude(tmp_path):
     assert set(files) == {str(tmp_path / "a.qmd")}
 
 
+def test_gather_qmd_files_only(tmp_path):
+    """Only files in `only` are kept, still honouring paths and exclude."""
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.qmd").write_text(name)
+    subdir = tmp_path / "subdir"
+    subdir.mkdir()
+    (subdir / "d.qmd").write_text("D")
+    only = {
+        str(tmp_path / "a.qmd"),
+        str(tmp_path / "b.qmd"),
+        str(tmp_path / "notes.txt"),
+        str(subdir / "d.qmd"),
+    }
+
+    files = gather_qmd_files(
+        [str(tmp_path)], exclude=[str(tmp_path / "b.qmd")], only=only
+    )
+    assert files == [str(tmp_path / "a.qmd"), str(subdir / "d.qmd")]
+    assert gather_qmd_files([str(subdir)], only=only) == [
+        str(subdir / "d.qmd")
+    ]
+
+
+def test_gather_skips_output_folders(tmp_path):
+    """Quarto output folders are skipped, unless given as a path."""
+    (tmp_path / "index.qmd").write_text("A")
+    for name in ("_site", ".quarto", "_freeze", "node_modules"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "copy.qmd").write_text("B")
+
+    assert gather_qmd_files([tmp_path]) == [str(tmp_path / "index.qmd")]
+    assert gather_qmd_files([tmp_path / "_site"]) == [
+        str(tmp_path / "_site" / "copy.qmd")
+    ]
+
+
+def test_gather_prunes_excluded_folders(tmp_path, monkeypatch):
+    """Excluded folders aren't searched at all."""
+    (tmp_path / "keep").mkdir()
+    (tmp_path / "keep" / "a.qmd").write_text("A")
+    (tmp_path / "skip" / "deep").mkdir(parents=True)
+    (tmp_path / "skip" / "deep" / "b.qmd").write_text("B")
+
+    scanned = []
+    scandir = os.scandir
+
+    def record(path):
+        scanned.append(Path(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", record)
+    files = gather_qmd_files([tmp_path], exclude=[tmp_path / "skip"])
+    assert files == [str(tmp_path / "keep" / "a.qmd")]
+    assert scanned == [tmp_path, tmp_path / "keep"]
+
+
+def test_gather_overlapping_paths(tmp_path):
+    """Files found from more than one path are listed once, in order."""
+    subdir = tmp_path / "sub"
+    subdir.mkdir()
+    (subdir / "b.qmd").write_text("B")
+    (tmp_path / "a.qmd").write_text("A")
+    (tmp_path / "c.qmd").write_text("C")
+
+    files = gather_qmd_files([subdir / "b.qmd", tmp_path, subdir])
+    assert files == [
+        str(subdir / "b.qmd"),
+        str(tmp_path / "a.qmd"),
+        str(tmp_path / "c.qmd"),
+    ]
+
+
+def test_gather_resolves_symlinked_files(tmp_path):
+    """Linked files are listed by their target, which may be excluded."""
+    (tmp_path / "shared").mkdir()
+    target = tmp_path / "shared" / "common.qmd"
+    target.write_text("A")
+    (tmp_path / "site").mkdir()
+    (tmp_path / "site" / "common.qmd").symlink_to(target)
+
+    assert gather_qmd_files([tmp_path / "site"]) == [str(target)]
+    assert gather_qmd_files([tmp_path / "site"], exclude=[target]) == []
+
+
+def test_gather_exclude_patterns(tmp_path, monkeypatch):
+    """Gitignore-style patterns exclude files and prune folders."""
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.qmd", "a_scratch.qmd", "docs/drafts/b.qmd", "docs/c.qmd"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("A")
+
+    files = gather_qmd_files(
+        [tmp_path], exclude=["**/drafts/**", "*_scratch.qmd"]
+    )
+    assert files == [str(tmp_path / "a.qmd"), str(tmp_path / "docs" / "c.qmd")]
+    # Patterns also apply to files given directly
+    assert gather_qmd_files(["a_scratch.qmd"], exclude=["*_scratch.qmd"]) == []
+
+
+def test_gather_respects_gitignore(tmp_path):
+    """`.gitignore` files (at any depth) are used if asked."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "a.qmd").write_text("A")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / ".gitignore").write_text("*.qmd\n!keep.qmd\n")
+    (tmp_path / "docs" / "b.qmd").write_text("B")
+    (tmp_path / "docs" / "keep.qmd").write_text("C")
+
+    assert len(gather_qmd_files([tmp_path])) == 3
+    assert gather_qmd_files([tmp_path], respect_gitignore=True) == [
+        str(tmp_path / "docs" / "keep.qmd")
+    ]
+
+
+def test_gather_respects_quarto_render(tmp_path):
+    """Files left out of rendering by `_quarto.yml` are excluded if asked."""
+    (tmp_path / "_quarto.yml").write_text(
+        'project:\n  render:\n    - "*.qmd"\n    - "!drafts/"\n'
+    )
+    (tmp_path / "index.qmd").write_text("A")
+    (tmp_path / "drafts").mkdir()
+    (tmp_path / "drafts" / "b.qmd").write_text("B")
+
+    assert len(gather_qmd_files([tmp_path])) == 2
+    assert gather_qmd_files([tmp_path], respect_quarto_render=True) == [
+        str(tmp_path / "index.qmd")
+    ]
+
+
+def test_file_stream_replays_files():
+    """Files are found as needed, and replayed for later passes."""
+    found = []
+
+    def files():
+        for name in ("a.qmd", "b.qmd"):
+            found.append(name)
+            yield name
+
+    stream = FileStream(files())
+    assert not stream.is_empty()
+    assert found == ["a.qmd"]
+    assert list(stream) == ["a.qmd", "b.qmd"]
+    assert list(stream) == ["a.qmd", "b.qmd"]
+    assert found == ["a.qmd", "b.qmd"]
+    assert stream.exhausted
+    assert FileStream(iter([])).is_empty()
+
+
+def test_tool_runner_streams_files(monkeypatch):
+    """The first tool starts on each file as soon as it is found."""
+    events = []
+
+    def files():
+        for name in ("a", "b"):
+            events.append(f"found {name}")
+            yield name
+
+    def lint(qmd_file, linter, **_kwargs):
+        events.append(f"{linter} {qmd_file}")
+        return 0
+
+    monkeypatch.setattr(runner, "lint_qmd", lint)
+    with ToolRunner(
+        files(), keep_temp=False, verbose=False, lint_non_exec=False
+    ) as tool_runner:
+        tool_runner.run_checks(["flake8", "ruff"], [])
+    assert events == [
+        "found a",
+        "flake8 a",
+        "found b",
+        "flake8 b",
+        "ruff a",
+        "ruff b",
+    ]
+
+
+def _git(repo, *args):
+    """Run a git command in `repo`."""
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],  # noqa: S607
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_git_changed_files(tmp_path):
+    """Changed, untracked and staged files are found with git."""
+    _git(tmp_path, "init", "-q")
+    for name in ("same", "edited", "deleted"):
+        (tmp_path / f"{name}.qmd").write_text(name)
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "first")
+
+    (tmp_path / "edited.qmd").write_text("changed")
+    (tmp_path / "deleted.qmd").unlink()
+    (tmp_path / "new.qmd").write_text("new")
+
+    assert git_changed_files("HEAD", cwd=tmp_path) == {
+        str(tmp_path.resolve() / "edited.qmd"),
+        str(tmp_path.resolve() / "new.qmd"),
+    }
+    assert git_changed_files(staged=True, cwd=tmp_path) == set()
+
+    _git(tmp_path, "add", "new.qmd")
+    assert git_changed_files(staged=True, cwd=tmp_path) == {
+        str(tmp_path.resolve() / "new.qmd"),
+    }
+
+
+def test_git_changed_files_errors(tmp_path):
+    """Unknown references, or folders outside a repository, raise errors."""
+    with pytest.raises(RuntimeError, match="git rev-parse failed"):
+        git_changed_files("HEAD", cwd=tmp_path)
+
+    _git(tmp_path, "init", "-q")
+    with pytest.raises(RuntimeError, match="git diff failed"):
+        git_changed_files("no-such-ref", cwd=tmp_path)
+    with pytest.raises(ValueError, match="exactly one"):
+        git_changed_files(cwd=tmp_path)
+
+
 # =============================================================================
 # 3. validate_no_commas()
 # =============================================================================
@@ -207,3 +478,105 @@ def test_temp_file_kept_when_flag_set(tmp_path):
     lint_qmd(qmd_file, linter="flake8", keep_temp_files=True)
 
     assert len(list(tmp_path.glob("*.py"))) == 1
+
+
+# =============================================================================
+# 5. lint_qmd_batch()
+# =============================================================================
+
+
+def test_lint_qmd_batch_maps_output_per_file(tmp_path, capsys):
+    """Diagnostics from one batched run are mapped back to each .qmd file."""
+    # Two documents with the same name in different folders
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "index.qmd").write_text(
+            "```{python}\nimport os\n```\n"
+        )
+    qmd_files = [
+        str(tmp_path / "a" / "index.qmd"),
+        str(tmp_path / "b" / "index.qmd"),
+    ]
+
+    ret = lint_qmd_batch(qmd_files, CORE_LINTER)
+    output = capsys.readouterr().out
+
+    assert ret == 0
+    for qmd_file in qmd_files:
+        assert f"{qmd_file}:2:1: F401" in output
+    assert ".py" not in output
+    assert not any(tmp_path.rglob("*.py"))
+
+
+@pytest.mark.skipif(
+    not shutil.which("mypy"), reason="Requires mypy to be installed"
+)
+@pytest.mark.parametrize("shared", [False, True])
+def test_lint_qmd_batch_unique_module_names(tmp_path, capsys, shared):
+    """Type checking documents with the same name together doesn't clash."""
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "index.qmd").write_text(
+            "```{python}\nx: int = 'text'\n```\n"
+        )
+    qmd_files = [
+        str(tmp_path / "a" / "index.qmd"),
+        str(tmp_path / "b" / "index.qmd"),
+    ]
+    conversions = (
+        ConversionCache(lint_non_exec=False, verbose=False) if shared else None
+    )
+
+    lint_qmd_batch(qmd_files, "mypy", conversions=conversions)
+    if conversions is not None:
+        conversions.cleanup()
+    output = capsys.readouterr().out
+
+    assert "Duplicate module" not in output
+    for qmd_file in qmd_files:
+        assert f"{qmd_file}:2:" in output
+    assert not any(tmp_path.rglob("*.py"))
+
+
+def test_lint_qmd_batch_reports_invalid_file(tmp_path, capsys):
+    """Invalid files give an error, but the remaining files are linted."""
+    qmd_file = tmp_path / "test.qmd"
+    qmd_file.write_text("```{python}\nimport os\n```\n")
+
+    ret = lint_qmd_batch(
+        [str(tmp_path / "notfound.qmd"), str(qmd_file)], CORE_LINTER
+    )
+    captured = capsys.readouterr()
+
+    assert ret == 1
+    assert "notfound.qmd is not a valid .qmd file" in captured.err
+    assert "test.qmd:2:1: F401" in captured.out
+
+
+def test_rewrite_paths():
+    """Full paths win over basenames, and longer names are left alone."""
+    replacements = {
+        "/x/a/index_1.py": "/x/a/index.qmd",
+        "index_1.py": "index.qmd",
+        "index.py": "index.qmd",
+    }
+    text = "/x/a/index_1.py:1: E1\nindex.py:2: E2\nmyindex.py:3: E3\n"
+    assert rewrite_paths(text, replacements) == (
+        "/x/a/index.qmd:1: E1\nindex.qmd:2: E2\nmyindex.py:3: E3\n"
+    )
+
+
+def test_relabel_stdin():
+    """Only the label at the start of a line is replaced."""
+    text = "stdin:2:1: E225\n<stdin> stdin:1\nstdin:3:1: W291"
+    assert relabel_stdin(text, "stdin", Path("doc.py")) == (
+        "doc.py:2:1: E225\n<stdin> stdin:1\ndoc.py:3:1: W291"
+    )
+
+
+def test_chunk_arguments():
+    """Arguments are split so each command stays under the length limit."""
+    command = ["tool"]  # Length 5, including separator
+    args = ["aaaa", "bbbb", "cccc", "dddddddddddd"]
+    chunks = list(chunk_arguments(command, args, max_length=15))
+    assert chunks == [["aaaa", "bbbb"], ["cccc"], ["dddddddddddd"]]
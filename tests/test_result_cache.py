@@ -0,0 +1,108 @@
+"""Tests for the result_cache module."""
+
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lintquarto.result_cache import CachedResult, ResultCache
+from lintquarto.runner import lint_qmd
+
+QMD = "```{python}\nimport os\n```\n"
+
+
+def _cache(tmp_path, **kwargs):
+    """Create a ResultCache in a temporary folder."""
+    return ResultCache(
+        tmp_path / ".lintquarto_cache",
+        lint_non_exec=False,
+        verbose=False,
+        **kwargs,
+    )
+
+
+def test_key_changes_with_inputs(tmp_path):
+    """The key changes with file content, linter and lint_non_exec."""
+    qmd_file = tmp_path / "doc.qmd"
+    qmd_file.write_text(QMD)
+    cache = _cache(tmp_path)
+
+    key = cache.key(qmd_file, "pyflakes")
+    assert key == cache.key(qmd_file, "pyflakes")
+    assert key != cache.key(qmd_file, "vulture")
+
+    other = ResultCache(
+        tmp_path / ".lintquarto_cache", lint_non_exec=True, verbose=False
+    )
+    assert key != other.key(qmd_file, "pyflakes")
+
+    qmd_file.write_text(QMD + "\n")
+    assert key != cache.key(qmd_file, "pyflakes")
+
+
+def test_key_changes_with_config(tmp_path, monkeypatch):
+    """Editing a tool configuration file changes the key."""
+    monkeypatch.chdir(tmp_path)
+    qmd_file = tmp_path / "doc.qmd"
+    qmd_file.write_text(QMD)
+    key = _cache(tmp_path).key(qmd_file, "flake8")
+
+    (tmp_path / "setup.cfg").write_text("[flake8]\nselect = F\n")
+    assert key != _cache(tmp_path).key(qmd_file, "flake8")
+
+
+def test_key_none_for_missing_file(tmp_path):
+    """No key is made for a file that can't be read."""
+    assert _cache(tmp_path).key(tmp_path / "missing.qmd", "pyflakes") is None
+
+
+@pytest.mark.parametrize("linter", ["mypy", "pylint", "pyright"])
+def test_key_none_for_cross_file_linters(tmp_path, linter):
+    """Linters that read imported modules are never cached."""
+    qmd_file = tmp_path / "doc.qmd"
+    qmd_file.write_text(QMD)
+    assert _cache(tmp_path).key(qmd_file, linter) is None
+
+
+def test_put_and_get(tmp_path):
+    """Saved results are returned, and the folder is ignored by git."""
+    cache = _cache(tmp_path)
+    assert cache.get("abc") is None
+
+    cache.put("abc", CachedResult("out\n", "err", exit_code=0))
+    assert cache.get("abc") == CachedResult("out\n", "err", exit_code=0)
+    assert (cache.directory / ".gitignore").read_text().endswith("*\n")
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    """Pruning removes the oldest results until under the size limit."""
+    cache = _cache(tmp_path, max_bytes=200)
+    for i, key in enumerate(["old", "mid", "new"]):
+        cache.put(key, CachedResult("x" * 50, "", exit_code=0))
+        os.utime(cache.directory / f"{key}.json", (i, i))
+
+    # Reading a result marks it as recently used
+    assert cache.get("old") is not None
+    cache.prune()
+
+    assert cache.get("mid") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
+
+
+def test_lint_qmd_replays_cached_result(tmp_path, capsys):
+    """A second run prints the saved output without running the linter."""
+    qmd_file = tmp_path / "doc.qmd"
+    qmd_file.write_text(QMD)
+    cache = _cache(tmp_path)
+
+    assert lint_qmd(qmd_file, "pyflakes", results=cache) == 0
+    first = capsys.readouterr()
+    assert "'os' imported but unused" in first.out
+
+    with patch.object(subprocess, "run") as run:
+        assert lint_qmd(qmd_file, "pyflakes", results=cache) == 0
+    run.assert_not_called()
+    assert capsys.readouterr() == first
+    assert not any(tmp_path.glob("*.py"))
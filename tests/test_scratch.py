@@ -0,0 +1,56 @@
+"""Tests for the ScratchDir class."""
+
+from pathlib import Path
+
+from lintquarto.convert.cache import ConversionCache
+from lintquarto.convert.scratch import (
+    ScratchDir,
+    default_scratch_parent,
+    mirrored_path,
+)
+
+QMD = "```{python}\nx = 1\n```\n"
+
+
+def test_mirrored_path(tmp_path, monkeypatch):
+    """Paths are mirrored relative to the working directory, or the root."""
+    monkeypatch.chdir(tmp_path)
+    assert mirrored_path(tmp_path / "docs" / "a.qmd") == Path("docs/a.qmd")
+    assert mirrored_path("docs/a.qmd") == Path("docs/a.qmd")
+
+    outside = tmp_path.parent / "other" / "b.qmd"
+    assert not mirrored_path(outside).is_absolute()
+    assert mirrored_path(outside).parts[-2:] == ("other", "b.qmd")
+
+
+def test_default_scratch_parent(tmp_path, monkeypatch):
+    """$XDG_RUNTIME_DIR is preferred, when it is a usable folder."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_scratch_parent() == tmp_path
+
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "missing"))
+    assert default_scratch_parent() != tmp_path / "missing"
+
+
+def test_scratch_conversions(tmp_path, monkeypatch):
+    """Converted files mirror the .qmd layout, and are removed together."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    qmd = tmp_path / "docs" / "doc.qmd"
+    qmd.write_text(QMD, encoding="utf-8")
+    scratch = ScratchDir(tmp_path / "scratch")
+    cache = ConversionCache(
+        lint_non_exec=False, verbose=False, scratch=scratch
+    )
+
+    mypy_file = cache.get(qmd, "mypy")
+    radon_file = cache.get(qmd, "radon-raw")
+    run_dir = scratch.run_dir
+    assert mypy_file == run_dir / "docs" / "doc.py"
+    assert radon_file.parent == run_dir / "docs"
+    assert radon_file != mypy_file
+    assert not (tmp_path / "docs" / "doc.py").exists()
+
+    cache.cleanup()
+    assert not run_dir.exists()
+    assert scratch.run_dir is None
@@ -0,0 +1,100 @@
+"""Tests for the timings module."""
+
+import io
+import threading
+
+from lintquarto.timings import phase, recording
+
+
+def test_phase_without_recording():
+    """Phases run as normal when nothing is recording."""
+    ran = []
+    with phase("convert", file="doc.qmd"):
+        ran.append(True)
+    assert ran == [True]
+
+
+def test_recording_collects_phases():
+    """Phases from every thread are recorded, with their file and tool."""
+
+    def run_tool():
+        with phase("tool", file="b.qmd", tool="noop"):
+            pass
+
+    with recording() as timings:
+        with phase("convert", file="a.qmd"):
+            pass
+        thread = threading.Thread(target=run_tool)
+        thread.start()
+        thread.join()
+
+    # Nothing is recorded once the block has ended
+    with phase("convert", file="c.qmd"):
+        pass
+
+    assert [(s.phase, s.file, s.tool) for s in timings.spans] == [
+        ("convert", "a.qmd", None),
+        ("tool", "b.qmd", "noop"),
+    ]
+    assert timings.spans[0].thread != timings.spans[1].thread
+    assert set(timings.totals()) == {"convert", "tool"}
+    assert all(span.duration >= 0 for span in timings.spans)
+
+
+def test_nested_phases():
+    """Nested phases take the outer file and tool, and aren't counted twice."""
+    with recording() as timings:
+        with phase("convert", file="a.qmd"):
+            with phase("parse"):
+                pass
+            with phase("build", tool="ruff"):
+                pass
+        with phase("tool", file="a.qmd", tool="ruff"):
+            pass
+
+    assert [(s.phase, s.file, s.tool, s.depth) for s in timings.spans] == [
+        ("parse", "a.qmd", None, 1),
+        ("build", "a.qmd", "ruff", 1),
+        ("convert", "a.qmd", None, 0),
+        ("tool", "a.qmd", "ruff", 0),
+    ]
+    assert list(timings.totals()) == ["convert", "tool"]
+    top_level = timings.spans[2].duration + timings.spans[3].duration
+    assert timings.per_file() == {"a.qmd": top_level}
+    assert timings.per_tool() == {"ruff": timings.spans[3].duration}
+    assert timings.elapsed >= top_level
+
+    # The clock has already stopped
+    elapsed = timings.elapsed
+    timings.stop()
+    assert timings.elapsed == elapsed
+
+
+def test_summary_and_chrome_trace():
+    """The summary lists phases, files and tools; the trace has each phase."""
+    with (
+        recording() as timings,
+        phase("convert", file="a.qmd"),
+        phase("parse"),
+    ):
+        pass
+
+    output = io.StringIO()
+    timings.print_summary(file=output)
+    summary = output.getvalue()
+    assert "\nconvert " in summary
+    assert "\n  parse " in summary
+    assert "a.qmd" in summary
+    assert "Slowest tools" not in summary
+
+    events = timings.to_chrome_trace()["traceEvents"]
+    assert [(e["ph"], e["name"]) for e in events] == [
+        ("M", "thread_name"),
+        ("X", "convert"),
+        ("X", "parse"),
+    ]
+    convert, parse = events[1], events[2]
+    assert parse["args"] == {"file": "a.qmd"}
+    assert convert["tid"] == parse["tid"] == 1
+    assert convert["ts"] <= parse["ts"]
+    assert parse["dur"] <= convert["dur"]
@@ -0,0 +1,111 @@
+"""Tests for the watch module."""
+
+import os
+import threading
+import time
+
+from lintquarto.watch import changed_files, snapshot, watch
+
+
+def _touch(path, text, mtime):
+    """Write a file and give it a distinct modification time."""
+    path.write_text(text)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_changed_files(tmp_path):
+    """New and modified files are reported; removed files are not."""
+    same, edited, removed = (tmp_path / f"{n}.qmd" for n in "ser")
+    for path in (same, edited, removed):
+        _touch(path, "x", 1)
+    files = [str(same), str(edited), str(removed)]
+    before = snapshot(files)
+
+    _touch(edited, "y", 2)
+    removed.unlink()
+    new = tmp_path / "new.qmd"
+    _touch(new, "n", 3)
+
+    after = snapshot([*files, str(new)])
+    assert changed_files(before, after) == [str(edited), str(new)]
+
+
+def test_watch_reruns_changed_files(tmp_path, capsys):
+    """After a first full run, only changed files are run again, once."""
+    files = [str(tmp_path / f"{n}.qmd") for n in ("a", "b")]
+    for i, file in enumerate(files):
+        _touch(tmp_path / file, "x", i)
+
+    runs = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch,
+        args=(lambda: files, lambda run: runs.append(run) or 0),
+        kwargs={"interval": 0.01, "debounce": 0.2, "stop": stop},
+    )
+    thread.start()
+
+    # Several quick saves to one file are handled in a single run
+    time.sleep(0.05)
+    for i in range(3):
+        _touch(tmp_path / files[1], f"save {i}", 100 + i)
+        time.sleep(0.01)
+
+    deadline = time.monotonic() + 5
+    while len(runs) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    stop.set()
+    thread.join()
+
+    assert runs == [files, [files[1]]]
+    assert "Changed:" in capsys.readouterr().out
+
+
+def test_watch_only_searches_every_rescan(tmp_path):
+    """Known files are checked each poll; new files wait for a search."""
+    known = tmp_path / "known.qmd"
+    _touch(known, "x", 1)
+    new = tmp_path / "new.qmd"
+    files = [str(known)]
+    searches = []
+
+    def gather():
+        searches.append(time.monotonic())
+        return list(files)
+
+    runs = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch,
+        args=(gather, lambda run: runs.append(run) or 0),
+        kwargs={
+            "interval": 0.01,
+            "debounce": 0.02,
+            "rescan": 1.0,
+            "stop": stop,
+        },
+    )
+    thread.start()
+
+    def wait_for_runs(count):
+        deadline = time.monotonic() + 5
+        while len(runs) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # A change to a known file is found without searching again
+    time.sleep(0.05)
+    _touch(known, "y", 2)
+    wait_for_runs(2)
+    assert runs[1] == [str(known)]
+    assert len(searches) == 1
+
+    # A new file is found by the next search
+    _touch(new, "n", 3)
+    files.append(str(new))
+    wait_for_runs(3)
+    stop.set()
+    thread.join()
+
+    assert runs[2] == [str(new)]
+    assert len(searches) >= 2